@@ -0,0 +1,243 @@
+"""
+a: zak-45
+d: 17/10/2026
+v: 1.0.0
+
+Direct WLED sink, DDP (Distributed Display Protocol) over UDP.
+
+Mouth frames are pre-rendered to the matrix size (see matrixrender), so each frame is split into DDP packets
+only once, when the model is loaded. Sending a mouth image is then one sendto() per packet and per target,
+from the cue scheduler thread: no queue, no allocation, no resize.
+
+DDP packet, network byte order, 10 bytes header + data:
+
+    flags       uint8   0x40 (version 1), + 0x01 (push) on last packet of the frame
+    sequence    uint8   0 (not used), packets are never modified once built
+    data type   uint8   0x0B (RGB, 8 bits per channel)
+    destination uint8   1 (default output device)
+    offset      uint32  data offset in bytes
+    length      uint16  data length in bytes (max DDP_MAX_DATA)
+
+Run this file to send all frames to a local UDP listener (stand-in of a WLED device) and check them.
+
+"""
+import socket
+import struct
+
+from configmanager import ConfigManager
+
+cfg_mgr = ConfigManager(logger_name='WLEDLogger.ddp')
+
+DDP_PORT = 4048
+DDP_FLAGS = 0x40
+DDP_PUSH = 0x01
+DDP_TYPE_RGB = 0x0B
+DDP_DESTINATION = 1
+# 480 RGB pixels, keep datagram under usual MTU
+DDP_MAX_DATA = 1440
+HEADER = struct.Struct('!BBBBIH')
+
+
+def parse_targets(targets: str, default_size: tuple = (32, 32), default_port: int = DDP_PORT):
+    """
+    Parse a target list string, as found in the config file (ddp_targets).
+
+    Args:
+        targets (str): comma separated list of ip[:port][@WxH] e.g. "192.168.1.50, 192.168.1.51:4048@64x32"
+        default_size (tuple): matrix (width, height) used when not provided. Defaults to (32, 32).
+        default_port (int): port used when not provided. Defaults to DDP_PORT.
+
+    Returns:
+        list: list of (ip, port, (width, height)) tuples
+
+    """
+    result = []
+    for target in (targets or '').split(','):
+        target = target.strip()
+        if not target:
+            continue
+        address, _, size = target.partition('@')
+        ip, _, port = address.partition(':')
+        try:
+            width, height = (int(value) for value in size.lower().split('x')) if size else default_size
+            result.append((ip.strip(), int(port) if port.strip() else default_port, (width, height)))
+        except ValueError as e:
+            cfg_mgr.logger.error(f'Bad DDP target {target}: {e}')
+    return result
+
+
+def build_packets(frame: bytes):
+    """
+    Split one frame into DDP packets, push flag set on the last one.
+
+    Returns:
+        tuple: bytes of each packet.
+
+    """
+    packets = []
+    for offset in range(0, len(frame), DDP_MAX_DATA):
+        data = frame[offset:offset + DDP_MAX_DATA]
+        last = offset + DDP_MAX_DATA >= len(frame)
+        header = HEADER.pack(DDP_FLAGS | (DDP_PUSH if last else 0), 0, DDP_TYPE_RGB, DDP_DESTINATION,
+                             offset, len(data))
+        packets.append(header + data)
+    return tuple(packets)
+
+
+def decode_packet(packet: bytes):
+    """
+    Decode a DDP packet (receiver side / debug).
+
+    Returns:
+        dict: flags, push, sequence, type, destination, offset, length and data.
+
+    """
+    flags, sequence, data_type, destination, offset, length = HEADER.unpack_from(packet)
+    return {'flags': flags, 'push': bool(flags & DDP_PUSH), 'sequence': sequence, 'type': data_type,
+            'destination': destination, 'offset': offset, 'length': length,
+            'data': packet[HEADER.size:HEADER.size + length]}
+
+
+class DDPClient:
+    """
+    Send pre-rendered mouth frames to one or several WLED devices, DDP over UDP.
+
+    Targets may have different matrix sizes, each one receive the frame rendered for its size.
+    send_image() is non-blocking and can be called from any thread (cue scheduler).
+
+    ddp_client = DDPClient(parse_targets('192.168.1.50@32x32, 192.168.1.51@64x32'))
+    ddp_client.set_frames(LipAPI.matrix_frames)  # each time the mouth model change
+
+    ddp_client.send_image(LipAPI.mouth_to_image['X'])
+
+    print(ddp_client.get_stats())  # {'sent': 1, 'packets': 6, 'missing': 0, 'errors': {}}
+
+    ddp_client.stop()
+
+    """
+
+    def __init__(self, targets: list):
+        """
+        Initializes a new instance of the DDPClient class, hostnames are resolved once here.
+
+        Args:
+            targets (list): (ip, port, (width, height)) targets, see parse_targets().
+
+        Returns:
+            None
+
+        """
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.targets = []
+        for ip, port, size in targets:
+            try:
+                self.targets.append(((socket.gethostbyname(ip), int(port)), tuple(size)))
+            except (socket.gaierror, ValueError) as e:
+                cfg_mgr.logger.error(f'Bad DDP target {ip}:{port}: {e}')
+        self.packets = {}  # (width, height): packets of each image
+        self.errors = {}
+        self.sent = 0
+        self.packet_count = 0
+        self.missing = 0
+
+    def set_frames(self, frames: dict):
+        """
+        Build the DDP packets of all images, for the sizes used by targets.
+
+        Args:
+            frames (dict): (width, height): list of packed RGB bytes, one per image (see MatrixRenderer.render).
+
+        Returns:
+            None
+
+        """
+        packets = {}
+        for _, size in self.targets:
+            if size in packets:
+                continue
+            if size not in frames:
+                cfg_mgr.logger.warning(f'No mouth frames rendered for matrix size {size[0]}x{size[1]}')
+                continue
+            packets[size] = [build_packets(frame) for frame in frames[size]]
+        # replaced at once, sender thread never see a partial set
+        self.packets = packets
+
+    def send_image(self, image_number: int):
+        """
+        Send one image to all targets, never block.
+
+        Args:
+            image_number (int): mouth image index.
+
+        Returns:
+            None
+
+        """
+        packets = self.packets
+        for target, size in self.targets:
+            try:
+                frame_packets = packets[size][image_number]
+            except (KeyError, IndexError):
+                self.missing += 1
+                continue
+            for packet in frame_packets:
+                try:
+                    self.sock.sendto(packet, target)
+                except OSError as e:
+                    # BlockingIOError (buffer full) included, this target miss this packet
+                    self.errors[target] = self.errors.get(target, 0) + 1
+                    cfg_mgr.logger.debug(f'DDP send error to {target}: {e}')
+            self.packet_count += len(frame_packets)
+        self.sent += 1
+
+    def get_stats(self):
+        """
+        Retrieves the client counters.
+
+        Returns:
+            dict: sent images, packets count, images without frame and send errors per target.
+
+        """
+        return {'sent': self.sent, 'packets': self.packet_count, 'missing': self.missing,
+                'errors': {f'{ip}:{port}': count for (ip, port), count in self.errors.items()}}
+
+    def stop(self):
+        """
+        Stops the DDP client and releases the socket.
+
+        Returns:
+            None
+
+        """
+        self.sock.close()
+        cfg_mgr.logger.debug(f'DDP client stopped: {self.get_stats()}')
+
+
+if __name__ == "__main__":
+    # local UDP listener as WLED stand-in, receive all images and rebuild frames from packets
+    listener = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.settimeout(1)
+    listen_port = listener.getsockname()[1]
+
+    sizes = ((16, 16), (64, 32))
+    test_frames = {size: [bytes([image * 20 + channel for channel in range(3)]) * size[0] * size[1]
+                          for image in range(9)] for size in sizes}
+
+    for test_size in sizes:
+        client = DDPClient([('127.0.0.1', listen_port, test_size)])
+        client.set_frames(test_frames)
+        for image_index, expected in enumerate(test_frames[test_size]):
+            client.send_image(image_index)
+            received = bytearray(len(expected))
+            while True:
+                decoded = decode_packet(listener.recv(2048))
+                received[decoded['offset']:decoded['offset'] + decoded['length']] = decoded['data']
+                if decoded['push']:
+                    break
+            assert bytes(received) == expected, f'frame {image_index} {test_size} mismatch'
+        print(f'{test_size[0]}x{test_size[1]}: {client.get_stats()}')
+        client.stop()
+
+    listener.close()
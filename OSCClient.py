@@ -1,73 +1,202 @@
+import socket
 import threading
 
-from time import sleep
-from pythonosc import udp_client
+from collections import deque
+from collections.abc import Iterable
+from time import time
+from pythonosc.osc_message_builder import OscMessageBuilder
+from pythonosc.osc_bundle_builder import OscBundleBuilder
 from configmanager import ConfigManager
 
 cfg_mgr = ConfigManager(logger_name='WLEDLogger.osc')
 
+
+def parse_targets(targets: str, default_port: int = 12000):
+    """
+    Parse a target list string, as found in the config file (osc_targets).
+
+    Args:
+        targets (str): comma separated list of ip[:port] e.g. "192.168.1.20:12000, 192.168.1.21"
+        default_port (int): port used when not provided. Defaults to 12000.
+
+    Returns:
+        list: list of (ip, port) tuples
+
+    """
+    result = []
+    for target in (targets or '').split(','):
+        target = target.strip()
+        if not target:
+            continue
+        ip, _, port = target.rpartition(':') if ':' in target else (target, '', '')
+        result.append((ip.strip(), int(port) if port.strip() else default_port))
+    return result
+
+
 class OSCClient:
     """
 
-    Simple non-blocking OSC client to send message
-    Use Queue and thread to avoid block
+    Simple non-blocking OSC client to send message to one or several targets (fan-out)
+    Use bounded queue and thread to avoid block
+
+    Queue is a deque with maxlen: append/popleft are atomic, no lock needed, and when full the oldest
+    message is dropped. Messages queued during the same tick (before the sender thread wake up)
+    are coalesced into one OSC bundle with a timetag.
+
+    Each message/bundle is encoded once, then the same bytes are sent to all targets from one
+    non-blocking UDP socket. Adding a target does not add any thread.
 
     osc_client = OSCClient("127.0.0.1", 8000)
+    osc_client.add_target("192.168.1.20", 12000)
 
     osc_client.send_message("/example/address", 123)
     osc_client.send_message("/example/address", [1, 2, 3])
 
+    print(osc_client.get_stats())  # {'sent': 2, 'dropped': 0, 'coalesced': 1, 'queued': 0, 'errors': {}}
+
     osc_client.stop()
 
     """
 
-    def __init__(self, ip: str, port: int):
+    def __init__(self, ip: str, port: int, queue_size: int = 256, max_bundle: int = 32, targets: list = None):
         """
         Initializes a new instance of the OSCClient class for sending OSC messages.
-        This constructor sets up the UDP client with the specified IP and port, initializes a message queue,
+        This constructor sets up the UDP socket and the targets, initializes a message queue,
         and starts a separate thread for sending messages.
 
         Args:
             ip (str): The IP address of the OSC server to send messages to.
             port (int): The port number of the OSC server.
+            queue_size (int): Max number of pending messages, oldest is dropped when full. Defaults to 256.
+            max_bundle (int): Max number of messages coalesced into one bundle (UDP datagram). Defaults to 32.
+            targets (list, optional): additional (ip, port) targets, see parse_targets().
 
         Returns:
             None
 
         """
-        self.client = udp_client.SimpleUDPClient(ip, port)
-        self.queue = []
-        self.lock = threading.Lock()
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.targets = []
+        self.errors = {}
+        for target_ip, target_port in [(ip, port)] + (targets or []):
+            self.add_target(target_ip, target_port)
+        self.queue = deque(maxlen=queue_size)
+        self.max_bundle = max_bundle
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self._wake = threading.Event()
         self.running = True
-        self.thread = threading.Thread(target=self._send_messages)
+        self.thread = threading.Thread(target=self._send_messages, daemon=True)
         self.thread.start()
 
+    def add_target(self, ip: str, port: int):
+        """
+        Adds a target to the fan-out list. Hostname is resolved once here, not on each send.
+
+        Args:
+            ip (str): The IP address or hostname of the OSC server.
+            port (int): The port number of the OSC server.
+
+        Returns:
+            None
+
+        """
+        try:
+            target = (socket.gethostbyname(ip), int(port))
+        except (socket.gaierror, ValueError) as e:
+            cfg_mgr.logger.error(f'Bad OSC target {ip}:{port}: {e}')
+            return
+        if target not in self.targets:
+            # copy on write, sender thread iterate without lock
+            self.targets = self.targets + [target]
+            cfg_mgr.logger.debug(f'OSC target added: {target}')
+
+    def remove_target(self, ip: str, port: int):
+        """
+        Removes a target from the fan-out list.
+
+        Args:
+            ip (str): The IP address or hostname of the OSC server.
+            port (int): The port number of the OSC server.
+
+        Returns:
+            None
+
+        """
+        try:
+            target = (socket.gethostbyname(ip), int(port))
+        except (socket.gaierror, ValueError):
+            return
+        self.targets = [t for t in self.targets if t != target]
+
+    def _send_to_targets(self, data: bytes):
+        """ Send the same encoded datagram to all targets, never block """
+        for target in self.targets:
+            try:
+                self.sock.sendto(data, target)
+            except OSError as e:
+                # BlockingIOError (buffer full) included, this target miss this datagram
+                self.errors[target] = self.errors.get(target, 0) + 1
+                cfg_mgr.logger.debug(f'OSC send error to {target}: {e}')
+
+    @staticmethod
+    def _build_message(address: str, value):
+        """
+        Build the OSC message, same way as SimpleUDPClient.send_message.
+
+        Returns:
+            OscMessage
+
+        """
+        builder = OscMessageBuilder(address=address)
+        if value is None:
+            values = []
+        elif isinstance(value, Iterable) and not isinstance(value, (str, bytes)):
+            values = value
+        else:
+            values = [value]
+        for val in values:
+            builder.add_arg(val)
+        return builder.build()
+
     def _send_messages(self):
         """
-        Continuously sends messages from the queue to the OSC server while the client is running.
-        This method checks the message queue, acquires a lock to safely pop messages,
-        and sends them to the specified address, with a small delay to manage the sending rate.
+        Sends messages from the queue to the OSC server while the client is running.
+        This method blocks until a message is queued, then drains all pending messages:
+        one message is sent as is, several are coalesced into bundles (max_bundle messages each).
 
         Returns:
             None
 
         """
         while self.running:
-            if self.queue:
-                self.lock.acquire()
+            self._wake.wait()
+            self._wake.clear()
+            while self.queue:
+                batch = []
+                while self.queue and len(batch) < self.max_bundle:
+                    batch.append(self.queue.popleft())
                 try:
-                    msg = self.queue.pop(0)
-                finally:
-                    self.lock.release()
-                self.client.send_message(msg[0], msg[1])
-            # small delay (see if necessary)
-            sleep(0.01)
+                    if len(batch) == 1:
+                        content = self._build_message(batch[0][0], batch[0][1])
+                    else:
+                        # timetag from the first queued message, in the past so executed immediately
+                        bundle = OscBundleBuilder(batch[0][2])
+                        for address, value, _ in batch:
+                            bundle.add_content(self._build_message(address, value))
+                        content = bundle.build()
+                        self.coalesced += len(batch)
+                    self._send_to_targets(content.dgram)
+                    self.sent += len(batch)
+                except Exception as e:
+                    cfg_mgr.logger.error(f'Error sending OSC message: {e}')
 
     def send_message(self, address: str, value):
         """
         Adds a message to the queue for sending to the OSC server.
-        This method acquires a lock to ensure thread safety while appending the message,
-        which consists of an address and a value, to the queue.
+        Non-blocking: if the queue is full, the oldest message is dropped.
 
         Args:
             address (str): The OSC address to which the message will be sent.
@@ -77,11 +206,21 @@ class OSCClient:
             None
 
         """
-        self.lock.acquire()
-        try:
-            self.queue.append((address, value))
-        finally:
-            self.lock.release()
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+        self.queue.append((address, value, time()))
+        self._wake.set()
+
+    def get_stats(self):
+        """
+        Retrieves the client counters.
+
+        Returns:
+            dict: sent, dropped and coalesced messages count, actual queue length and send errors per target.
+
+        """
+        return {'sent': self.sent, 'dropped': self.dropped, 'coalesced': self.coalesced, 'queued': len(self.queue),
+                'errors': {f'{ip}:{port}': count for (ip, port), count in self.errors.items()}}
 
     def stop(self):
         """
@@ -93,4 +232,7 @@ class OSCClient:
 
         """
         self.running = False
+        self._wake.set()
         self.thread.join()
+        self.sock.close()
+        cfg_mgr.logger.debug(f'OSC client stopped: {self.get_stats()}')
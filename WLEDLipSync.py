@@ -61,35 +61,52 @@ Send mouth cues to OSC and WS ...
 Depend on how many mouth cues defined and if short interval, in some rare case, could miss letter during audio playback
     --> timeupdate frequency depend on several external factor , see HTML5 audio element doc
 This is one of reason why actual letter and future one are sent on same message record.
-On second, a mouth loop will occur during play time and executed every 10ms.
+On second, during play time a scheduler fire each mouth cue at its boundary, synced on the audio player clock.
+
+Startup: heavy modules (cv2, taglib, tkinter, ytmusicapi ...) are imported where used, YTMusic client is created
+on first use and config is read once (shared by all ConfigManager).
+    python WLEDLipSync.py --profile-startup  : print import / init time per module, then exit
 
 09/10/2024 : there is a problem playing  file when refresh the browser : need investigation
 """
+import sys
+
+from startupprofile import StartupProfiler
+
+# need to be first, time all next imports
+startup_profiler = StartupProfiler(enabled='--profile-startup' in sys.argv)
+
 import json
+import logging
 import time
-import cv2
 import os
-import sys
 import asyncio
-import tkinter as tk
-from tkinter import PhotoImage
+import bisect
 
 import utils
-import taglib
 import niceutils
 import chataigne
 
 from str2bool import str2bool
-from OSCClient import OSCClient
+from OSCClient import OSCClient, parse_targets
+from DDPClient import DDPClient, parse_targets as parse_ddp_targets
 from WSClient import WebSocketClient
+from wvsprotocol import CastImageEncoder
 from pathlib import Path
-from PIL import Image
 from nicegui import ui, app, native, run
 from rhubarb import RhubarbWrapper
+from analysiscache import AnalysisCache
+from batchqueue import BatchQueue
+from waveformpeaks import build_peaks, peaks_url
+from mouthassets import MouthAssetCache
+from matrixrender import MatrixRenderer, parse_sizes
 from niceutils import LocalFilePicker
 from typing import List, Union
 from math import trunc
 from ytmusic import MusicInfoRetriever
+from metadatacache import MetadataCache
+from cuetimeline import CueTimeline
+from cuescheduler import CueScheduler
 from niceutils import AnimatedElement as Animate
 from configmanager import ConfigManager
 
@@ -99,13 +116,19 @@ if sys.platform.lower() == 'win32':
     set_event_loop_policy(WindowsSelectorEventLoopPolicy())
 
 # rhubarb
-rub = RhubarbWrapper()
-# music info
-ret = MusicInfoRetriever()
+with startup_profiler.measure('RhubarbWrapper'):
+    rub = RhubarbWrapper()
+# music info, YTMusic client is created on first use
+with startup_profiler.measure('MusicInfoRetriever'):
+    ret = MusicInfoRetriever()
 # chataigne
-cha = chataigne.ChataigneWrapper()
+with startup_profiler.measure('ChataigneWrapper'):
+    cha = chataigne.ChataigneWrapper()
 # config
-cfg = ConfigManager(logger_name='WLEDLogger')
+with startup_profiler.measure('ConfigManager'):
+    cfg = ConfigManager(logger_name='WLEDLogger')
+# one record per cue: own logger, rate limited (see log_rate_limits)
+cue_logger = logging.getLogger('WLEDLogger.cue')
 
 
 class LipAPI:
@@ -120,9 +143,21 @@ class LipAPI:
         player_status (str): Current status of the player.
         scroll_graphic (bool): Flag indicating if the graphic should scroll.
         mouth_times_buffer (dict): Buffer containing results from rhubarb.
+        mouth_timeline (CueTimeline): Compiled view of mouth_times_buffer for fast time lookups.
+        cue_scheduler (CueScheduler): Fire mouth cues at their boundaries during playback.
+        osc_latency (float): OSC output latency in ms, cues are sent earlier by this amount.
+        wvs_latency (float): WVS output latency in ms, cues are sent earlier by this amount.
+        wvs_encoder (CastImageEncoder): cast_image message encoder for WVS (pre-serialized JSON or binary).
+        ddp_latency (float): WLED DDP output latency in ms, cues are sent earlier by this amount.
         mouth_times_selected (list): List of selected mouth times.
-        mouth_images_buffer (list): List of mouth images from a model.
-        mouths_buffer_thumb (list): List of thumbnail mouth images.
+        mouth_times_changed (list): List of mouth times with a modified letter.
+        ui_refresh_rate (float): Max number of main page refresh per second from player time, while playing.
+        mouth_assets (MouthAssetCache): Pre-encoded mouth model images, served from /model_cache.
+        mouth_model (list): Mouth model images info (name, size, full / preview / thumb urls).
+        matrix_renderer (MatrixRenderer): Mouth model rendered to LED matrix sizes.
+        matrix_frames (dict): Packed RGB bytes of current model, by matrix size then image index.
+        mouth_images_buffer (list): List of mouth image urls from a model.
+        mouths_buffer_thumb (list): List of thumbnail mouth image urls.
         thumbnail_width (int): Width of thumbnail images.
         mouth_carousel: Carousel object for mouth images.
         mouth_area_h: Scroll area object for mouth display.
@@ -135,8 +170,10 @@ class LipAPI:
         status_timer: Timer for network status.
         osc_client: OSC client for communication.
         wvs_client: WVS client for communication.
+        ddp_client (DDPClient): direct WLED sink, pre-rendered mouth frames sent over DDP.
         data_changed (bool): Indicates if data has been changed by the user.
         preview_area: Area for displaying the model.
+        batch_queue (BatchQueue): Rhubarb batch jobs for the whole audio folder.
 
         mouth_to_image (dict): Mapping of mouth shapes to image indices.
     """
@@ -145,10 +182,22 @@ class LipAPI:
     player_time: float = 0
     scroll_graphic: bool = True
     mouth_times_buffer = {}  # buffer dict contains result from rhubarb
+    mouth_timeline = CueTimeline()  # compiled mouth_times_buffer, need rebuild when buffer change
+    cue_scheduler = CueScheduler(mouth_timeline)  # deadline driven cue sender
+    osc_latency: float = 0  # ms, e.g. servo travel
+    wvs_latency: float = 0  # ms, e.g. network + LED frame
+    wvs_encoder = CastImageEncoder()  # cast_image messages, JSON templates or compact binary
+    ddp_latency: float = 0  # ms, e.g. network + LED frame
     mouth_times_selected = []  # list contain time selected
-    mouth_images_buffer: List = []  # list contains mouth images from a model
-    mouths_buffer_thumb: List = []  # contains thumb mouth images
+    mouth_times_changed = []  # list contain time with modified letter
+    ui_refresh_rate: float = 10  # Hz, player time UI updates
+    mouth_model: List = []  # list contains mouth images info from a model
+    mouth_images_buffer: List = []  # list contains mouth image urls from a model
+    mouths_buffer_thumb: List = []  # contains thumb mouth image urls
     thumbnail_width: int = 64  # thumb image width
+    mouth_assets = MouthAssetCache(thumbnail_width=thumbnail_width)  # encoded mouth images, one folder by model
+    matrix_renderer = MatrixRenderer()  # mouth images rendered to LED matrix sizes
+    matrix_frames = {}  # (width, height): packed RGB bytes per image index
     mouth_carousel = None  # carousel object
     mouth_area_h: Union[ui.scroll_area, None] = None  # scroll area object
     audio_duration: Union[float, None] = None  # audio file duration
@@ -161,9 +210,11 @@ class LipAPI:
     status_timer = None
     osc_client = None
     wvs_client = None
+    ddp_client = None
     cha_client = None
     data_changed = False  # True if some data has been changed by end user
     preview_area = None  # area where to display model
+    batch_queue = None  # batch analysis of audio folder
 
     mouth_to_image = {
         'A': 0,
@@ -182,40 +233,42 @@ async def create_mouth_model(mouth_folder: str = './media/image/model/default'):
     """
     Loads mouth images from a specified folder into the LipAPI buffer.
 
-    This function scans the given folder for image files, loads them asynchronously,
-    and stores them in the LipAPI mouth image buffers. It also checks if enough images
-    have been loaded and triggers the creation of a carousel if successful.
+    Images are taken from the mouth asset cache: decoded and encoded (full, preview, thumbnail) only once
+    per model folder version, then served as static urls. The LipAPI buffers contain these urls.
+    Each image is mapped to its mouth letter by file name (A ... H, X), a model without all 9 letters is refused
+    and the LipAPI buffers are left unchanged. Recently used models are kept in memory, switching is immediate.
+    If successful, it triggers the creation of a carousel.
 
     Args:
         mouth_folder (str): The path to the folder containing mouth images. Defaults to './media/image/model/default'.
-    """
 
-    LipAPI.mouth_images_buffer = []
-    LipAPI.mouths_buffer_thumb = []
+    Returns:
+        bool: True if the model has been loaded.
+    """
 
     cfg.logger.debug(mouth_folder)
-    folder_path = Path(mouth_folder)
-    supported_extensions = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tiff')
-
-    tasks = [
-        utils.load_image_async(str(img_path))
-        for img_path in folder_path.iterdir()
-        if img_path.suffix.lower() in supported_extensions and img_path.is_file()
-    ]
-
-    images = await asyncio.gather(*tasks)
-
-    for img, img_path in zip(images, folder_path.iterdir()):
-        if img is not None:
-            LipAPI.mouth_images_buffer.append(img)
-        else:
-            cfg.logger.debug(f"Could not open image {img_path.name}: Image is None")
-
-    if len(LipAPI.mouth_images_buffer) < 9:
-        cfg.logger.debug(f'ERROR not enough images loaded into buffer: {len(LipAPI.mouth_images_buffer)}')
-    else:
-        cfg.logger.debug(f'Images loaded into buffer: {len(LipAPI.mouth_images_buffer)}')
-        await create_carousel()
+    try:
+        mouth_model = await run.io_bound(LipAPI.mouth_assets.get, mouth_folder)
+    except (OSError, ValueError) as e:
+        cfg.logger.error(f'Error loading mouth model: {e}')
+        ui.notify(f'Invalid mouth model: {e}', type='negative')
+        return False
+
+    LipAPI.mouth_model = mouth_model
+    LipAPI.mouth_images_buffer = [asset['full'] for asset in LipAPI.mouth_model]
+    LipAPI.mouths_buffer_thumb = [asset['thumb'] for asset in LipAPI.mouth_model]
+    cfg.logger.debug(f'Images loaded into buffer: {len(LipAPI.mouth_images_buffer)}')
+
+    # ready-made LED matrix frames, no resize when pushed
+    try:
+        LipAPI.matrix_frames = await run.io_bound(LipAPI.matrix_renderer.render, mouth_folder)
+    except (OSError, ValueError) as e:
+        cfg.logger.error(f'Error rendering mouth model to matrix: {e}')
+        LipAPI.matrix_frames = {}
+    if LipAPI.ddp_client is not None:
+        LipAPI.ddp_client.set_frames(LipAPI.matrix_frames)
+    await create_carousel()
+    return True
 
 
 async def create_carousel():
@@ -223,20 +276,19 @@ async def create_carousel():
     Creates a carousel UI component for displaying mouth images.
 
     This function initializes a carousel with the mouth images stored in the LipAPI buffer,
-    creating slides and thumbnails for each image. It also sets the default image to X.
+    creating slides for each image. It also sets the default image to X.
 
     Returns:
         None
     """
 
-    image_number = len(LipAPI.mouth_images_buffer)
+    image_number = len(LipAPI.mouth_model)
     LipAPI.mouth_carousel = ui.carousel(animated=False, arrows=False, navigation=False)
     LipAPI.mouth_carousel.props('max-height=360px')
     LipAPI.mouth_carousel.classes('self-center')
     with LipAPI.mouth_carousel:
         for i in range(image_number):
             await create_carousel_slide(i)
-            await create_thumbnail(i)
 
     # put to default image
     LipAPI.mouth_carousel.set_value(str(get_index_from_letter('X')))
@@ -245,67 +297,27 @@ async def create_carousel():
 async def create_carousel_slide(index: int):
     """Creates a carousel slide for displaying a mouth image.
 
-    This function generates a slide in the carousel UI that displays a mouth image
-    from the LipAPI mouth_images_buffer at the specified index. It also includes
+    This function generates a slide in the carousel UI that displays the pre-encoded preview
+    of the mouth image at the specified index. It also includes
     an interactive button that shows the image dimensions and serves as a tooltip.
 
     Args:
-        index (int): The index of the mouth image in the LipAPI mouth_images_buffer.
+        index (int): The index of the mouth image in the LipAPI mouth_model.
 
     Returns:
         None
     """
 
+    asset = LipAPI.mouth_model[index]
     preview_slide = ui.carousel_slide(str(index))
     with preview_slide:
-        carousel_image = Image.fromarray(LipAPI.mouth_images_buffer[index])
-        h, w = LipAPI.mouth_images_buffer[index].shape[:2]
-        img = ui.interactive_image(carousel_image.resize(size=(640, 360))).classes('w-[640]')
+        img = ui.interactive_image(asset['preview']).classes('w-[640]')
         with img:
-            img_info = ui.button(text=f'{index}:{w}x{h}', icon='tag')
+            img_info = ui.button(text=f"{index}:{asset['width']}x{asset['height']}", icon='tag')
             img_info.props('flat fab').tooltip('Image Number')
             img_info.classes('absolute top-0 left-0 m-2')
 
 
-async def create_thumbnail(index: int):
-    """Creates a thumbnail image from the mouth images buffer.
-
-    This function resizes a mouth image at the specified index to a thumbnail
-    size while maintaining the aspect ratio. The resized thumbnail is then
-    appended to the mouths buffer for later use.
-
-    Args:
-        index (int): The index of the mouth image in the LipAPI mouth_images_buffer.
-
-    Returns:
-        None
-    """
-
-    image = LipAPI.mouth_images_buffer[index]
-    height, width, _ = image.shape
-    aspect_ratio = height / width
-    new_height = int(LipAPI.thumbnail_width * aspect_ratio)
-    resized_image = cv2.resize(image, (LipAPI.thumbnail_width, new_height))
-    LipAPI.mouths_buffer_thumb.append(resized_image)
-
-
-async def gen_thumbnails_from_array():
-    """
-    Generate thumbs from an array image
-    this will take mouths_buffer and populate mouths_buffer_thumb
-    Used to minimize time for page creation
-    """
-
-    for i in range(len(LipAPI.mouth_images_buffer)):
-        image = LipAPI.mouth_images_buffer[i]
-        # Resize the image to the specified thumbnail width while maintaining aspect ratio
-        height, width, _ = image.shape
-        aspect_ratio = height / width
-        new_height = int(LipAPI.thumbnail_width * aspect_ratio)
-        resized_image = cv2.resize(image, (LipAPI.thumbnail_width, new_height))
-        LipAPI.mouths_buffer_thumb.append(resized_image)  # add to list
-
-
 def get_index_from_letter(letter):
     """
     Return the index associated with the given letter.
@@ -400,6 +412,7 @@ async def edit_mouth_time_buffer():
 
     def on_change(event):
         LipAPI.mouth_times_buffer = event.content['json']
+        LipAPI.mouth_timeline.build(LipAPI.mouth_times_buffer)
 
     if len(LipAPI.mouth_times_buffer) > 0:
         with ui.card():
@@ -433,58 +446,89 @@ def add_all_markers():
 
 async def mouth_cue_action(osc_address):
     LipAPI.player_time = await niceutils.get_player_time()
-    await run.io_bound(loop_mouth_cue, osc_address)
+    loop_mouth_cue(osc_address)
 
 
 def loop_mouth_cue(osc_address):
-    def set_cue():
-        actual_cue_record, next_cue_record = utils.find_cue_point(LipAPI.player_time, LipAPI.mouth_times_buffer)
-        start = str(actual_cue_record['start'])
-        value = actual_cue_record['value']
-        cue_to_test = start + value
-        player_2digit = trunc(LipAPI.player_time * 100) / 100
-
-        if cue_to_test not in triggered_values:
-            # set the index image in carousel (letter)
-            if LipAPI.mouth_carousel is not None:
-                LipAPI.mouth_carousel.set_value(str(get_index_from_letter(actual_cue_record['value'])))
-            # send osc message
-            if LipAPI.osc_client is not None:
-                LipAPI.osc_client.send_message(
-                    f'{osc_address}/mouthCue/',
-                    [
-                        "{:.3f}".format(LipAPI.player_time),
-                        actual_cue_record['value'],
-                        next_cue_record['start'],
-                        next_cue_record['end'],
-                        value,
-                    ],
-                )
-            # send wvs message
-            if LipAPI.wvs_client is not None:
-                ws_msg = {"action": {"type": "cast_image",
-                                     "param": {"image_number": get_index_from_letter(actual_cue_record['value']),
-                                               "device_number": 0,
-                                               "class_name": "Media",
-                                               "fps_number": 50,
-                                               "duration_number": 1}}}
-
-                LipAPI.wvs_client.send_message(ws_msg)
-            cfg.logger.info(
-                f"{str(player_2digit)} {str(value)} {str(round(time.time() * 1000))}"
+    """
+    Start / stop the cue scheduler depending on the player status.
+
+    During play, the scheduler fire each output at each mouth cue boundary (from its own thread),
+    following the browser audio clock. OSC and WVS outputs are fired earlier by their latency (lookahead),
+    so all of them land on the phoneme at the same moment. On end, the last cue is sent once if requested.
+
+    Args:
+        osc_address (str): OSC root address.
+
+    Returns:
+        None
+    """
+    def only_once(send_cue):
+        """ wrap an output to send each cue only one time (send_only_once) """
+        triggered_values = set()  # Track triggered values
+
+        def output(actual_cue_record, next_cue_record, player_time):
+            cue_to_test = str(actual_cue_record['start']) + actual_cue_record['value']
+            if cue_to_test not in triggered_values:
+                send_cue(actual_cue_record, next_cue_record, player_time)
+                if send_only_once:
+                    triggered_values.add(cue_to_test)
+
+        return output
+
+    def set_carousel(actual_cue_record, next_cue_record, player_time):
+        # set the index image in carousel (letter)
+        if LipAPI.mouth_carousel is not None:
+            LipAPI.mouth_carousel.set_value(str(get_index_from_letter(actual_cue_record['value'])))
+        player_2digit = trunc(player_time * 100) / 100
+        cue_logger.info('%s %s %s', player_2digit, actual_cue_record['value'], round(time.time() * 1000))
+        LipAPI.player_time = player_time
+
+    def send_osc(actual_cue_record, next_cue_record, player_time):
+        # send osc message
+        if LipAPI.osc_client is not None:
+            LipAPI.osc_client.send_message(
+                f'{osc_address}/mouthCue/',
+                [
+                    "{:.3f}".format(player_time),
+                    actual_cue_record['value'],
+                    next_cue_record['start'],
+                    next_cue_record['end'],
+                    actual_cue_record['value'],
+                ],
             )
-            if str2bool(cfg.app_config['send_only_once']):
-                triggered_values.add(cue_to_test)
 
-        time.sleep(0.01)
-        LipAPI.player_time += 0.01
+    def send_wvs(actual_cue_record, next_cue_record, player_time):
+        # send wvs message
+        if LipAPI.wvs_client is not None:
+            ws_msg = LipAPI.wvs_encoder.encode(get_index_from_letter(actual_cue_record['value']), player_time)
+            LipAPI.wvs_client.send_message(ws_msg)
+
+    def send_ddp(actual_cue_record, next_cue_record, player_time):
+        # send pre-rendered frame to WLED
+        if LipAPI.ddp_client is not None:
+            LipAPI.ddp_client.send_image(get_index_from_letter(actual_cue_record['value']))
+
+    send_only_once = str2bool(cfg.app_config['send_only_once'])
 
-    triggered_values = set()  # Track triggered values
-    while LipAPI.player_status == 'play':
-        set_cue()
+    LipAPI.cue_scheduler.stop()
+    LipAPI.cue_scheduler.clear_outputs()
+    # latency are in ms
+    outputs = [(set_carousel, 0, 'carousel'),
+               (send_osc, LipAPI.osc_latency, 'osc'),
+               (send_wvs, LipAPI.wvs_latency, 'wvs'),
+               (send_ddp, LipAPI.ddp_latency, 'ddp')]
+    for send_cue, latency, name in outputs:
+        LipAPI.cue_scheduler.add_output(only_once(send_cue), latency=float(latency or 0) / 1000, name=name)
 
-    if LipAPI.player_status == 'end' and str2bool(cfg.app_config['send_end']):
-        set_cue()
+    if LipAPI.player_status == 'play':
+        # without send_only_once, cue is also repeated every 10ms as before
+        LipAPI.cue_scheduler.start(LipAPI.player_time, repeat_interval=None if send_only_once else 0.01)
+
+    elif LipAPI.player_status == 'end' and str2bool(cfg.app_config['send_end']):
+        actual_cue, next_cue = utils.find_cue_point(LipAPI.player_time, LipAPI.mouth_timeline)
+        for output in LipAPI.cue_scheduler.outputs:
+            output['callback'](actual_cue, next_cue, LipAPI.player_time)
 
 
 async def audio_edit():
@@ -532,36 +576,37 @@ async def audio_edit():
                     close.tooltip('Close editor')
 
 
-async def modify_letter(start_time, letter_lbl):
-    """ create letter modification dialog and update """
+async def modify_letter(start_time, letter):
+    """ create letter modification dialog and update buffer and browser cue strip """
 
     def upd_letter(new_letter):
-        """ update label and buffer """
+        """ update buffer and cue card """
         for i_cue in LipAPI.mouth_times_buffer['mouthCues']:
             if i_cue['start'] == start_time:
                 i_cue['value'] = new_letter
-                letter_lbl.style(add='color:orange')
+                LipAPI.mouth_timeline.build(LipAPI.mouth_times_buffer)
+                if start_time not in LipAPI.mouth_times_changed:
+                    LipAPI.mouth_times_changed.append(start_time)
                 LipAPI.data_changed = True
+                niceutils.update_cue(start_time, new_letter)
                 cfg.logger.debug(f'new letter set {new_letter}')
                 break
 
-        letter_lbl.text = new_letter
         dialog_l.close()
 
     with ui.dialog() as dialog_l, ui.card():
         """ dialog for letter update """
 
         dialog_l.open()
-        ui.label(f'Modify letter : {letter_lbl.text}')
+        ui.label(f'Modify letter : {letter}')
         # retrieve thumb image from ndx
-        ui.image(Image.fromarray(LipAPI.mouths_buffer_thumb[get_index_from_letter(letter_lbl.text)]))
+        ui.image(LipAPI.mouths_buffer_thumb[get_index_from_letter(letter)])
 
-        # read thumb array, images from 0  to x...(usually 9)
+        # read thumb urls, images from 0  to x...(usually 9)
         i = 0
-        for img_array in LipAPI.mouths_buffer_thumb:
-            img = Image.fromarray(img_array)
+        for img_url in LipAPI.mouths_buffer_thumb:
             with ui.row():
-                ui.interactive_image(img).classes('w-10')
+                ui.interactive_image(img_url).classes('w-10')
                 # retrieve letter from index
                 img_letter = get_letter_from_index(i)
                 # create corresponding checkbox
@@ -792,7 +837,9 @@ async def main_page():
         if osc_activate.value is True:
             # we need to create a client if not exist
             if LipAPI.osc_client is None:
-                LipAPI.osc_client = OSCClient(str(osc_ip.value), int(osc_port.value))
+                # primary target from UI, fan-out to extra targets if any
+                LipAPI.osc_client = OSCClient(str(osc_ip.value), int(osc_port.value),
+                                              targets=parse_targets(osc_targets.value, int(osc_port.value)))
             # send init message
             osc_msg = {"action": {"type": "init_osc", "param": {}}}
             if osc_send_metadata.value is True:
@@ -812,6 +859,47 @@ async def main_page():
                 cfg.logger.debug('stop timer')
                 LipAPI.status_timer.active = False
 
+    async def manage_ddp_client():
+        """
+        Manages the DDP client (direct WLED sink) for activation and deactivation.
+
+        This function creates the DDP client for the target list if the corresponding toggle is enabled,
+        and gives it the pre-rendered frames of the current mouth model. It stops the client if the toggle
+        is disabled.
+
+        Returns:
+            None
+        """
+
+        cfg.logger.debug('DDP activation')
+
+        if ddp_activate.value is True:
+            if LipAPI.ddp_client is None:
+                default_size = (parse_sizes(cfg.app_config.get('ddp_size', '32x32')) or ((32, 32),))[0]
+                LipAPI.ddp_client = DDPClient(parse_ddp_targets(ddp_targets.value, default_size))
+                LipAPI.ddp_client.set_frames(LipAPI.matrix_frames)
+        else:
+            if LipAPI.ddp_client is not None:
+                LipAPI.ddp_client.stop()
+            LipAPI.ddp_client = None
+
+    async def calibrate_wvs():
+        """
+        Measures the round trip time to WLEDVideoSync and set the WVS latency to half of it (one way).
+
+        Returns:
+            None
+        """
+        if LipAPI.wvs_client is None:
+            ui.notify('WVS not activated', type='warning')
+            return
+        round_trip = await LipAPI.wvs_client.measure_latency()
+        if round_trip is None:
+            ui.notify('No answer from WVS, latency not changed', type='negative')
+        else:
+            wvs_latency.set_value(round(round_trip * 1000 / 2, 1))
+            ui.notify(f'WVS round trip: {round_trip * 1000:.1f}ms, latency set to {wvs_latency.value}ms')
+
     async def validate_file(file_name):
         """ file input validation """
 
@@ -835,7 +923,7 @@ async def main_page():
         """ check input and retrieve info from ytmusicapi """
 
         if await validate_file(file_name):
-            await run.io_bound(song_info, file_name)
+            await song_info(file_name)
 
     async def approve_set_file_name():
         """ dialog to approve load new audio file """
@@ -859,6 +947,40 @@ async def main_page():
                 ui.button('Yes', on_click=run_it)
                 ui.button('No', on_click=dialog.close)
 
+    async def convert_to_wav(input_file, output_file):
+        """
+        Convert mp3 to the wav rhubarb needs (mono, 16 kHz) in a background thread, progress shown under vocals.
+        Nothing is done if an up-to-date wav already exists.
+        """
+
+        def progress(value):
+            convert_progress.set_value(value)
+
+        if utils.wav_is_up_to_date(input_file, output_file, utils.RHUBARB_RATE, 1):
+            return
+        ui.notify('auto generate wav file')
+        convert_progress.set_value(0)
+        convert_progress.set_visibility(True)
+        try:
+            await run.io_bound(utils.convert_for_rhubarb, input_file, output_file, progress)
+        finally:
+            convert_progress.set_visibility(False)
+
+    async def set_waveform_peaks(wav_file, file):
+        """
+        Compute (if needed) waveform peaks next to rhubarb.json and give the url to wavesurfer,
+        need to be done before player source is set. Empty url: wavesurfer will decode the mp3.
+        """
+
+        peaks_file = cfg.app_config['output_folder'] + file + '/' + 'peaks.json'
+        url = ''
+        if await run.io_bound(build_peaks, wav_file, peaks_file):
+            url = peaks_url(peaks_file)
+            if url:
+                # browser cache busting when peaks change
+                url += f'?v={int(os.path.getmtime(peaks_file))}'
+        player_vocals.props(f'data-peaks="{url}"')
+
     async def set_file_name():
         """
         set file name from file input audio
@@ -872,7 +994,9 @@ async def main_page():
         stems.set_visibility(False)
         analyse_file.set_visibility(False)
         LipAPI.mouth_times_buffer = {}
+        LipAPI.mouth_timeline.build()
         LipAPI.mouth_times_selected = []
+        LipAPI.mouth_times_changed = []
         try:
             LipAPI.mouth_area_h.delete()
         except AttributeError:
@@ -903,8 +1027,9 @@ async def main_page():
                 out = cfg.app_config['output_folder'] + file + '/' + 'rhubarb.json'
                 if os.path.isfile(out):
                     ui.notify(f'Found an existing analysis file ...  {out}.')
-                # convert mp3 to wav
-                utils.convert_audio(file_path, file_folder + file + '.wav')
+                # convert mp3 to wav, off the event loop
+                await convert_to_wav(file_path, file_folder + file + '.wav')
+                await set_waveform_peaks(file_folder + file + '.wav', file)
                 player_vocals.set_source(file_path)
                 audio_vocals.tooltip(file_path)
                 audio_vocals.update()
@@ -921,9 +1046,8 @@ async def main_page():
                 ui.notify('We will do analysis from stems files ...', position='top')
                 stems.set_visibility(True)
                 # specific case for vocals
-                # always (re)generate wav from mp3, rhubarb will need it
-                utils.convert_audio(file_folder + 'vocals.mp3', file_folder + 'vocals.wav')
-                ui.notify('auto generate wav file')
+                # (re)generate wav from mp3 if not up to date, rhubarb will need it
+                await convert_to_wav(file_folder + 'vocals.mp3', file_folder + 'vocals.wav')
                 # double check (e.g. no more disk space)
                 if not os.path.isfile(file_folder + 'vocals.wav'):
                     ui.notification('ERROR on wav file creation', position='center', type='negative')
@@ -931,6 +1055,7 @@ async def main_page():
                     LipAPI.audio_duration = None
                     return
                 # set players
+                await set_waveform_peaks(file_folder + 'vocals.wav', file)
                 player_vocals.set_source(file_folder + 'vocals.mp3')
                 audio_vocals.tooltip(file_folder + 'vocals.mp3')
                 # this one is optional
@@ -1011,12 +1136,7 @@ async def main_page():
                 ui.notification('Caution ...Last running instance in trouble', type='negative', position='center')
             ui.notify('Audio Analysis initiated')
 
-            # run analyzer
-            # rhubarb will append file extension
-            analysis_output = LipAPI.output_file.replace('.json', '')
-            rub.run(file_name=LipAPI.file_to_analyse, dialog_file=LipAPI.lyrics_file, output=analysis_output)
-
-            # set some GUI
+            # set some GUI, before run: on a cache hit the 100% progress (update_progress) may come at once
             spinner_analysis.set_visibility(True)
             player_vocals.pause()
             player_accompaniment.pause()
@@ -1033,7 +1153,14 @@ async def main_page():
             except AttributeError:
                 pass
             LipAPI.mouth_times_buffer = {}
+            LipAPI.mouth_timeline.build()
             LipAPI.mouth_times_selected = []
+            LipAPI.mouth_times_changed = []
+
+            # run analyzer
+            # rhubarb will append file extension
+            analysis_output = LipAPI.output_file.replace('.json', '')
+            rub.run(file_name=LipAPI.file_to_analyse, dialog_file=LipAPI.lyrics_file, output=analysis_output)
             dialog.close()
 
     async def run_spleeter(dialog):
@@ -1137,7 +1264,9 @@ async def main_page():
             pass
 
         LipAPI.mouth_times_buffer = {}
+        LipAPI.mouth_timeline.build()
         LipAPI.mouth_times_selected = []
+        LipAPI.mouth_times_changed = []
 
         if LipAPI.source_file != '':
             ui.notification('this could take some time .....', position='center', type='warning', spinner=True)
@@ -1145,6 +1274,8 @@ async def main_page():
             if os.path.isfile(LipAPI.output_file):
                 with open(LipAPI.output_file, 'r') as data:
                     LipAPI.mouth_times_buffer = json.loads(data.read())
+                # compile once, used by player time lookups
+                LipAPI.mouth_timeline.build(LipAPI.mouth_times_buffer)
 
                 ui.timer(1, generate_mouth_cue, once=True)
                 output_label.classes(remove='animate-pulse')
@@ -1207,18 +1338,20 @@ async def main_page():
                     result = str(result[0])
                 if len(result) > 0:
                     result = './' + result
+                    old_carousel = LipAPI.mouth_carousel
+                    # generate new one, keep the current model if not valid
+                    if not await create_mouth_model(result):
+                        return
                     # delete if exist
                     try:
-                        LipAPI.mouth_carousel.delete()
+                        if old_carousel is not None:
+                            old_carousel.delete()
                     except ValueError:
                         pass
-                    # generate new one
-                    await create_mouth_model(result)
                     # move it to selected container
                     LipAPI.mouth_carousel.move(target_container=LipAPI.preview_area)
                     # refresh central time image
-                    img = Image.fromarray(LipAPI.mouths_buffer_thumb[0])
-                    model_thumb.set_source(img)
+                    model_thumb.set_source(LipAPI.mouths_buffer_thumb[0])
                     model_thumb.update()
 
             else:
@@ -1228,9 +1361,9 @@ async def main_page():
         """
         Generates and displays mouth cues based on the current audio playback.
 
-        This function sets up the user interface for displaying mouth cues, allowing users to interact with the cues
-        by clicking on them to play audio or modify the associated letters. It manages the playback of audio segments
-        and updates the visual representation of the cues in the UI.
+        This function sets up the scroll area for displaying mouth cues. Cue cards are not built by the server:
+        the cue array is sent once to the browser, wledlipsync.js keeps it and renders only a window of cards
+        around the playhead / seek position, and sends back user actions (see cue_event).
 
         Returns:
             None
@@ -1239,177 +1372,134 @@ async def main_page():
             None
         """
 
-        async def select_letter(start_time: float, letter_lbl: ui.label):
-            """
-            Selects a letter associated with a specific start time and updates the label.
+        # Scroll area with timeline/images
+        if do_animation:
+            scroll_area_anim = Animate(ui.scroll_area, animation_name_in='flipInX', duration=2)
+            LipAPI.mouth_area_h = scroll_area_anim.create_element()
+        else:
+            LipAPI.mouth_area_h = ui.scroll_area()
+        LipAPI.mouth_area_h.classes('bg-cyan-700 w-400 h-40')
+        LipAPI.mouth_area_h.props('id="CuePointsArea"')
+        LipAPI.mouth_area_h.bind_visibility(LipAPI, 'mouth_cue_show')
+        with LipAPI.mouth_area_h:
+            # filled by the browser
+            ui.row(wrap=False).props('id=CuePoints')
 
-            This function logs the start time and the label, then calls another function to modify the letter based on the
-            provided start time. It is intended to facilitate user interaction with the audio cues in the application.
+        # Move to the required container
+        LipAPI.mouth_area_h.move(target_container=card_mouth)
 
-            Args:
-                start_time (float): The time in seconds associated with the letter selection.
-                letter_lbl (ui.label): The label UI component that displays the selected letter.
+        if len(LipAPI.mouth_images_buffer) == 9 and 'mouthCues' in LipAPI.mouth_times_buffer:
+            niceutils.render_cues(LipAPI.mouth_times_buffer['mouthCues'],
+                                  LipAPI.mouth_times_selected,
+                                  LipAPI.mouth_times_changed)
 
-            Returns:
-                None
+        LipAPI.data_changed = False
+        edit_mouth_buffer.enable()
+        load_mouth_button.enable()
 
-            Raises:
-                None
-            """
-            cfg.logger.debug(str(start_time) + " " + str(letter_lbl))
-            await modify_letter(start_time, letter_lbl)
+    async def play_until(start_time: float):
+        """
+        Play audio from a specified start time until the next cue or the end of the audio.
 
-        def position_player(seek_time: float, card: ui.card, rem: ui.icon, marker: str = 'X'):
-            """
-            Seeks the audio players to a specified time and updates the user interface accordingly.
+        This function seeks to the given start time in the audio player and plays the audio until it reaches
+        the next cue time or the end of the audio duration.
+        It pauses the player once the playback duration is complete.
 
-            This function adjusts the playback position of both the vocal and accompaniment audio players to the given
-            seek time. It also updates the visual representation of the associated UI card and creates a marker at the
-            specified time, ensuring that the user interface reflects the current playback state.
+        Args:
+            start_time (float): The time in seconds to start playback from.
 
-            Args:
-                seek_time (float): The time in seconds to seek the audio players.
-                card (ui.card): The UI card to be updated with the new state.
-                rem (ui.icon): The icon to be made visible after seeking.
-                marker (str): The marker to be created at the specified time (default is 'X').
+        Returns:
+            None
 
-            Returns:
-                None
+        Raises:
+            None
 
-            Raises:
-                None
-            """
-            player_vocals.seek(seek_time)
-            player_accompaniment.seek(seek_time)
-            if seek_time not in LipAPI.mouth_times_selected:
-                LipAPI.mouth_times_selected.append(seek_time)
-                LipAPI.mouth_times_selected.sort()
-            niceutils.create_marker(seek_time, marker)
-            card.classes(remove='bg-cyan-700')
-            card.classes(add='bg-red-400')
-            rem.set_visibility(True)
-            card.update()
+        Examples:
+            await play_until(10.5)
+        """
 
-        async def play_until(start_time: float):
-            """
-            Play audio from a specified start time until the next cue or the end of the audio.
+        player_vocals.seek(start_time)
+        end_cue = next((i_cue for i_cue in LipAPI.mouth_times_selected if i_cue > start_time),
+                       LipAPI.audio_duration)
+        duration = end_cue - start_time
+        end_time = time.time() + duration
+        player_vocals.play()
 
-            This function seeks to the given start time in the audio player and plays the audio until it reaches
-            the next cue time or the end of the audio duration.
-            It pauses the player once the playback duration is complete.
+        while time.time() <= end_time:
+            await asyncio.sleep(0.001)
 
-            Args:
-                start_time (float): The time in seconds to start playback from.
+        player_vocals.pause()
+        cfg.logger.debug('End of play_until loop.')
 
-            Returns:
-                None
+    async def cue_event(event):
+        """
+        Apply a delta sent by the browser cue strip, card state (color, icon) is already updated client side.
 
-            Raises:
-                None
+        Event args:
+            a (str): action, 'seek' (set player time and select), 'unselect', 'play' (play until next selected)
+                     or 'letter' (modify letter dialog).
+            s (float): cue start time.
 
-            Examples:
-                await play_until(10.5)
-            """
+        Returns:
+            None
+        """
+        action = event.args.get('a')
+        start_time = float(event.args.get('s'))
+        cfg.logger.debug(f'cue event {action} {start_time}')
 
+        if action == 'seek':
             player_vocals.seek(start_time)
-            end_cue = next((i_cue for i_cue in LipAPI.mouth_times_selected if i_cue > start_time),
-                           LipAPI.audio_duration)
-            duration = end_cue - start_time
-            end_time = time.time() + duration
-            player_vocals.play()
-
-            while time.time() <= end_time:
-                await asyncio.sleep(0.001)
-
-            player_vocals.pause()
-            cfg.logger.debug('End of play_until loop.')
-
-        def set_default(seek_time: float, card: ui.card, rem: ui.icon):
-            """
-            Resets the visual state of a UI card and removes the specified seek time from the selected mouth times.
-
-            This function updates the UI by changing the card's background color and hiding the associated icon.
-            It also removes the specified seek time from the list of selected mouth times, ensuring that the UI reflects
-            the current state of the playback.
-
-            Args:
-                seek_time (float): The time in seconds to be removed from the selected mouth times.
-                card (ui.card): The UI card to be updated with the default state.
-                rem (ui.icon): The icon to be hidden after resetting the state.
-
-            Returns:
-                None
-
-            Raises:
-                None
-            """
-            LipAPI.mouth_times_selected.remove(seek_time)
-            card.classes(remove='bg-red-400')
-            card.classes(add='bg-cyan-700')
-            rem.set_visibility(False)
+            player_accompaniment.seek(start_time)
+            if start_time not in LipAPI.mouth_times_selected:
+                LipAPI.mouth_times_selected.append(start_time)
+                LipAPI.mouth_times_selected.sort()
+            actual_cue_record, _ = utils.find_cue_point(start_time, LipAPI.mouth_timeline)
+            niceutils.create_marker(start_time, actual_cue_record['value'])
+        elif action == 'unselect':
+            if start_time in LipAPI.mouth_times_selected:
+                LipAPI.mouth_times_selected.remove(start_time)
             cfg.logger.debug(LipAPI.mouth_times_selected)
+        elif action == 'play':
+            await play_until(start_time)
+        elif action == 'letter':
+            actual_cue_record, _ = utils.find_cue_point(start_time, LipAPI.mouth_timeline)
+            await modify_letter(start_time, actual_cue_record['value'])
 
-        # Scroll area with timeline/images
-        if do_animation:
-            scroll_area_anim = Animate(ui.scroll_area, animation_name_in='flipInX', duration=2)
-            LipAPI.mouth_area_h = scroll_area_anim.create_element()
-        else:
-            LipAPI.mouth_area_h = ui.scroll_area()
-        LipAPI.mouth_area_h.classes('bg-cyan-700 w-400 h-40')
-        LipAPI.mouth_area_h.props('id="CuePointsArea"')
-        LipAPI.mouth_area_h.bind_visibility(LipAPI, 'mouth_cue_show')
-        with LipAPI.mouth_area_h:
-            all_rows_mouth_area_h = ui.row(wrap=False)
-            all_rows_mouth_area_h.props('id=CuePoints')
-            with all_rows_mouth_area_h:
-                if len(LipAPI.mouth_images_buffer) == 9 and 'mouthCues' in LipAPI.mouth_times_buffer:
-                    mouth_cues = LipAPI.mouth_times_buffer['mouthCues']
-                    for cue in mouth_cues:
-                        start = cue['start']
-                        letter = cue['value']
-                        time_card = ui.card().classes(add="bg-cyan-700 cue-point")
-                        time_card.props(f'id={start}')
-                        with time_card:
-                            ic_remove = ui.icon('highlight_off', size='xs').style(add='cursor: pointer')
-                            ic_remove.on('click',
-                                         lambda st=start, card=time_card, rem=ic_remove: set_default(st, card, rem))
-                            ic_remove.set_visibility(False)
-
-                            start_label = ui.label(start)
-                            start_label.on('click',
-                                           lambda st=start, card=time_card, rem=ic_remove, lb=letter: position_player(
-                                               st, card,
-                                               rem, lb))
-                            start_label.tooltip('Click to set player time')
-                            start_label.style('cursor:grab')
-
-                            ic_play = ui.icon('play_circle', size='xs').style(add='cursor: pointer')
-                            ic_play.on('click', lambda st=start: play_until(st))
-
-                        letter_label = ui.label(letter).style('cursor:pointer')
-                        letter_label.on('click', lambda st=start, lb=letter_label: select_letter(st, lb))
+    # last values sent to the UI by player_time_action
+    ui_state = {'cue': None, 'refresh': 0.0, 'scroll': -1}
 
-        # Move to the required container
-        LipAPI.mouth_area_h.move(target_container=card_mouth)
-
-        # This could take some time
-        ui.timer(1, niceutils.run_gencuedata, once=True)
-
-        LipAPI.data_changed = False
-        edit_mouth_buffer.enable()
-        load_mouth_button.enable()
-
-    async def player_time_action():
+    async def player_time_action(event=None):
         """
         Set scroll area position
         Send WVS / OSC msg
+
+        Player time come with the timeupdate event (no round trip to the browser).
+        UI is updated only if the cue changed, when not playing, or at most ui_refresh_rate times per second,
+        and elements are only sent when their value changed.
         """
 
-        LipAPI.player_time = await niceutils.get_player_time()
+        event_time = event.args if event is not None else None
+        if isinstance(event_time, list) and len(event_time) == 1:
+            event_time = event_time[0]
+        if isinstance(event_time, (int, float)):
+            LipAPI.player_time = round(event_time, 2)
+        else:
+            LipAPI.player_time = await niceutils.get_player_time()
+        # keep cue scheduler on the browser audio clock
+        LipAPI.cue_scheduler.resync(LipAPI.player_time)
 
-        actual_cue_record, next_cue_record = utils.find_cue_point(LipAPI.player_time, LipAPI.mouth_times_buffer)
+        actual_cue_record, next_cue_record = utils.find_cue_point(LipAPI.player_time, LipAPI.mouth_timeline)
         letter = next_cue_record['value']
 
+        # UI refresh, throttled while playing the same cue
+        now = time.monotonic()
+        cue_key = (actual_cue_record['start'], next_cue_record['start'])
+        if (LipAPI.player_status == 'play' and cue_key == ui_state['cue']
+                and now - ui_state['refresh'] < 1 / LipAPI.ui_refresh_rate):
+            return
+        ui_state['cue'] = cue_key
+        ui_state['refresh'] = now
+
         # if time zero hide spinner
         if LipAPI.player_time == 0:
             spinner_vocals.set_visibility(False)
@@ -1417,13 +1507,13 @@ async def main_page():
             if LipAPI.player_status == 'play':
                 spinner_vocals.set_visibility(True)
 
-        # scroll central mouth cues
+        # scroll central mouth cues, the browser moves its cards window to the cue index
         if LipAPI.player_status == 'play' and LipAPI.scroll_graphic is True:
-            if LipAPI.audio_duration is None:
-                LipAPI.audio_duration = await niceutils.get_audio_duration('player_vocals')
-            if LipAPI.mouth_area_h is not None:
-                LipAPI.mouth_area_h.scroll_to(percent=((LipAPI.player_time * 100) / LipAPI.audio_duration) / 100,
-                                              axis='horizontal')
+            if LipAPI.mouth_area_h is not None and len(LipAPI.mouth_timeline):
+                index = max(0, bisect.bisect_right(LipAPI.mouth_timeline.starts, LipAPI.player_time) - 1)
+                if index != ui_state['scroll']:
+                    ui_state['scroll'] = index
+                    niceutils.show_cue(index)
 
         # set new value to central label
         new_label = (str(LipAPI.player_time) + ' | ' +
@@ -1437,6 +1527,11 @@ async def main_page():
         if LipAPI.player_status != 'play' and LipAPI.mouth_carousel is not None:
             LipAPI.mouth_carousel.set_value(str(get_index_from_letter(actual_cue_record['value'])))
 
+        send_on_seek(actual_cue_record, next_cue_record, letter)
+
+    def send_on_seek(actual_cue_record, next_cue_record, letter):
+        """ Send OSC / WVS msg for the player time when not playing (seek) """
+
         # send osc message on seek
         if osc_activate.value is True and LipAPI.player_status != 'play' and send_seek.value is True:
             LipAPI.osc_client.send_message(osc_address.value + '/mouthCue/',
@@ -1447,13 +1542,8 @@ async def main_page():
 
         # send wvs message on seek
         if wvs_activate.value is True and LipAPI.player_status != 'play' and send_seek.value is True:
-            ws_msg = {"action": {"type": "cast_image",
-                                 "param": {"image_number": get_index_from_letter(actual_cue_record['value']),
-                                           "device_number": 0,
-                                           "class_name": "Media",
-                                           "fps_number": 50,
-                                           "duration_number": 1}}}
-
+            ws_msg = LipAPI.wvs_encoder.encode(get_index_from_letter(actual_cue_record['value']),
+                                               LipAPI.player_time)
             LipAPI.wvs_client.send_message(ws_msg)
 
     def update_progress(data, is_stderr):
@@ -1650,12 +1740,13 @@ async def main_page():
                 sav_lyrics = ui.button('save', on_click=save_lyrics)
                 sav_lyrics.tooltip('Save lyrics for analysis')
 
-    def song_info(file_name):
+    async def song_info(file_name):
         """
         Retrieves and displays information about a song from a given MP3 file
         and additional data from the YouTube Music API.
         This function reads the song's metadata, updates the UI with the song details,
         and fetches lyrics and related information, including the artist's top songs.
+        The YouTube Music lookup (network, client creation on first use) runs in a thread.
 
         Args:
             file_name (str): The path to the MP3 file from which to extract song information.
@@ -1667,6 +1758,8 @@ async def main_page():
         # made spinner visible
         song_spinner.set_visibility(True)
 
+        import taglib
+
         # read tag data of the mp3 file
         with taglib.File(file_name) as song:
             cfg.logger.info(song.tags)
@@ -1706,7 +1799,7 @@ async def main_page():
         song5_img.set_source('')
         song5_title.set_text('')
         # get info from ytmusicapi
-        info_from_yt = ret.get_song_info_with_lyrics(title_tag, artist_tag)
+        info_from_yt = await run.io_bound(ret.get_song_info_with_lyrics, title_tag, artist_tag)
         cfg.logger.info(info_from_yt)
 
         try:
@@ -1800,6 +1893,10 @@ async def main_page():
     # Rhubarb instance, callback will send back two values: data and is_stderr (for STDErr capture)
     #
     rub.callback = update_progress
+    #
+    # Mouth cue strip actions, sent by the browser
+    #
+    ui.on('cue', cue_event)
 
     #
     # Main UI generation
@@ -1850,6 +1947,9 @@ async def main_page():
                     output_label.style(add='padding-top:10px')
                     ic_refresh = ui.icon('refresh')
                     ic_refresh.on('click', lambda: ui.navigate.to('/'))
+                    ic_batch = ui.icon('playlist_play')
+                    ic_batch.tooltip('Batch analysis of audio folder')
+                    ic_batch.on('click', lambda: ui.navigate.to('/batch', new_tab=True))
                     edit_mouth_buffer = ui.chip('Edit mouth Cues',
                                                 icon='edit',
                                                 text_color='yellow',
@@ -1903,8 +2003,7 @@ async def main_page():
                                  'width:260px;'
                                  'text-align:center')
                 if len(LipAPI.mouths_buffer_thumb) > 0:
-                    model_img = Image.fromarray(LipAPI.mouths_buffer_thumb[0])
-                    model_thumb = ui.image(model_img).classes('w-6 self-center')
+                    model_thumb = ui.image(LipAPI.mouths_buffer_thumb[0]).classes('w-6 self-center')
                 else:
                     model_thumb = ui.image('./media/image/model/default/X.png').classes('w-6 self-center')
 
@@ -1923,13 +2022,18 @@ async def main_page():
                         # player for vocals part, need mp3 file
                         player_vocals = ui.audio('').props('id=player_vocals')
                         player_vocals.props('preload=auto')
-                        player_vocals.on('timeupdate', lambda: player_time_action())
+                        # player time is sent with the event, no need to ask it back
+                        player_vocals.on('timeupdate', player_time_action,
+                                         js_handler='(e) => emit(e.target.currentTime)')
                         player_vocals.on('play', lambda: event_player_vocals('play'))
                         player_vocals.on('pause', lambda: event_player_vocals('pause'))
                         player_vocals.on('ended', lambda: event_player_vocals('end'))
                         spinner_vocals = ui.spinner('audio', size='lg', color='green')
                         spinner_vocals.set_visibility(False)
                         audio_vocals = ui.label('VOCALS').classes('self-center').tooltip('TBD')
+                        convert_progress = ui.linear_progress(show_value=False, size='xs')
+                        convert_progress.tooltip('wav conversion')
+                        convert_progress.set_visibility(False)
                         with ui.row():
                             folder_out_list = ui.icon('list', size='sm')
                             folder_out_list.tooltip('folder')
@@ -2145,6 +2249,14 @@ async def main_page():
                         wvs_path = ui.input('Path (opt)', value='/ws')
                         wvs_activate = ui.checkbox('activate', on_change=manage_wvs_client)
                         wvs_send_metadata = ui.checkbox('Metadata')
+                        wvs_binary = ui.checkbox('Binary').bind_value(LipAPI.wvs_encoder, 'binary')
+                        wvs_binary.tooltip('Send compact binary frame instead of JSON')
+                    with ui.row():
+                        wvs_latency = ui.number('Latency (ms)', min=0, format='%.1f')
+                        wvs_latency.bind_value(LipAPI, 'wvs_latency', forward=lambda value: value or 0)
+                        wvs_latency.tooltip('Cues are sent earlier by this amount')
+                        wvs_calibrate = ui.button(icon='timer', on_click=calibrate_wvs).props('flat')
+                        wvs_calibrate.tooltip('Measure round trip to WLEDVideoSync')
 
             ui.label(' ')
             ui.separator()
@@ -2158,6 +2270,25 @@ async def main_page():
                         osc_port = ui.number('Port', value=12000)
                         osc_activate = ui.checkbox('activate', on_change=manage_osc_client)
                         osc_send_metadata = ui.checkbox('Metadata')
+                    osc_targets = ui.input('Extra targets (opt)', value=cfg.app_config.get('osc_targets', ''))
+                    osc_targets.tooltip('ip:port list, comma separated. Same messages sent to all targets')
+                    osc_latency = ui.number('Latency (ms)', min=0, format='%.1f')
+                    osc_latency.bind_value(LipAPI, 'osc_latency', forward=lambda value: value or 0)
+                    osc_latency.tooltip('Cues are sent earlier by this amount')
+
+            ui.label(' ')
+            ui.separator()
+
+            ddp_exp = ui.expansion('WLED (DDP)').classes('bg-cyan-600')
+            with ddp_exp:
+                with ui.column():
+                    ddp_targets = ui.input('Targets', value=cfg.app_config.get('ddp_targets', ''))
+                    ddp_targets.tooltip('ip[:port][@WxH] list, comma separated. Pre-rendered mouth sent to all')
+                    with ui.row():
+                        ddp_activate = ui.checkbox('activate', on_change=manage_ddp_client)
+                        ddp_latency = ui.number('Latency (ms)', min=0, format='%.1f')
+                        ddp_latency.bind_value(LipAPI, 'ddp_latency', forward=lambda value: value or 0)
+                        ddp_latency.tooltip('Cues are sent earlier by this amount')
 
             ui.separator()
 
@@ -2238,6 +2369,55 @@ async def preview_page():
         await create_carousel()
 
 
+@ui.page('/batch')
+async def batch_page():
+    """
+    Displays the batch analysis page of the application.
+    All songs of the audio folder are listed with their job status and progress, queue can be started / stopped.
+
+    Returns:
+        None
+
+    """
+    niceutils.apply_custom()
+    batch = LipAPI.batch_queue
+
+    @ui.refreshable
+    def job_list():
+        for job in batch.jobs:
+            with ui.row().classes('w-full items-center no-wrap'):
+                ui.label(job['name']).classes('w-1/3').tooltip(job['wav'])
+                ui.label().bind_text_from(job, 'status').classes('w-24')
+                ui.linear_progress(show_value=False).bind_value_from(job, 'progress').classes('w-1/3')
+                ui.button(icon='replay', on_click=lambda name=job['name']: batch.reset(name)).props('flat dense')
+
+    def discover():
+        added = batch.discover()
+        ui.notify(f'{len(added)} new song(s) found')
+        job_list.refresh()
+
+    def start():
+        if batch.start():
+            ui.notify('Batch analysis initiated')
+        else:
+            ui.notification('Already running batch', type='negative', position='center')
+
+    def clear():
+        batch.clear()
+        job_list.refresh()
+
+    with ui.card().classes('w-full'):
+        with ui.row().classes('items-center'):
+            ui.label(f'Audio folder : {batch.audio_folder}')
+            ui.button('Discover', icon='search', on_click=discover)
+            ui.button('Start', icon='play_arrow', on_click=start)
+            ui.button('Stop', icon='stop', on_click=batch.stop).tooltip('running jobs go to the end')
+            ui.button('Reset all', icon='replay', on_click=lambda: batch.reset())
+            ui.button('Clear', icon='clear', on_click=clear)
+            ui.spinner('dots').bind_visibility_from(batch, '_running')
+        job_list()
+
+
 @ui.page('/audiomass')
 async def audio_editor():
     """
@@ -2274,6 +2454,14 @@ def shutdown_actions():
     """
 
     cfg.logger.info('shutdown actions')
+    # stop cue scheduler
+    LipAPI.cue_scheduler.stop()
+    # release DDP socket
+    if LipAPI.ddp_client is not None:
+        LipAPI.ddp_client.stop()
+    # no new batch job, state is saved for resume
+    if LipAPI.batch_queue is not None:
+        LipAPI.batch_queue.stop()
     # stop Chataigne
     cfg.logger.info('stop chataigne')
     cha.stop_process()
@@ -2315,7 +2503,42 @@ if "NUITKA_ONEFILE_PARENT" not in os.environ:
     # animate or not
     do_animation = str2bool(cfg.custom_config['animate-ui'])
 
+    # output latency (ms)
+    LipAPI.osc_latency = float(cfg.app_config.get('osc_latency', 0))
+    LipAPI.wvs_latency = float(cfg.app_config.get('wvs_latency', 0))
+    LipAPI.ddp_latency = float(cfg.app_config.get('ddp_latency', 0))
+    LipAPI.wvs_encoder.binary = str2bool(cfg.app_config.get('wvs_binary', 'False'))
+    # max main page refresh rate from player time (Hz)
+    LipAPI.ui_refresh_rate = max(1.0, float(cfg.app_config.get('ui_refresh_rate', 10)))
+
+    # mouth model pre-rendered to LED matrix sizes
+    LipAPI.matrix_renderer = MatrixRenderer(parse_sizes(cfg.app_config.get('matrix_sizes', '16x16,32x32,64x32')),
+                                            float(cfg.app_config.get('matrix_gamma', 2.2)))
+
+    # rhubarb parallel segments, 1 to run one process per file
+    rub.workers = max(1, int(cfg.app_config.get('analysis_workers', 1)))
+
+    # rhubarb results cache, size in MB (0: no limit)
+    if str2bool(cfg.app_config.get('analysis_cache', 'True')):
+        rub.cache = AnalysisCache(cfg.app_config.get('analysis_cache_folder', './tmp/rhubarb_cache/'),
+                                  float(cfg.app_config.get('analysis_cache_size', 256)))
+
+    # song info (YTMusic) cache, ttl in days, not found songs ttl in hours
+    if str2bool(cfg.app_config.get('metadata_cache', 'True')):
+        ret.cache = MetadataCache(cfg.app_config.get('metadata_cache_file', './tmp/metadata_cache.sqlite'),
+                                  float(cfg.app_config.get('metadata_cache_ttl', 30)),
+                                  float(cfg.app_config.get('metadata_negative_ttl', 24)))
+
+    # batch analysis of audio folder, state saved for resume
+    LipAPI.batch_queue = BatchQueue(cfg.app_config['audio_folder'],
+                                    cfg.app_config['output_folder'],
+                                    concurrency=int(cfg.app_config.get('batch_concurrency', 1)),
+                                    cache=rub.cache,
+                                    workers=rub.workers)
+
 else:
+    import tkinter as tk
+    from tkinter import PhotoImage
 
     def on_ok_click():
         # Close the window when OK button is clicked
@@ -2381,10 +2604,15 @@ app.add_static_files('/output', 'output')
 app.add_static_files('/audiomass', 'audiomass')
 app.add_static_files('/assets', 'assets')
 app.add_static_files('/config', 'config')
+app.add_static_files(LipAPI.mouth_assets.url, LipAPI.mouth_assets.folder)
 
 app.on_startup(startup_actions)
 app.on_shutdown(shutdown_actions)
 
+if startup_profiler.enabled:
+    startup_profiler.report()
+    sys.exit(0)
+
 """
 run niceGUI
 reconnect_timeout: need big value if load thumbs
@@ -0,0 +1,155 @@
+"""
+a: zak-45
+d: 17/10/2026
+v: 1.0.0
+
+WLEDLipSync headless command line: convert, analyse and export without the GUI.
+
+Same pipeline as the /batch page (see batchqueue): mp3 converted to mono 16 kHz WAV if missing / outdated,
+waveform peaks, then Rhubarb (result cache, parallel segments) and <output_folder>/<song>/rhubarb.json.
+nicegui, webview, tkinter and cv2 are never imported, so it starts fast and runs without display.
+
+    python WLEDLipSyncCLI.py                          # all songs of the configured audio folder
+    python WLEDLipSyncCLI.py media/audio/song.mp3 -o ./output/
+    python WLEDLipSyncCLI.py ./albums/a/ ./albums/b/ -j 4 -w 2 --force
+
+Exit codes:
+    0   all songs analysed
+    1   some songs failed (see log)
+    2   bad arguments or nothing to analyse
+    3   Rhubarb executable not found
+
+"""
+import argparse
+import json
+import os
+import sys
+
+import coreutils
+
+from str2bool import str2bool
+from analysiscache import AnalysisCache
+from batchqueue import BatchQueue, DONE
+from configmanager import ConfigManager
+from cuetimeline import CueTimeline
+
+# no info window when headless, errors are logged
+coreutils.error_window = False
+
+cfg = ConfigManager(logger_name='WLEDLogger')
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_NO_RHUBARB = 3
+
+
+def folder_path(folder: str):
+    """ folder with / at the end, as used by BatchQueue """
+    folder = folder.replace('\\', '/')
+    return folder if folder.endswith('/') else folder + '/'
+
+
+def parse_args(argv=None):
+    """
+    Command line arguments, defaults from config/WLEDLipSync.ini.
+
+    Returns:
+        argparse.Namespace
+
+    """
+    app_config = cfg.app_config or {}
+    parser = argparse.ArgumentParser(prog='WLEDLipSyncCLI',
+                                     description='Analyse songs with Rhubarb, without the GUI.')
+    parser.add_argument('inputs', nargs='*',
+                        help='audio files or folders (mp3, or <song>/vocals.mp3 stems). '
+                             'Defaults to the configured audio folder.')
+    parser.add_argument('-o', '--output', default=app_config.get('output_folder', './media/audio/'),
+                        help='output folder, <output>/<song>/rhubarb.json')
+    parser.add_argument('-j', '--jobs', type=int, default=int(app_config.get('batch_concurrency', 1)),
+                        help='number of songs analysed at the same time')
+    parser.add_argument('-w', '--workers', type=int, default=int(app_config.get('analysis_workers', 1)),
+                        help='parallel Rhubarb segments per song (1: no split)')
+    parser.add_argument('-r', '--recognizer', choices=('pocketSphinx', 'phonetic'), default='pocketSphinx',
+                        help='Rhubarb recognizer')
+    parser.add_argument('-f', '--force', action='store_true', help='analyse again songs already done')
+    parser.add_argument('--no-cache', action='store_true', help='do not use the analysis cache')
+    parser.add_argument('-q', '--quiet', action='store_true', help='print only the summary')
+    args = parser.parse_args(argv)
+    if not args.inputs:
+        args.inputs = [app_config.get('audio_folder', './media/audio/')]
+    return args
+
+
+def cue_summary(output_file: str):
+    """
+    Load the analysis result, same way as the GUI.
+
+    Returns:
+        tuple: (number of cues, end time in seconds), (0, 0.0) if not readable.
+
+    """
+    try:
+        with open(output_file, 'r', encoding='utf-8') as data:
+            timeline = CueTimeline(json.load(data))
+    except (OSError, json.JSONDecodeError) as e:
+        cfg.logger.warning(f'Could not read {output_file}: {e}')
+        return 0, 0.0
+    return len(timeline), timeline.ends[-1] if len(timeline) else 0.0
+
+
+def main(argv=None):
+    """
+    Run the analysis of all inputs.
+
+    Returns:
+        int: exit code.
+
+    """
+    args = parse_args(argv)
+
+    exe_name = coreutils.rhubarb_exe_name()
+    if not exe_name or not os.path.isfile(exe_name):
+        print(f'Rhubarb not found: {exe_name}, run WLEDLipSync once to install it', file=sys.stderr)
+        return EXIT_NO_RHUBARB
+
+    cache = None
+    if not args.no_cache and str2bool(cfg.app_config.get('analysis_cache', 'True')):
+        cache = AnalysisCache(cfg.app_config.get('analysis_cache_folder', './tmp/rhubarb_cache/'),
+                              float(cfg.app_config.get('analysis_cache_size', 256)))
+
+    def on_change(job):
+        if not args.quiet:
+            print(f"{job['status']:>10}  {job['name']}", flush=True)
+
+    output = folder_path(args.output)
+    queue = BatchQueue(output, output, state_file=None, concurrency=max(1, args.jobs), cache=cache,
+                       workers=max(1, args.workers), recognizer=args.recognizer, on_change=on_change)
+    for item in args.inputs:
+        if os.path.isdir(item):
+            queue.discover(folder_path(item))
+        elif os.path.isfile(item):
+            queue.add(item)
+        else:
+            print(f'Not found: {item}', file=sys.stderr)
+
+    if not queue.jobs:
+        print('Nothing to analyse', file=sys.stderr)
+        return EXIT_USAGE
+    if args.force:
+        queue.reset()
+
+    all_done = queue.run()
+
+    for job in queue.jobs:
+        if job['status'] == DONE:
+            cues, end = cue_summary(job['output'])
+            print(f"{'done':>10}  {job['name']}  {cues} cues, {end:.2f}s  {job['output']}")
+        else:
+            print(f"{job['status']:>10}  {job['name']}  return code {job['return_code']}")
+
+    return EXIT_OK if all_done else EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
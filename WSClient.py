@@ -1,36 +1,45 @@
-import websocket
-import threading
-import queue
-import time
+import asyncio
+import logging
 import json  # Import json for serialization
+import websockets
 
+from time import perf_counter
+from cuescheduler import JitterHistogram
 from configmanager import ConfigManager
 
 cfg_mgr = ConfigManager(logger_name='WLEDLogger.wvs')
+# one record per message: own logger, rate limited (see log_rate_limits)
+traffic_logger = logging.getLogger('WLEDLogger.wvs.traffic')
 
 class WebSocketClient:
     """
-    WebSocket client run in a separate thread.
+    Asyncio WebSocket client, run as a single task on the NiceGUI event loop.
 
-    Example usage:
+    Messages go through a bounded queue (oldest dropped when full for non-async callers),
+    reconnection use an exponential backoff. Time from send_message() to the wire is measured.
+
+    Example usage (from the event loop):
     client = WebSocketClient("ws://example.com/socket", retry_interval=1, max_retry_time=10)
     client.run()
     print(client.get_status())  # Outputs: "connecting", "connected", etc.
-    client.send_message("Hello, WebSocket!")  # Only sends if connected
+    client.send_message("Hello, WebSocket!")  # thread safe, can be called from any thread
+    await client.send("Hello")  # from a coroutine, wait if the queue is full (backpressure)
+    print(await client.measure_latency())  # round trip in seconds (ping/pong), None if no answer
+    print(client.get_latency())  # send_message -> wire latency histogram
     client.stop()
     """
 
-    def __init__(self, ws_address, retry_interval=1, max_retry_time=10, queue_check_interval=5):
+    def __init__(self, ws_address, retry_interval=1, max_retry_time=10, queue_size=64, max_backoff=8):
         """
-        Initializes a new instance of the WSClient class for managing WebSocket connections. 
-        This constructor sets up the WebSocket address, retry parameters, 
-        and initializes various threads and a message queue for handling communication.
+        Initializes a new instance of the WSClient class for managing WebSocket connections.
+        This constructor sets up the WebSocket address, retry parameters and the message queue.
 
         Args:
             ws_address (str): The address of the WebSocket server to connect to.
-            retry_interval (int): The interval in seconds to wait before retrying a connection. Defaults to 1.
+            retry_interval (int): The first interval in seconds to wait before retrying a connection. Defaults to 1.
             max_retry_time (int): The maximum time in seconds to attempt reconnections. Defaults to 10.
-            queue_check_interval (int): The interval in seconds to check the message queue. Defaults to 5.
+            queue_size (int): Max number of pending messages. Defaults to 64.
+            max_backoff (int): Max interval in seconds between two retries. Defaults to 8.
 
         Returns:
             None
@@ -39,221 +48,219 @@ class WebSocketClient:
         self.ws_address = ws_address
         self.retry_interval = retry_interval
         self.max_retry_time = max_retry_time
-        self.queue_check_interval = queue_check_interval
-        self._running = False
-        self._message_queue = queue.Queue()
+        self.max_backoff = max_backoff
         self.status = "disconnected"
+        self.dropped = 0
+        self.latency = JitterHistogram('ws send latency')
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        self._running = False
         self._ws = None
-        self._connect_thread = None
-        self._receive_thread = None
-        self._send_thread = None
-        self._queue_monitor_thread = None
-        self._lock = threading.Lock()
+        self._task = None
+        self._loop = None
 
-    def _connect(self):
+    async def _connect(self):
         """
-        Establishes a connection to the WebSocket server and manages the connection lifecycle. 
-        This method attempts to connect to the specified WebSocket address, 
-        handles connection retries, and starts threads for receiving, sending, 
-        and monitoring messages until the connection is closed or an error occurs.
+        Establishes a connection to the WebSocket server and manages the connection lifecycle.
+        Retries with an exponential backoff until max_retry_time is reached or stop() is called.
 
         Returns:
             None
 
         """
-        start_time = time.time()
-        while self._running and (time.time() - start_time < self.max_retry_time):
+        retry_start = perf_counter()
+        backoff = self.retry_interval
+        while self._running and (perf_counter() - retry_start < self.max_retry_time):
             try:
-                with self._lock:
-                    self.status = "connecting"
-                self._ws = websocket.create_connection(self.ws_address)
-                cfg_mgr.logger.info(f"Connected to {self.ws_address}")
-                with self._lock:
+                self.status = "connecting"
+                async with websockets.connect(self.ws_address) as ws:
+                    self._ws = ws
                     self.status = "connected"
-
-                # Start receive, send, and queue monitor threads as daemon threads
-                self._receive_thread = threading.Thread(target=self._receive)
-                self._send_thread = threading.Thread(target=self._send)
-                self._queue_monitor_thread = threading.Thread(target=self._queue_monitor)
-                self._receive_thread.daemon = True  # Set as daemon
-                self._send_thread.daemon = True  # Set as daemon
-                self._queue_monitor_thread.daemon = True  # Set as daemon
-                self._receive_thread.start()
-                self._send_thread.start()
-                self._queue_monitor_thread.start()
-
-                # Wait for the receive thread to complete (disconnection or error)
-                self._receive_thread.join()
-
-                if not self._running:
-                    break  # Stop loop if `stop()` was called
-            except (websocket.WebSocketConnectionClosedException, ConnectionError) as e:
-                with self._lock:
-                    self.status = "retrying"
+                    # connected: a later drop gets the full retry time again
+                    retry_start = perf_counter()
+                    backoff = self.retry_interval
+                    cfg_mgr.logger.info(f"Connected to {self.ws_address}")
+                    await self._transfer(ws)
+            except asyncio.CancelledError:
+                break
+            except (websockets.exceptions.ConnectionClosed, OSError) as e:
+                self.status = "retrying"
                 cfg_mgr.logger.warning(f"WebSocket connection closed: {e}")
-                cfg_mgr.logger.info(f"Retrying connection in {self.retry_interval} seconds...")
-                time.sleep(self.retry_interval)
+                cfg_mgr.logger.info(f"Retrying connection in {backoff} seconds...")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
             except Exception as e:
-                with self._lock:
-                    self.status = "error"
+                self.status = "error"
                 cfg_mgr.logger.error(f"Unexpected error: {e}")
                 break
+            finally:
+                self._ws = None
 
         # Final cleanup
-        with self._lock:
-            self.status = "disconnected" if self._running else "stopped"
+        self.status = "disconnected" if self._running else "stopped"
+        self._running = False
         cfg_mgr.logger.info("Max retry time reached or stopped. Exiting connection loop.")
 
-    def _receive(self):
+    async def _transfer(self, ws):
         """
-        Continuously receives messages from the WebSocket server while the client is running. 
-        This method listens for incoming messages, logs them, 
-        and handles any connection errors or exceptions that may occur during the receiving process.
+        Sends queued messages and receives server messages on the same task, until the connection close.
+
+        Args:
+            ws: open websockets connection.
 
         Returns:
             None
 
         """
-        while self._running:
-            try:
-                message = self._ws.recv()
-                cfg_mgr.logger.info(f"Received: {message}")
-            except websocket.WebSocketConnectionClosedException:
-                cfg_mgr.logger.warning("Connection closed while receiving.")
-                break
-            except Exception as e:
-                cfg_mgr.logger.error(f"Error in receive: {e}")
-                break
+        get_message = asyncio.ensure_future(self._queue.get())
+        receive = asyncio.ensure_future(ws.recv())
+        try:
+            while self._running:
+                done, _ = await asyncio.wait({get_message, receive}, return_when=asyncio.FIRST_COMPLETED)
+                if receive in done:
+                    traffic_logger.info('Received: %s', receive.result())
+                    receive = asyncio.ensure_future(ws.recv())
+                if get_message in done:
+                    message, queued_time = get_message.result()
+                    # If the message is a dictionary, serialize it to JSON string
+                    if isinstance(message, dict):
+                        message = json.dumps(message)
+                    await ws.send(message)
+                    self.latency.add(perf_counter() - queued_time)
+                    traffic_logger.debug('Sent: %s', message)
+                    get_message = asyncio.ensure_future(self._queue.get())
+        finally:
+            get_message.cancel()
+            receive.cancel()
+
+    def _put(self, message, queued_time):
+        """ Put message into the queue, drop the oldest one if full. Run on the event loop. """
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+            cfg_mgr.logger.warning(f"Message queue full, oldest message dropped ({self.dropped})")
+        self._queue.put_nowait((message, queued_time))
 
-    def _send(self):
+    def run(self):
         """
-        Continuously sends messages from the message queue to the WebSocket server while the client is running. 
-        This method retrieves messages, checks the connection status, serializes messages if necessary, 
-        and handles any errors that may occur during the sending process.
+        Starts the WebSocket client by creating the connection task on the running event loop.
+        Need to be called from the event loop (e.g. NiceGUI handler).
 
         Returns:
             None
 
         """
-        while self._running:
-            try:
-                # Retrieve message from the queue with a timeout
-                message = self._message_queue.get(timeout=1)
-                with self._lock:
-                    if self.status == "connected":
-                        # If the message is a dictionary, serialize it to JSON string
-                        if isinstance(message, dict):
-                            message = json.dumps(message)
-                        self._ws.send(message)
-                        cfg_mgr.logger.info(f"Sent: {message}")
-                    else:
-                        cfg_mgr.logger.warning("Message not sent, client not connected.")
-                        # self._message_queue.put(message)  # Re-enqueue the message
-            except queue.Empty:
-                continue  # No message to send, keep checking
-            except websocket.WebSocketConnectionClosedException:
-                cfg_mgr.logger.warning("Connection closed while sending.")
-                # self._message_queue.put(message)  # Re-enqueue the message
-                break
-            except Exception as e:
-                cfg_mgr.logger.error(f"Error in send: {e}")
-                # self._message_queue.put(message)  # Re-enqueue the message
-                break
+        if not self._running:
+            self._running = True
+            self._loop = asyncio.get_running_loop()
+            self._task = self._loop.create_task(self._connect())
+            cfg_mgr.logger.info("WebSocket client started")
 
-    def _queue_monitor(self):
+    def stop(self):
         """
-        Monitors the message queue for the WebSocket client while the client is running. 
-        This method checks the length of the message queue at regular intervals 
-        and logs a warning if there are messages that are not being sent.
+        Stops the WebSocket client and cleans up resources.
+        Cancel the connection task (connection is closed by its context manager) and clear the queue.
 
         Returns:
             None
 
         """
-        while self._running:
-            time.sleep(self.queue_check_interval)
-            queue_length = self._message_queue.qsize()
-            if queue_length > 0:
-                cfg_mgr.logger.warning(f"Message queue length is {queue_length}. Messages are not being sent.")
+        if self._task is None:
+            return
+        self._running = False
+        self.status = "stopped"
+        if self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        self._task = None
+        # Clear the message queue
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        if self.latency.count:
+            cfg_mgr.logger.info(self.latency.summary())
+        cfg_mgr.logger.info("WebSocket client stopped")
 
-    def run(self):
+    def send_message(self, message):
         """
-        Starts the WebSocket client by initiating the connection thread. 
-        This method checks if the client is already running, and if not, 
-        it sets the running flag to True and starts a new thread to handle the connection process.
+        Queues a message for sending to the WebSocket server.
+        Thread safe, never block: if the queue is full, the oldest message is dropped.
+
+        Args:
+            message: The message to be sent to the WebSocket server (str, bytes or dict).
 
         Returns:
             None
 
         """
         if not self._running:
-            self._running = True
-            self._connect_thread = threading.Thread(target=self._connect)
-            self._connect_thread.daemon = True  # Set as daemon
-            self._connect_thread.start()
-            cfg_mgr.logger.info("WebSocket client started")
+            cfg_mgr.logger.warning("Cannot send message: WebSocket client is not running.")
+            return
+        self._loop.call_soon_threadsafe(self._put, message, perf_counter())
 
-    def stop(self):
+    async def send(self, message):
         """
-        Stops the WebSocket client and cleans up resources.
-        This method sets the running flag to False, updates the client status,
-        closes the WebSocket connection if it is open,
-        clears the message queue, and waits for all associated threads to terminate.
+        Queues a message for sending, from a coroutine: wait if the queue is full (backpressure).
+
+        Args:
+            message: The message to be sent to the WebSocket server (str, bytes or dict).
 
         Returns:
             None
 
         """
-        if not self._running:
-            return
-        self._running = False
-        with self._lock:
-            self.status = "stopped"
-        # Close WebSocket connection if open
-        if self._ws:
-            self._ws.close()
-        # Clear the message queue
-        with self._message_queue.mutex:
-            self._message_queue.queue.clear()
-        # Wait for all threads to stop with a timeout
-        if self._connect_thread:
-            self._connect_thread.join(timeout=2)
-        if self._receive_thread:
-            self._receive_thread.join(timeout=2)
-        if self._send_thread:
-            self._send_thread.join(timeout=2)
-        if self._queue_monitor_thread:
-            self._queue_monitor_thread.join(timeout=2)
-        cfg_mgr.logger.info("WebSocket client stopped")
+        await self._queue.put((message, perf_counter()))
 
-    def send_message(self, message):
+    async def measure_latency(self, count: int = 5, timeout: float = 2.0):
         """
-        Queues a message for sending to the WebSocket server if the client is connected.
-        This method checks the connection status and, if connected, adds the message to the message queue;
-        otherwise, it logs a warning indicating that the message cannot be sent.
+        Measures the round trip time to the WebSocket server, using ping/pong control frames.
+        Used to calibrate the WLEDVideoSync output latency.
 
         Args:
-            message: The message to be sent to the WebSocket server.
+            count (int): number of ping to send. Defaults to 5.
+            timeout (float): max time in seconds to wait for each pong. Defaults to 2.0.
 
         Returns:
-            None
+            float or None: median round trip time in seconds, None if not connected or no pong received.
+
+        """
+        if self._ws is None or self.status != "connected":
+            cfg_mgr.logger.warning("Cannot measure latency: WebSocket client is not connected.")
+            return None
+
+        round_trips = []
+        for i in range(count):
+            sent = perf_counter()
+            try:
+                pong_waiter = await self._ws.ping(f'WLEDLipSync-{i}'.encode())
+                await asyncio.wait_for(pong_waiter, timeout)
+                round_trips.append(perf_counter() - sent)
+            except asyncio.TimeoutError:
+                cfg_mgr.logger.warning(f"No pong received for ping {i}")
+            except Exception as e:
+                cfg_mgr.logger.error(f"Error in ping: {e}")
+                break
+
+        if not round_trips:
+            return None
+        round_trips.sort()
+        median = round_trips[len(round_trips) // 2]
+        cfg_mgr.logger.info(f"WebSocket round trip: {median * 1000:.1f}ms ({len(round_trips)}/{count} pong)")
+        return median
+
+    def get_latency(self):
+        """
+        Retrieves the send_message -> wire latency histogram.
+
+        Returns:
+            dict: see JitterHistogram.stats(), plus dropped messages count.
 
         """
-        with self._lock:
-            if self.status == "connected":
-                self._message_queue.put(message)
-                cfg_mgr.logger.info(f"Message queued: {message}")
-            else:
-                cfg_mgr.logger.warning("Cannot send message: WebSocket client is not connected.")
+        return dict(self.latency.stats(), dropped=self.dropped)
 
     def get_status(self):
         """
         Retrieves the current status of the WebSocket client.
-        This method returns the status while ensuring thread safety by acquiring a lock during the operation.
 
         Returns:
             str: The current status of the WebSocket client.
 
         """
-        with self._lock:
-            return self.status
+        return self.status
@@ -0,0 +1,168 @@
+"""
+a: zak-45
+d: 17/10/2026
+v: 1.0.0
+
+Content addressed cache for Rhubarb analysis results.
+
+Rhubarb (pocketSphinx) can take minutes per song. The result only depends on the WAV content,
+the recognizer, the lyrics (dialog) file, the export format and the Rhubarb version, so a hash of all
+of them is used as key. A hit is a simple file copy.
+
+Entries are plain files named <key>.<ext> into the cache folder. Last access is kept by the file mtime,
+the least recently used entries are removed when the folder size exceed the cap.
+
+"""
+import hashlib
+import os
+import shutil
+
+from configmanager import ConfigManager
+
+cfg_mgr = ConfigManager(logger_name='WLEDLogger.rhubarb')
+
+
+def file_hash(file_name: str, chunk_size: int = 1024 * 1024):
+    """
+    sha256 of the file content, read by chunk
+
+    Returns:
+        str: hex digest, '' if the file does not exist.
+
+    """
+    if not file_name or not os.path.isfile(file_name):
+        return ''
+    digest = hashlib.sha256()
+    with open(file_name, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """
+    Rhubarb result cache on disk, LRU with size cap.
+
+    # Usage
+    cache = AnalysisCache('./tmp/rhubarb_cache/', max_size_mb=256)
+    key = cache.key('vocals.wav', 'pocketSphinx', 'lyrics.txt', '1.13.0', 'json')
+    if not cache.restore(key, 'rhubarb.json'):
+        ... run rhubarb ...
+        cache.store(key, 'rhubarb.json')
+
+    """
+
+    def __init__(self, folder: str = './tmp/rhubarb_cache/', max_size_mb: float = 256):
+        """
+        Initializes the cache, create the folder if needed.
+
+        Args:
+            folder (str): where cached results are stored. Defaults to './tmp/rhubarb_cache/'.
+            max_size_mb (float): cache size cap in MB, 0 to disable the cap. Defaults to 256.
+
+        """
+        self.folder = folder
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        os.makedirs(self.folder, exist_ok=True)
+
+    @staticmethod
+    def key(wav_file: str, recognizer: str, lyrics_file: str, version: str, export_format: str):
+        """
+        Compute the cache key for one analysis.
+
+        Args:
+            wav_file (str): file given to rhubarb.
+            recognizer (str): rhubarb recognizer.
+            lyrics_file (str): dialog file, content is hashed ('' if no file).
+            version (str): rhubarb version.
+            export_format (str): rhubarb export format, also used as file extension.
+
+        Returns:
+            str: hex digest
+
+        """
+        digest = hashlib.sha256()
+        for part in (file_hash(wav_file), recognizer, file_hash(lyrics_file), version, export_format):
+            digest.update(part.encode())
+            digest.update(b'\0')
+        return f'{digest.hexdigest()}.{export_format}'
+
+    def _entry(self, key: str):
+        return os.path.join(self.folder, key)
+
+    def restore(self, key: str, output_file: str):
+        """
+        Copy the cached result to output_file if any.
+
+        Returns:
+            bool: True on cache hit.
+
+        """
+        entry = self._entry(key)
+        if not os.path.isfile(entry):
+            return False
+        try:
+            os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+            shutil.copyfile(entry, output_file)
+            # mark as recently used
+            os.utime(entry)
+        except OSError as e:
+            cfg_mgr.logger.error(f'Error restoring analysis from cache: {e}')
+            return False
+        cfg_mgr.logger.info(f'Analysis restored from cache: {key}')
+        return True
+
+    def store(self, key: str, output_file: str):
+        """
+        Put the rhubarb result into the cache, then apply the size cap.
+
+        Returns:
+            None
+
+        """
+        if not os.path.isfile(output_file):
+            return
+        entry = self._entry(key)
+        try:
+            # copy then rename, a partial file is never seen as an entry
+            shutil.copyfile(output_file, entry + '.tmp')
+            os.replace(entry + '.tmp', entry)
+        except OSError as e:
+            cfg_mgr.logger.error(f'Error storing analysis into cache: {e}')
+            return
+        cfg_mgr.logger.debug(f'Analysis stored into cache: {key}')
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache size is under the cap.
+
+        Returns:
+            None
+
+        """
+        if self.max_size <= 0:
+            return
+        entries = []
+        with os.scandir(self.folder) as folder:
+            for item in folder:
+                if item.is_file() and not item.name.endswith('.tmp'):
+                    stat = item.stat()
+                    entries.append((stat.st_mtime, stat.st_size, item.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(entry)
+                total -= size
+                cfg_mgr.logger.debug(f'Analysis removed from cache: {entry}')
+            except OSError as e:
+                cfg_mgr.logger.error(f'Error removing cache entry: {e}')
+
+    def clear(self):
+        """ remove all entries """
+        with os.scandir(self.folder) as folder:
+            for item in folder:
+                if item.is_file():
+                    os.remove(item.path)
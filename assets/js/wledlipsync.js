@@ -3,7 +3,9 @@ import TimelinePlugin from '/assets/js/wave_plugins/timeline.esm.js';
 import RegionsPlugin from '/assets/js/wave_plugins/regions.esm.js'
 
 let wavesurfer;
-let cuePoints = [];
+let cuePoints = [];  // rendered cards of the cue strip window
+// whole mouth cue array, only size cards from first are rendered
+let cueStrip = {cues: [], selected: new Set(), changed: new Set(), first: 0, size: 60};
 let checkBlinkingInterval;
 
 // Initialize the Regions plugin
@@ -79,118 +81,275 @@ window.clear_markers = async function() {
     };
 };
 
-// generate cue data from GUI
-window.genCueData = async function() {
-    // Check container exist
-    checkCuePointsAreaExistence(10000, 500).then((found) => {
-        if (found) {
-            // console.log('CuePointsArea exists!');
-            cuePoints = generateCuePointsFromContainer('CuePoints');
-            // console.log(`Number of cue points generated: ${cuePoints.length}`);
-        } else {
-            // console.log('CuePointsArea does not exist.');
-        }
-    });
+// blink and scroll to the mouth card nearest time, from waveform click or GUI
+window.focusCue = function(time) {
+    const index = findNearestCueIndex(time);
+    if (index < 0) {
+        // console.log('not found nearest');
+        return;
+    }
+    const element = showCueIndex(index);
+    if (element) {
+        cuePoints.forEach(cue => {
+            cue.element.classList.remove('blink');
+        });
+        element.classList.add('blink');
+        element.focus({  preventScroll: false , focusVisible: true })
+    }
 };
 
 /**
- * Generates an array of cue points from the specified container element.
+ * Builds one mouth card and its letter, same look as the NiceGUI card / icons / labels.
+ * Values are only set with textContent / dataset, never parsed as HTML.
  *
- * This function retrieves all elements with the class 'cue-point' within the
- * specified container and constructs an array of cue point objects. Each object
- * contains the cue point's time, ID, and the corresponding DOM element.
- *
- * @param {string} containerId - The ID of the container element from which to retrieve cue points.
- * @returns {Array<Object>} An array of cue point objects, each containing the time, ID, and element.
- * @returns {number} return.time - The time associated with the cue point, parsed as a float.
- * @returns {string} return.id - The ID of the cue point element.
- * @returns {Element} return.element - The DOM element representing the cue point.
+ * @param {number} start - Cue start time, also used as card id.
+ * @param {string} letter - Mouth shape letter.
+ * @param {boolean} selected - True if the cue has been selected (player time set from it).
+ * @param {boolean} changed - True if the letter has been modified.
+ * @returns {DocumentFragment} The card followed by the letter label.
  */
-function generateCuePointsFromContainer(containerId) {
-    const container = document.getElementById(containerId);
-    if (!container) {
-        return [];
+function cueCardElement(start, letter, selected, changed) {
+    const fragment = document.createDocumentFragment();
+    const card = document.createElement('div');
+    card.className = `q-card nicegui-card ${selected ? 'bg-red-400' : 'bg-cyan-700'} cue-point`;
+    card.id = String(start);
+
+    const unselect = cueIcon('highlight_off', 'unselect');
+    if (!selected) {
+        unselect.style.display = 'none';
     }
-    const cuePointElements = container.querySelectorAll('.cue-point');
-    return Array.from(cuePointElements).map(cueElement => {
-        const timeString = cueElement.id;
-        return {
-            time: parseFloat(timeString),
-            id: timeString,
-            element: cueElement
-        };
-    });
+    const seek = document.createElement('div');
+    seek.className = 'nicegui-label';
+    seek.style.cursor = 'grab';
+    seek.title = 'Click to set player time';
+    seek.dataset.action = 'seek';
+    seek.textContent = String(start);
+    card.append(unselect, seek, cueIcon('play_circle', 'play'));
+
+    const label = document.createElement('div');
+    label.className = 'nicegui-label';
+    label.style.cursor = 'pointer';
+    if (changed) {
+        label.style.color = 'orange';
+    }
+    label.dataset.action = 'letter';
+    label.dataset.start = String(start);
+    label.textContent = String(letter);
+
+    fragment.append(card, label);
+    return fragment;
+}
+
+/**
+ * Builds a material icon with its click action.
+ *
+ * @param {string} name - Material icon name.
+ * @param {string} action - data-action value, see onCueClick.
+ * @returns {HTMLElement} The icon element.
+ */
+function cueIcon(name, action) {
+    const icon = document.createElement('i');
+    icon.className = 'q-icon notranslate material-icons';
+    icon.style.fontSize = '18px';
+    icon.style.cursor = 'pointer';
+    icon.dataset.action = action;
+    icon.textContent = name;
+    return icon;
 }
 
 /**
- * Checks for the existence of the CuePointsArea element within the CardMouth element.
+ * Handles a click into the cue strip (one listener for all cards).
  *
- * This function repeatedly checks for the presence of the CuePointsArea element
- * inside the CardMouth element until either the element is found or the specified
- * duration is exceeded. It returns a promise that resolves to true if the element
- * is found, and false if the duration is exceeded without finding the element.
+ * prev / next chevrons move the window by half its size, browser only.
+ * For a card, its state (color, remove icon) is updated here and in cueStrip, then a compact delta
+ * {a: action, s: start} is sent to the server which updates the mouth cues buffer and players.
  *
- * @param {number} [duration=5000] - The maximum time to wait for the element to appear, in milliseconds.
- * @param {number} [interval=100] - The interval between checks, in milliseconds.
- * @returns {Promise<boolean>} A promise that resolves to true if the CuePointsArea is found, otherwise false.
+ * @param {MouseEvent} event - Click event from the CuePoints container.
+ * @returns {void} This function does not return a value.
  */
-function checkCuePointsAreaExistence(duration = 5000, interval = 100) {
-    return new Promise((resolve) => {
-        const startTime = Date.now();
-        const checkInterval = setInterval(() => {
-            const elapsedTime = Date.now() - startTime;
-            // Check if the duration has been exceeded
-            if (elapsedTime > duration) {
-                clearInterval(checkInterval);
-                // console.log('Time duration exceeded without finding the element.');
-                resolve(false);
-                return;
-            }
-            // Check if the CuePointsArea exists inside the CardMouth
-            const cardMouth = document.getElementById('CardMouth');
-            if (cardMouth) {
-                const cuePointsArea = cardMouth.querySelector('#CuePointsArea');
-                if (cuePointsArea) {
-                    clearInterval(checkInterval);
-                    // console.log('CuePointsArea found.');
-                    resolve(true);
-                    return;
-                }
-            }
-            // console.log('Checking for CuePointsArea...');
-        }, interval);
-    });
+function onCueClick(event) {
+    const target = event.target.closest('[data-action]');
+    if (!target) {
+        return;
+    }
+    const action = target.dataset.action;
+    if (action === 'prev' || action === 'next') {
+        const half = Math.max(1, Math.floor(cueStrip.size / 2));
+        renderCueWindow(cueStrip.first + (action === 'next' ? half : -half));
+        return;
+    }
+    const card = target.closest('.cue-point');
+    const start = parseFloat(card ? card.id : target.dataset.start);
+    if (action === 'seek' || action === 'unselect') {
+        const selected = action === 'seek';
+        if (selected) {
+            cueStrip.selected.add(start);
+        } else {
+            cueStrip.selected.delete(start);
+        }
+        card.classList.toggle('bg-red-400', selected);
+        card.classList.toggle('bg-cyan-700', !selected);
+        card.querySelector('[data-action="unselect"]').style.display = selected ? '' : 'none';
+    }
+    emitEvent('cue', {a: action, s: start});
 }
 
 /**
- * Finds the nearest cue point to a specified time within a threshold.
+ * Renders the cue strip window: cueStrip.size cards from index first (clamped), whatever the song length.
+ * A chevron is added at each end which is not the end of the song.
+ * Cue points used by waveform click / blinking are the rendered cards only.
  *
- * This function iterates through the available cue points and determines
- * which cue point is closest to the given time, provided that the difference
- * is within a specified threshold. If no cue points are found or if none
- * are within the threshold, it returns null.
+ * @param {number} first - Index of the first cue to render.
+ * @returns {void} This function does not return a value.
+ */
+function renderCueWindow(first) {
+    const container = document.getElementById('CuePoints');
+    if (!container) {
+        return;
+    }
+    const count = cueStrip.cues.length;
+    first = Math.min(Math.max(0, first), Math.max(0, count - cueStrip.size));
+    const last = Math.min(count, first + cueStrip.size);
+    cueStrip.first = first;
+
+    const fragment = document.createDocumentFragment();
+    if (first > 0) {
+        fragment.append(cueIcon('chevron_left', 'prev'));
+    }
+    for (let index = first; index < last; index++) {
+        const [start, letter] = cueStrip.cues[index];
+        fragment.append(cueCardElement(start, letter, cueStrip.selected.has(start), cueStrip.changed.has(start)));
+    }
+    if (last < count) {
+        fragment.append(cueIcon('chevron_right', 'next'));
+    }
+    container.replaceChildren(fragment);
+    container.onclick = onCueClick;
+    cuePoints = Array.from(container.querySelectorAll('.cue-point'), cueElement => ({
+        time: parseFloat(cueElement.id),
+        id: cueElement.id,
+        element: cueElement
+    }));
+    // console.log(`Cue points rendered: ${first} to ${last} of ${count}`);
+}
+
+/**
+ * Brings the cue at index into the strip and scrolls to its card.
+ * The window is re-centered on the cue when it is outside, or within a quarter of the window from a
+ * rendered edge which is not the end of the song (playback keeps cards on both sides).
  *
- * @param {number} time - The time to which the nearest cue point is to be found.
- * @returns {Object|null} The nearest cue point object if found within the threshold, otherwise null.
- * @returns {number} return.time - The time associated with the cue point.
- * @returns {string} return.id - The ID of the cue point.
- * @returns {Element} return.element - The DOM element representing the cue point.
+ * @param {number} index - Index of the cue into the cue array.
+ * @returns {HTMLElement|null} The card element, null if no such cue.
  */
-function findNearestCuePoint(time) {
-    if (cuePoints.length === 0) {
+function showCueIndex(index) {
+    const count = cueStrip.cues.length;
+    if (index < 0 || index >= count) {
         return null;
     }
+    const margin = Math.floor(cueStrip.size / 4);
+    const last = cueStrip.first + cueStrip.size;
+    if (index < cueStrip.first || index >= last ||
+        (cueStrip.first > 0 && index < cueStrip.first + margin) ||
+        (last < count && index >= last - margin) ||
+        !document.getElementById(String(cueStrip.cues[index][0]))) {
+        renderCueWindow(index - Math.floor(cueStrip.size / 2));
+    }
+    const element = document.getElementById(String(cueStrip.cues[index][0]));
+    if (element) {
+        element.scrollIntoView({ behavior: "smooth", block: "center", inline: "center" })
+    }
+    return element;
+}
+
+// playback follow from the server, index of the cue at player time
+window.showCue = function(index) {
+    showCueIndex(index);
+};
+
+/**
+ * Receives the mouth cue array sent once by the server and renders the first window of the strip.
+ *
+ * The whole array stays here (no server side element per cue), only cueStrip.size cards are into the DOM:
+ * the window follows playback / waveform clicks (showCue, focusCue) or the chevrons.
+ * Wait (by animation frame) for the CuePoints container if not yet mounted.
+ *
+ * @param {Object} data - {cues: [[start, letter], ...], selected: [start, ...], changed: [start, ...]}
+ * @param {number} [tries=300] - Number of animation frames to wait for the container.
+ * @returns {void} This function does not return a value.
+ */
+window.renderCues = function(data, tries = 300) {
+    const container = document.getElementById('CuePoints');
+    if (!container) {
+        if (tries > 0) {
+            requestAnimationFrame(() => window.renderCues(data, tries - 1));
+        }
+        return;
+    }
+    cueStrip.cues = data.cues;
+    cueStrip.selected = new Set(data.selected);
+    cueStrip.changed = new Set(data.changed);
+    renderCueWindow(0);
+};
+
+// letter modified from GUI, kept into the cue array for the next renders
+window.updateCue = function(start, letter) {
+    const index = findCueIndex(start);
+    if (index >= 0 && cueStrip.cues[index][0] === start) {
+        cueStrip.cues[index][1] = letter;
+        cueStrip.changed.add(start);
+    }
+    const container = document.getElementById('CuePoints');
+    const label = container ? Array.from(container.querySelectorAll('[data-action="letter"]'))
+        .find(element => parseFloat(element.dataset.start) === start) : null;
+    if (label) {
+        label.textContent = letter;
+        label.style.color = 'orange';
+    }
+};
+
+/**
+ * Finds, by binary search, the index of the last cue starting at or before time.
+ *
+ * @param {number} time - Time in seconds.
+ * @returns {number} Index into the cue array, -1 if time is before the first cue.
+ */
+function findCueIndex(time) {
+    let low = 0;
+    let high = cueStrip.cues.length;
+    while (low < high) {
+        const middle = (low + high) >> 1;
+        if (cueStrip.cues[middle][0] <= time) {
+            low = middle + 1;
+        } else {
+            high = middle;
+        }
+    }
+    return low - 1;
+}
+
+/**
+ * Finds the nearest cue to a specified time within a threshold, over the whole cue array.
+ *
+ * Only the cue just before and the one just after time can be the nearest (cues sorted by start).
+ *
+ * @param {number} time - The time to which the nearest cue is to be found.
+ * @returns {number} Index into the cue array, -1 if no cue within the threshold.
+ */
+function findNearestCueIndex(time) {
     const threshold = 1;
-    let nearestCue = null;
-    let smallestDiff = Infinity;
-    cuePoints.forEach(cue => {
-        const diff = Math.abs(time - cue.time);
-        if (diff < smallestDiff && diff < threshold) {
-            smallestDiff = diff;
-            nearestCue = cue;
+    const before = findCueIndex(time);
+    let nearest = -1;
+    let smallestDiff = threshold;
+    for (const index of [before, before + 1]) {
+        if (index >= 0 && index < cueStrip.cues.length) {
+            const diff = Math.abs(time - cueStrip.cues[index][0]);
+            if (diff < smallestDiff) {
+                smallestDiff = diff;
+                nearest = index;
+            }
         }
-    });
-    return nearestCue;
+    }
+    return nearest;
 }
 
 /**
@@ -218,6 +377,41 @@ function checkCuePoints() {
     });
 }
 
+/**
+ * Loads the audio element source into Wavesurfer.
+ *
+ * When the backend has precomputed peaks (data-peaks attribute of the audio element), they are fetched
+ * and given to Wavesurfer, so the mp3 is never fetched and decoded in the browser.
+ * Only the finest level is loaded, once: zoom re-renders it, Wavesurfer downsample peaks to the width.
+ * Switching level would need wavesurfer.load(), this reset the media in the middle of playback.
+ * Without peaks (or on any error), Wavesurfer decodes the audio as before.
+ *
+ * @param {HTMLAudioElement} audioElement - The GUI audio player.
+ * @returns {void} This function does not return a value.
+ */
+function loadWaveform(audioElement) {
+    const peaksUrl = audioElement.dataset.peaks;
+    if (!peaksUrl) {
+        wavesurfer.load(audioElement.src);
+        return;
+    }
+    fetch(peaksUrl)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(response.statusText);
+            }
+            return response.json();
+        })
+        .then(data => {
+            const finest = data.levels[data.levels.length - 1];
+            wavesurfer.load(audioElement.src, [finest.data], data.duration);
+        })
+        .catch(error => {
+            console.log('No waveform peaks, decode audio', error);
+            wavesurfer.load(audioElement.src);
+        });
+}
+
 /**
  * Initializes the Wavesurfer instance and sets up event listeners for audio playback.
  *
@@ -254,7 +448,7 @@ function initializeWavesurfer() {
         });
         // console.log(audioElement.src)
         // put volume to zero, not used to play any sound
-        wavesurfer.load(audioElement.src);
+        loadWaveform(audioElement);
         wavesurfer.setVolume(0);
         // zoom
         wavesurfer.once('decode', () => {
@@ -287,24 +481,7 @@ function initializeWavesurfer() {
             audioElement.currentTime = parseFloat(newTime);
             wavesurfer.seekTo(progress);
             // console.log(newTime);
-            const nearestCue = findNearestCuePoint(newTime);
-            if (nearestCue) {
-                cuePoints.forEach(cue => {
-                    const cueElement = document.getElementById(cue.id);
-                    if (cueElement) {
-                    cueElement.classList.remove('blink');
-                    }
-                });
-                // console.log(nearestCue);
-                nearestCue.element.classList.add('blink');
-                const selectCue = document.getElementById(nearestCue.id)
-                if (selectCue) {
-                    selectCue.focus({  preventScroll: false , focusVisible: true })
-                    selectCue.scrollIntoView({ behavior: "smooth", block: "center", inline: "center" })
-                }
-            } else {
-                // console.log('not found nearest');
-            }
+            window.focusCue(newTime);
         });
     };
     // in case of any audio element error, waveform is cleared
@@ -0,0 +1,233 @@
+"""
+a: zak-45
+d: 17/10/2026
+v: 1.0.0
+
+Memory mapped PCM access to a WAV file (e.g. the generated vocals.wav).
+
+The RIFF header is parsed to find the 'data' chunk, then samples are mapped with np.memmap:
+nothing is decoded nor copied, the OS load pages on demand. Slices are views on the map.
+Reductions (rms, peak ...) are done by blocks of frames, memory use does not depend on the file size.
+
+Only integer PCM (8, 16, 32 bits) and float32 WAV are supported, that's what convert_audio writes.
+
+"""
+import os
+import struct
+
+import numpy as np
+
+# wav format tag
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def read_wav_header(file_name: str):
+    """
+    Parse the RIFF chunks of a WAV file.
+
+    Returns:
+        dict: format, channels, rate, bits, offset (data chunk start) and frames.
+
+    Raises:
+        ValueError: not a supported WAV file.
+
+    """
+    with open(file_name, 'rb') as wav:
+        riff, _, wave_id = struct.unpack('<4sI4s', wav.read(12))
+        if riff != b'RIFF' or wave_id != b'WAVE':
+            raise ValueError(f'{file_name} is not a WAV file')
+        header = {}
+        while True:
+            chunk = wav.read(8)
+            if len(chunk) < 8:
+                raise ValueError(f'{file_name}: no data chunk')
+            chunk_id, size = struct.unpack('<4sI', chunk)
+            if chunk_id == b'fmt ':
+                fmt = wav.read(size)
+                tag, channels, rate, _, _, bits = struct.unpack('<HHIIHH', fmt[:16])
+                if tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+                    # sub format GUID, first two bytes are the format tag
+                    tag = struct.unpack('<H', fmt[24:26])[0]
+                header.update(format=tag, channels=channels, rate=rate, bits=bits)
+                if size % 2:
+                    wav.seek(1, os.SEEK_CUR)
+            elif chunk_id == b'data':
+                if 'format' not in header:
+                    raise ValueError(f'{file_name}: data chunk before fmt chunk')
+                offset = wav.tell()
+                # size can be wrong (streamed file), never go after the end of file
+                size = min(size, os.path.getsize(file_name) - offset)
+                header.update(offset=offset, frames=size // (header['channels'] * header['bits'] // 8))
+                return header
+            else:
+                wav.seek(size + size % 2, os.SEEK_CUR)
+
+
+class AudioStore:
+    """
+    Zero copy PCM access to a WAV file.
+
+    # Usage
+    store = AudioStore('media/audio/song/vocals.wav')
+    part = store.window(10.0, 12.5)            # view, shape (frames, channels)
+    energy = store.frame_reduce(0.01, 'rms')    # one value per 10 ms
+    peaks = store.peaks(800)                    # min / max for a waveform of 800 points
+    store.close()
+
+    """
+
+    _dtypes = {(WAVE_FORMAT_PCM, 8): np.uint8,
+               (WAVE_FORMAT_PCM, 16): np.int16,
+               (WAVE_FORMAT_PCM, 32): np.int32,
+               (WAVE_FORMAT_IEEE_FLOAT, 32): np.float32}
+
+    def __init__(self, file_name: str):
+        """
+        Map the WAV data chunk.
+
+        Args:
+            file_name (str): WAV file.
+
+        Raises:
+            ValueError: not a supported WAV file.
+            OSError: file access error.
+
+        """
+        self.file_name = file_name
+        header = read_wav_header(file_name)
+        dtype = self._dtypes.get((header['format'], header['bits']))
+        if dtype is None:
+            raise ValueError(f"{file_name}: unsupported WAV format {header['format']} / {header['bits']} bits")
+        self.rate = header['rate']
+        self.channels = header['channels']
+        self.frames = header['frames']
+        self.dtype = np.dtype(dtype)
+        if self.frames:
+            self.samples = np.memmap(file_name, dtype=dtype, mode='r', offset=header['offset'],
+                                     shape=(self.frames, self.channels))
+        else:
+            self.samples = np.zeros((0, self.channels), dtype=dtype)
+
+    @property
+    def duration(self):
+        """ duration in seconds """
+        return self.frames / self.rate if self.rate else 0.0
+
+    @property
+    def scale(self):
+        """ value to divide samples by to get floats in -1.0 .. 1.0 """
+        if self.dtype.kind == 'f':
+            return 1.0
+        return float(2 ** (self.dtype.itemsize * 8 - 1))
+
+    def close(self):
+        """
+        Release the map. Views from window() / mono() may still be used by the caller: the map is not
+        closed here (unmap under a live view crash), it is closed by GC with the last reference.
+        """
+        self.samples = np.zeros((0, self.channels), dtype=self.dtype)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def to_frame(self, seconds: float):
+        """ time in seconds to frame index, clipped to the file """
+        return min(max(0, int(round(seconds * self.rate))), self.frames)
+
+    def window(self, start: float, end: float = None):
+        """
+        Samples between start and end (seconds), view on the map.
+
+        Returns:
+            np.ndarray: shape (frames, channels), raw dtype.
+
+        """
+        end = self.duration if end is None else end
+        return self.samples[self.to_frame(start):self.to_frame(end)]
+
+    def mono(self, start: float = 0.0, end: float = None):
+        """
+        Mono samples between start and end (seconds), raw dtype.
+        A view for mono file, channels average (a copy) otherwise.
+
+        Returns:
+            np.ndarray: shape (frames,)
+
+        """
+        samples = self.window(start, end)
+        if self.channels == 1:
+            return samples[:, 0]
+        return samples.mean(axis=1).astype(self.dtype)
+
+    def _block_values(self, blocks: np.ndarray, reduction: str):
+        """ reduce (count, step, channels) raw blocks to (count,) normalized floats """
+        values = blocks.astype(np.float32)
+        if self.dtype == np.uint8:
+            values -= 128
+        values /= self.scale
+        values = values.mean(axis=2) if self.channels > 1 else values[:, :, 0]
+        if reduction == 'rms':
+            return np.sqrt(np.mean(values * values, axis=1))
+        if reduction == 'peak':
+            return np.max(np.abs(values), axis=1)
+        if reduction == 'min':
+            return np.min(values, axis=1)
+        if reduction == 'max':
+            return np.max(values, axis=1)
+        if reduction == 'mean':
+            return np.mean(values, axis=1)
+        raise ValueError("reduction must be 'rms', 'peak', 'min', 'max' or 'mean'")
+
+    def frame_reduce(self, window: float, reduction: str = 'rms', start: float = 0.0, end: float = None,
+                     chunk: int = 4096):
+        """
+        One value per window of audio between start and end (seconds), on mono normalized samples.
+        Computed by chunk of windows, the whole file is never loaded.
+
+        Args:
+            window (float): window duration in seconds.
+            reduction (str): 'rms', 'peak', 'min', 'max' or 'mean'. Defaults to 'rms'.
+            start (float): start time in seconds. Defaults to 0.0.
+            end (float): end time in seconds, None for end of file.
+            chunk (int): number of windows processed at once. Defaults to 4096.
+
+        Returns:
+            np.ndarray: float32 values, last partial window is ignored.
+
+        """
+        step = max(1, int(round(window * self.rate)))
+        samples = self.window(start, end)
+        count = len(samples) // step
+        result = np.empty(count, dtype=np.float32)
+        for first in range(0, count, chunk):
+            last = min(count, first + chunk)
+            blocks = samples[first * step:last * step].reshape(last - first, step, self.channels)
+            result[first:last] = self._block_values(blocks, reduction)
+        return result
+
+    def rms(self, start: float, end: float):
+        """ rms level between start and end (seconds), 0.0 if empty """
+        samples = self.window(start, end)
+        if not len(samples):
+            return 0.0
+        return float(self._block_values(samples[np.newaxis], 'rms')[0])
+
+    def peaks(self, points: int, start: float = 0.0, end: float = None):
+        """
+        Min / max pairs for a waveform display of points values.
+
+        Returns:
+            tuple: (min values, max values) np.ndarray of float32, -1.0 .. 1.0
+
+        """
+        end = self.duration if end is None else end
+        if points <= 0 or end <= start:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+        window = (end - start) / points
+        return (self.frame_reduce(window, 'min', start, end),
+                self.frame_reduce(window, 'max', start, end))
@@ -0,0 +1,337 @@
+"""
+a: zak-45
+d: 17/10/2026
+v: 1.0.0
+
+Batch analysis queue for a whole audio folder.
+
+Discover all songs under the audio folder, same rules as set_file_name:
+    <audio_folder>/<song>.mp3 without stems   : analysis from <audio_folder>/<song>/<song>.wav
+    <audio_folder>/<song>/vocals.mp3 (stems)  : analysis from <audio_folder>/<song>/vocals.wav
+Missing or outdated WAV files are converted from mp3 (mono 16 kHz), then Rhubarb runs with a configurable
+number of jobs at the same time.
+Each job writes <output_folder>/<song>/rhubarb.json (and peaks.json for the waveform).
+
+Queue state is saved into a json file on every status change, so an interrupted batch (app closed ...)
+can be resumed: running jobs go back to pending on load.
+
+Nothing here needs the GUI, the command line (WLEDLipSyncCLI) use the same queue, blocking (run).
+
+"""
+import json
+import os
+import time
+
+from threading import Thread, Lock
+from concurrent.futures import ThreadPoolExecutor
+
+import coreutils
+
+from rhubarb import RhubarbWrapper
+from waveformpeaks import build_peaks
+from configmanager import ConfigManager
+
+cfg_mgr = ConfigManager(logger_name='WLEDLogger.rhubarb')
+
+PENDING = 'pending'
+CONVERTING = 'converting'
+RUNNING = 'running'
+DONE = 'done'
+ERROR = 'error'
+
+
+class BatchQueue:
+    """
+    Rhubarb batch jobs, one per song, persisted on disk.
+
+    # Usage
+    batch = BatchQueue('./media/audio/', './media/audio/', concurrency=2)
+    batch.discover()
+    batch.start()
+    ...
+    batch.jobs  # list of dict: name, source, wav, lyrics, output, status, progress, return_code
+
+    """
+
+    def __init__(self,
+                 audio_folder: str = './media/audio/',
+                 output_folder: str = './media/audio/',
+                 state_file: str = './tmp/batch_queue.json',
+                 concurrency: int = 1,
+                 cache=None,
+                 workers: int = 1,
+                 recognizer: str = 'pocketSphinx',
+                 on_change=None):
+        """
+        Initializes the queue and reload the previous state if any.
+
+        Args:
+            audio_folder (str): folder where mp3 / stems are stored.
+            output_folder (str): folder where analysis json files are written.
+            state_file (str): queue state file, None to not persist. Defaults to './tmp/batch_queue.json'.
+            concurrency (int): number of Rhubarb jobs run at the same time. Defaults to 1.
+            cache (AnalysisCache, optional): result cache given to each Rhubarb run. Defaults to None.
+            workers (int): parallel segments for each Rhubarb run (see RhubarbWrapper). Defaults to 1.
+            recognizer (str): Rhubarb recognizer, 'pocketSphinx' or 'phonetic'. Defaults to 'pocketSphinx'.
+            on_change (callable, optional): called with the job on each status change (from worker thread).
+
+        """
+        self.audio_folder = audio_folder
+        self.output_folder = output_folder
+        self.state_file = state_file
+        self.concurrency = max(1, concurrency)
+        self.cache = cache
+        self.workers = workers
+        self.recognizer = recognizer
+        self.on_change = on_change
+        self.jobs = []
+        self._lock = Lock()
+        self._save_lock = Lock()  # one writer at a time on the state file
+        self._stop = False
+        self._running = False
+        self.load()
+
+    def load(self):
+        """
+        Reload queue state from the state file, interrupted jobs are set back to pending.
+
+        Returns:
+            None
+
+        """
+        if not self.state_file or not os.path.isfile(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as state:
+                jobs = json.load(state)['jobs']
+        except (OSError, KeyError, json.JSONDecodeError) as e:
+            cfg_mgr.logger.error(f'Error loading batch queue state: {e}')
+            return
+        for job in jobs:
+            if job['status'] in {CONVERTING, RUNNING}:
+                job['status'] = PENDING
+                job['progress'] = 0.0
+        self.jobs = jobs
+
+    def save(self):
+        """
+        Write queue state to the state file (tmp file then rename, never a partial state).
+        Called from the pool threads: the whole write is serialized, the last call write the last state.
+
+        Returns:
+            None
+
+        """
+        if not self.state_file:
+            return
+        with self._save_lock:
+            with self._lock:
+                data = {"jobs": [dict(job) for job in self.jobs]}
+            try:
+                os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+                with open(self.state_file + '.tmp', 'w', encoding='utf-8') as state:
+                    json.dump(data, state, indent=2)
+                os.replace(self.state_file + '.tmp', self.state_file)
+            except OSError as e:
+                cfg_mgr.logger.error(f'Error saving batch queue state: {e}')
+
+    def _new_job(self, name, source, wav, song_folder=None):
+        song_folder = song_folder or self.audio_folder + name + '/'
+        output = self.output_folder + name + '/' + 'rhubarb.json'
+        return {"name": name,
+                "source": source,
+                "wav": wav,
+                "lyrics": song_folder + 'lyrics.txt',
+                "output": output,
+                "status": DONE if os.path.isfile(output) else PENDING,
+                "progress": 1.0 if os.path.isfile(output) else 0.0,
+                "return_code": 0}
+
+    def discover(self, audio_folder: str = ''):
+        """
+        Scan the audio folder and add new songs to the queue, known jobs keep their state.
+        A song already analysed (output exists) is added as done.
+
+        Args:
+            audio_folder (str, optional): folder to scan (ending with /). Defaults to the queue audio folder.
+
+        Returns:
+            list: names of the added jobs.
+
+        """
+        found = {}
+        audio_folder = audio_folder or self.audio_folder
+        if not os.path.isdir(audio_folder):
+            cfg_mgr.logger.error(f'Audio folder {audio_folder} does not exist')
+            return []
+        for item in sorted(os.listdir(audio_folder)):
+            item_path = audio_folder + item
+            if os.path.isdir(item_path) and os.path.isfile(item_path + '/vocals.mp3'):
+                # stems
+                found[item] = self._new_job(item, item_path + '/vocals.mp3', item_path + '/vocals.wav',
+                                            item_path + '/')
+            elif os.path.isfile(item_path) and item.lower().endswith('.mp3'):
+                name = os.path.splitext(item)[0]
+                if name not in found and not os.path.isfile(audio_folder + name + '/vocals.mp3'):
+                    found[name] = self._new_job(name, item_path, audio_folder + name + '/' + name + '.wav',
+                                                audio_folder + name + '/')
+
+        with self._lock:
+            known = {job['name'] for job in self.jobs}
+            added = [job for name, job in found.items() if name not in known]
+            self.jobs.extend(added)
+        if added:
+            cfg_mgr.logger.info(f'Batch queue, {len(added)} new job(s) discovered')
+            self.save()
+        return [job['name'] for job in added]
+
+    def add(self, source: str):
+        """
+        Add one audio file to the queue, same rules as discover:
+            <folder>/<song>.mp3           : analysis from <folder>/<song>/<song>.wav
+            <folder>/<song>/vocals.mp3    : analysis from <folder>/<song>/vocals.wav (stems)
+
+        Returns:
+            str: name of the added job, None if a job with the same name is already known.
+
+        """
+        source = source.replace('\\', '/')
+        folder, file_name = os.path.split(source)
+        if file_name.lower() == 'vocals.mp3':
+            name = os.path.basename(folder)
+            song_folder = folder + '/'
+            wav = song_folder + 'vocals.wav'
+        else:
+            name = os.path.splitext(file_name)[0]
+            song_folder = (folder or '.') + '/' + name + '/'
+            wav = song_folder + name + '.wav'
+        with self._lock:
+            if any(job['name'] == name for job in self.jobs):
+                cfg_mgr.logger.warning(f'Batch queue, {name} already known, {source} not added')
+                return None
+            self.jobs.append(self._new_job(name, source, wav, song_folder))
+        self.save()
+        return name
+
+    def reset(self, name: str = ''):
+        """
+        Set job(s) back to pending, all done / error jobs if no name given.
+
+        Returns:
+            None
+
+        """
+        with self._lock:
+            for job in self.jobs:
+                if (job['name'] == name or not name) and job['status'] in {DONE, ERROR}:
+                    job['status'] = PENDING
+                    job['progress'] = 0.0
+                    job['return_code'] = 0
+        self.save()
+
+    def clear(self):
+        """ remove all jobs not running """
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job['status'] in {CONVERTING, RUNNING}]
+        self.save()
+
+    def is_running(self):
+        """ True if the batch is processing jobs """
+        return self._running
+
+    def start(self):
+        """
+        Process pending jobs in a background thread, concurrency jobs at the same time.
+
+        Returns:
+            bool: False if already running.
+
+        """
+        if self._running:
+            return False
+        self._stop = False
+        self._running = True
+        Thread(target=self._process, daemon=True).start()
+        return True
+
+    def run(self):
+        """
+        Process pending jobs and wait for the end, concurrency jobs at the same time (command line).
+
+        Returns:
+            bool: True if all jobs are done, False if some failed or already running.
+
+        """
+        if self._running:
+            return False
+        self._stop = False
+        self._running = True
+        self._process()
+        return all(job['status'] == DONE for job in self.jobs)
+
+    def stop(self):
+        """ do not start new jobs, running ones go to the end """
+        self._stop = True
+
+    def _process(self):
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                pending = [job for job in self.jobs if job['status'] == PENDING]
+                list(pool.map(self._run_job, pending))
+        finally:
+            self._running = False
+            self.save()
+            cfg_mgr.logger.info('Batch queue finished')
+
+    def _set_status(self, job, status, return_code=None):
+        with self._lock:
+            job['status'] = status
+            if return_code is not None:
+                job['return_code'] = return_code
+        self.save()
+        if self.on_change is not None:
+            self.on_change(job)
+
+    def _run_job(self, job):
+        """
+        Convert WAV if missing / outdated then run Rhubarb on it, wait for the end.
+
+        Returns:
+            None
+
+        """
+        if self._stop or job['status'] != PENDING:
+            return
+
+        if not coreutils.wav_is_up_to_date(job['source'], job['wav'], coreutils.RHUBARB_RATE, 1):
+            self._set_status(job, CONVERTING)
+            os.makedirs(os.path.dirname(job['wav']), exist_ok=True)
+            if not coreutils.convert_for_rhubarb(job['source'], job['wav'],
+                                                 progress=lambda value: job.update(progress=value)):
+                cfg_mgr.logger.error(f"Batch job {job['name']}: ERROR on wav file creation")
+                self._set_status(job, ERROR, 997)
+                return
+            job['progress'] = 0.0
+        # waveform for the GUI, next to rhubarb.json
+        build_peaks(job['wav'], os.path.dirname(job['output']) + '/peaks.json')
+
+        def progress(data, is_stderr):
+            if is_stderr and 'value' in data:
+                job['progress'] = data['value']
+
+        os.makedirs(os.path.dirname(job['output']), exist_ok=True)
+        rub = RhubarbWrapper(recognizer=self.recognizer, callback=progress, cache=self.cache, workers=self.workers)
+        self._set_status(job, RUNNING)
+        # rhubarb will append file extension
+        rub.run(file_name=job['wav'],
+                dialog_file=job['lyrics'] if os.path.isfile(job['lyrics']) else '',
+                output=os.path.splitext(job['output'])[0])
+        while rub.is_running():
+            time.sleep(0.5)
+
+        if rub.return_code == 0:
+            job['progress'] = 1.0
+            self._set_status(job, DONE, 0)
+        else:
+            cfg_mgr.logger.error(f"Batch job {job['name']}: rhubarb return code {rub.return_code}")
+            self._set_status(job, ERROR, rub.return_code)
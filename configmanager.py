@@ -8,7 +8,7 @@ Manages configuration settings for the application across different environments
 """
 
 from os import environ
-from utils import setup_logging, read_config
+from coreutils import setup_logging, read_config
 
 class ConfigManager:
     """
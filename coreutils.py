@@ -0,0 +1,379 @@
+"""
+a: zak-45
+d: 17/10/2026
+v: 1.0.0
+
+GUI free utilities for WLEDLipSync: config, logging, rhubarb executable and audio conversion.
+
+Nothing here imports nicegui, webview, tkinter or cv2, so the headless command line (WLEDLipSyncCLI)
+and the analysis modules (rhubarb, batchqueue ...) start fast and run without display.
+utils re-exports all of them, existing imports from utils keep working.
+
+"""
+import av
+import concurrent_log_handler  # noqa: F401, handler class used by config/logging.ini
+import cfg_load as cfg
+import contextlib
+import logging
+import logging.config
+import os
+import subprocess
+import sys
+import sysconfig
+import wave
+
+import logqueue
+
+from str2bool import str2bool
+from pathlib import Path
+
+# False when running headless (command line): errors are only logged, no info window
+error_window = True
+
+# logging config files already applied and config files already read: each module create its own
+# ConfigManager, config is loaded once and shared
+_logging_configured = set()
+_config_cache = {}
+
+
+def display_custom_msg(msg, msg_type: str = 'info'):
+    """
+    Displays a custom message using an external info window executable across different platforms.
+    Launches a separate process to show an error or informational message in a platform-specific manner.
+
+    Args:
+        msg (str): The message text to be displayed.
+        msg_type (str, optional): The type of message, defaults to 'info'.
+        Can specify message type like 'info' or 'error'.
+
+    Examples:
+        >> display_custom_msg("Operation completed successfully")
+        >> display_custom_msg("Error occurred", msg_type='error')
+
+    """
+    # Call the separate script to show the error/info message in a Tkinter window
+    absolute_file_name = Path(info_window_exe_name()).resolve()
+    if sys.platform.lower() == "win32":
+        command = [absolute_file_name, msg, msg_type]
+    else:
+        command = ['nohup', absolute_file_name, msg, msg_type, '&']
+
+    subprocess.Popen(command)
+
+
+def info_window_exe_name():
+    """
+    Determines the appropriate executable name for displaying information windows based on the current operating system.
+    Returns the platform-specific executable path for the info window utility.
+
+    Returns:
+        str: The filename of the info window executable for the current platform.
+        Returns None if the platform is not recognized.
+
+    Examples:
+        >> info_window_exe_name()
+        'xtra/info_window.exe'  # On Windows
+        >> info_window_exe_name()
+        'xtra/info_window.bin'  # On Linux
+
+    """
+    if sys.platform.lower() == 'win32':
+        return 'xtra/info_window.exe'
+    elif sys.platform.lower() == 'linux':
+        return 'xtra/info_window.bin'
+    elif sys.platform.lower() == 'darwin':
+        return 'xtra/info_window.app'
+    else:
+        return None
+
+
+class CustomLogger(logging.Logger):
+    """
+    A custom logging class that extends the standard Python Logger to display error messages
+    in a custom window before logging. Enhances standard error logging by adding a visual notification mechanism.
+
+    The CustomLogger overrides the standard error logging method to first display an error message
+    in a separate window using display_custom_msg(), and then proceeds with standard error logging.
+    This provides an additional layer of user notification for critical log events.
+
+    Methods:
+        error: Overrides the standard error logging method to display a custom error message before logging.
+
+    Examples:
+        >> logger = CustomLogger('my_logger')
+        >> logger.error('Critical system failure')  # Displays error in custom window and logs
+
+    """
+    def error(self, msg, *args, **kwargs):
+        # Custom action before logging the error, not when running headless
+        if error_window:
+            display_custom_msg(msg, 'error')
+        super().error(msg, *args, **kwargs)
+
+
+def setup_logging(log_config_path='logging_config.ini', handler_name: str = None, config_path: str = 'config/WLEDLipSync.ini'):
+    """
+    Sets up logging configuration based on a specified configuration file.
+    This function checks for the existence of a logging configuration file, applies the configuration if found
+    (only the first time for a given file, then records are written by a dedicated thread if log_queue and
+    hot path loggers are rate limited, see logqueue), and returns a logger instance configured according to the settings,
+    or falls back to a basic configuration if the file is not found.
+
+    Args:
+        log_config_path (str): The path to the logging configuration file. Defaults to 'logging_config.ini'.
+        handler_name (str, optional): The name of the logger handler to use. Defaults to None.
+        config_path (str , optional): global config file path, default to config/WLEDLipSync.ini
+
+    Returns:
+        logging.Logger: The configured logger instance.
+    """
+    # Set the custom logger class
+    logging.setLoggerClass(CustomLogger)
+
+    if os.path.exists(log_config_path):
+        config_data = read_config(config_path)
+        if log_config_path not in _logging_configured:
+            # fileConfig replace the handlers: writer thread is restarted after
+            logqueue.stop_queue_logging()
+            logging.config.fileConfig(log_config_path, encoding='utf-8', disable_existing_loggers=True)
+            _logging_configured.add(log_config_path)
+            if str2bool(config_data[1].get('log_queue', 'True')):
+                logqueue.start_queue_logging()
+            logqueue.apply_rate_limits(config_data[1].get('log_rate_limits', ''))
+        if str2bool(config_data[1]['log_to_main']):
+            v_logger = logging.getLogger('WLEDLogger')
+        else:
+            v_logger = logging.getLogger(handler_name)
+        v_logger.debug(f"Logging configured using {log_config_path} for {handler_name}")
+    else:
+        logging.basicConfig(level=logging.INFO, encoding='utf-8')
+        v_logger = logging.getLogger(handler_name)
+        v_logger.warning(f"Logging config file {log_config_path} not found. Using basic configuration.")
+
+    return v_logger
+
+
+def rhubarb_folder():
+    """
+    Determines the appropriate base folder path for the Rhubarb Lip-Sync application based on the current operating system.
+    Returns the platform-specific directory for Rhubarb installation.
+
+    The function provides a consistent path to the Rhubarb base folder across different platforms,
+    selecting the correct subdirectory for Windows, Linux, or macOS. If the platform is not recognized, it returns None.
+
+    Returns:
+        str or None: The base folder path for Rhubarb for the current platform, or None if the platform is unsupported.
+
+    Examples:
+        >> rhubarb_folder()
+        'rhubarb/win'  # On Windows
+        >> rhubarb_folder()
+        'rhubarb/linux'  # On Linux
+
+    """
+    if sys.platform.lower() == 'win32':
+        return 'rhubarb/win'
+    elif sys.platform.lower() == 'linux':
+        return 'rhubarb/linux'
+    elif sys.platform.lower() == 'darwin':
+        return 'rhubarb/mac'
+    else:
+        return None
+
+
+def rhubarb_exe_name():
+    """
+    Determines the appropriate executable path for the Rhubarb Lip-Sync application based on the current operating
+    system and platform architecture.
+    Returns the platform-specific executable file for the Rhubarb application.
+
+    The function provides the correct executable path for Rhubarb across different platforms, supporting Windows,
+    Linux (x86_64), and macOS. If the platform is not recognized or supported, it returns None.
+
+    Returns:
+        str or None: The full path to the Rhubarb executable for the current platform,
+        or None if the platform is unsupported.
+
+    Examples:
+        >> rhubarb_exe_name()
+        'rhubarb/win/Rhubarb-Lip-Sync-1.13.0-Windows/rhubarb.exe'  # On Windows
+        >> rhubarb_exe_name()
+        'rhubarb/linux/Rhubarb-Lip-Sync-1.13.0-Linux/rhubarb'  # On Linux
+
+    """
+    if sys.platform.lower() == 'win32':
+        return f'{rhubarb_folder()}/Rhubarb-Lip-Sync-1.13.0-Windows/rhubarb.exe'
+    elif sys.platform.lower() == 'linux' and 'x86_64' in sysconfig.get_platform():
+        return f'{rhubarb_folder()}/Rhubarb-Lip-Sync-1.13.0-Linux/rhubarb'
+    elif sys.platform.lower() == 'darwin':
+        return f'{rhubarb_folder()}/Rhubarb-Lip-Sync-1.13.0-macOS/rhubarb'
+    else:
+        return None
+
+
+def read_config(config_file:str = 'config/WLEDLipSync.ini', reload: bool = False):
+    """
+    Reads the configuration settings from a specified INI file.
+    This function loads the configuration file, retrieves various configuration sections,
+    and returns them for use in the application.
+    The file is parsed only once, next calls return the same sections (shared by all callers).
+
+    Args:
+        config_file (str): config file path. Defaults to 'config/WLEDLipSync.ini'.
+        reload (bool): parse the file again, e.g. after modification. Defaults to False.
+
+    Returns:
+        tuple: A tuple containing the server configuration,
+        application configuration, colors configuration, and custom configuration.
+
+    """
+    if reload or config_file not in _config_cache:
+        # load config file
+        lip_cfg = cfg.load(config_file)
+        # config keys
+        server_cfg = lip_cfg.get('server')
+        app_cfg = lip_cfg.get('app')
+        colors_cfg = lip_cfg.get('colors')
+        custom_cfg = lip_cfg.get('custom')
+        _config_cache[config_file] = (server_cfg, app_cfg, colors_cfg, custom_cfg)
+
+    return _config_cache[config_file]
+
+
+# sample rate used internally by rhubarb (pocketSphinx works on 16 kHz mono), no need to give more
+RHUBARB_RATE = 16000
+
+
+def wav_is_up_to_date(input_file, output_file, rate=None, channels=None):
+    """
+    Check if the wav output_file is newer than input_file and has the expected format.
+
+    :param input_file: source audio file
+    :param output_file: wav file
+    :param rate: expected sample rate, None for any
+    :param channels: expected number of channels, None for any
+    :return: bool
+    """
+    if not os.path.isfile(output_file) or not os.path.isfile(input_file):
+        return False
+    if os.path.getmtime(output_file) < os.path.getmtime(input_file):
+        return False
+    try:
+        with wave.open(output_file, 'rb') as wav:
+            if wav.getnframes() == 0:
+                return False
+            if rate is not None and wav.getframerate() != rate:
+                return False
+            if channels is not None and wav.getnchannels() != channels:
+                return False
+    except (OSError, EOFError, wave.Error):
+        return False
+    return True
+
+
+def convert_audio(input_file, output_file, rate=44100, layout=None, progress=None, force=True):
+    """
+    Convert audio file from one format to another (e.g., MP3 to WAV or WAV to MP3).
+    Frames are decoded, resampled and encoded one by one (streaming), output is written to a temporary
+    file then renamed, so a partial file is never seen as a converted one.
+
+    # Example usage
+    # convert_audio('media/audio/input.mp3', 'output.wav')
+    # convert_audio('media/audio/input.wav', 'output.mp3')
+    # convert_audio('media/audio/input.mp3', 'output.wav', rate=16000, layout='mono', force=False)
+
+    :param input_file: Path to the input audio file
+    :param output_file: Path to the output audio file
+    :param rate: output sample rate
+    :param layout: output channel layout ('mono', 'stereo'), None to keep input one
+    :param progress: optional callback(value) with value from 0.0 to 1.0
+    :param force: if False, wav conversion is skipped when output is up to date
+    :return: bool, True if output_file is ready
+    """
+    output_format = output_file.split('.')[-1]
+    channels = {'mono': 1, 'stereo': 2}.get(layout)
+    if not force and output_format == 'wav' and wav_is_up_to_date(input_file, output_file, rate, channels):
+        logger.info(f"Conversion skipped, {output_file} is up to date")
+        if progress is not None:
+            progress(1.0)
+        return True
+
+    temp_file = f'{output_file}.tmp'
+    try:
+        # Open the input audio file
+        with av.open(input_file) as input_container:
+            input_stream = input_container.streams.audio[0]
+            duration = float(input_stream.duration * input_stream.time_base) if input_stream.duration else 0
+
+            # Create an output audio file, format from output file extension
+            with av.open(temp_file, mode='w', format=output_format) as output_container:
+
+                # Add a stream for the output file
+                if output_format == 'wav':
+                    codec, sample_format = 'pcm_s16le', 's16'  # WAV: PCM format, 16-bit samples
+                elif output_format == 'mp3':
+                    codec, sample_format = 'mp3', 's16p'  # MP3: MPEG format
+                else:
+                    raise ValueError("Unsupported output format. Supported formats are 'wav' and 'mp3'.")
+                out_layout = layout or input_stream.layout.name
+                output_stream = output_container.add_stream(codec, rate=rate, layout=out_layout)
+                resampler = av.AudioResampler(format=sample_format, layout=out_layout, rate=rate)
+
+                last_step = -1
+                for frame in input_container.decode(input_stream):
+                    # resample (and downmix) then encode the audio frame
+                    for resampled in resampler.resample(frame):
+                        for packet in output_stream.encode(resampled):
+                            output_container.mux(packet)
+                    if progress is not None and duration and frame.time is not None:
+                        # report by 1% step only
+                        step = int(min(frame.time / duration, 1.0) * 100)
+                        if step != last_step:
+                            last_step = step
+                            progress(step / 100)
+
+                # Finalize the output file by flushing resampler and stream
+                for resampled in resampler.resample(None):
+                    for packet in output_stream.encode(resampled):
+                        output_container.mux(packet)
+                for packet in output_stream.encode():  # Encode any remaining data
+                    output_container.mux(packet)
+
+        os.replace(temp_file, output_file)
+        logger.info(f"Conversion complete: {input_file} to {output_file}")
+
+    except Exception as e:
+        logger.error(f"An error occurred during conversion: {e}")
+        with contextlib.suppress(OSError):
+            os.remove(temp_file)
+        return False
+
+    if progress is not None:
+        progress(1.0)
+    return True
+
+
+def convert_for_rhubarb(input_file, output_file, progress=None):
+    """
+    Convert audio file to the wav rhubarb needs: mono, RHUBARB_RATE.
+    Nothing is done if an up-to-date wav already exists.
+    Blocking, run it with run.io_bound from the UI.
+
+    :param input_file: Path to the input audio file (mp3)
+    :param output_file: Path to the wav file
+    :param progress: optional callback(value) with value from 0.0 to 1.0
+    :return: bool, True if output_file is ready
+    """
+    return convert_audio(input_file, output_file, rate=RHUBARB_RATE, layout='mono', progress=progress, force=False)
+
+
+"""
+When this env var exist, this mean run from the one-file compressed executable.
+Load of the config is not possible, folder config should not exist.
+This avoid FileNotFoundError.
+This env not exist when run from the extracted program.
+Expected way to work.
+"""
+if "NUITKA_ONEFILE_PARENT" not in os.environ:
+    # create logger
+    logger = setup_logging('config/logging.ini', 'WLEDLogger.utils')
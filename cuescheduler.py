@@ -0,0 +1,294 @@
+"""
+a: zak-45
+d: 17/10/2026
+v: 1.0.0
+
+Deadline driven mouth cue scheduler.
+
+Instead of polling every 10ms and adding 0.01 to the player time (drift accumulate), the scheduler keeps
+an anchor (browser currentTime, monotonic clock) and sleeps exactly until the next cue boundary given by
+the CueTimeline. The anchor is corrected each time the browser report its currentTime (resync).
+Last part of the wait (spin_margin, covers the coarse Event.wait timer) is done with short sleeps, then a
+spin on perf_counter for the final 0.5 ms (GIL released at each turn) to fire with sub-millisecond jitter.
+
+Each output (carousel, OSC, WLEDVideoSync ...) can have its own latency: its cues are fired earlier by
+this amount, so all outputs land on the phoneme at the same moment.
+
+Fire jitter and clock drift are collected into histograms, logged when the scheduler stop.
+
+"""
+import sys
+import threading
+
+from time import perf_counter, sleep
+from configmanager import ConfigManager
+
+cfg_mgr = ConfigManager(logger_name='WLEDLogger.scheduler')
+
+
+class JitterHistogram:
+    """
+    Simple histogram of absolute time errors, bucketed in milliseconds.
+
+    # Usage
+    histo = JitterHistogram('jitter')
+    histo.add(0.0004)
+    cfg_mgr.logger.info(histo.summary())
+
+    """
+
+    edges_ms = (0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100)
+
+    def __init__(self, name: str):
+        self.name = name
+        self.buckets = [0] * (len(self.edges_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, error: float):
+        """
+        Add one measure into the histogram.
+
+        Args:
+            error (float): time error in seconds, sign is ignored.
+
+        """
+        value_ms = abs(error) * 1000
+        index = next((i for i, edge in enumerate(self.edges_ms) if value_ms < edge), len(self.edges_ms))
+        self.buckets[index] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+
+    def stats(self):
+        """
+        Retrieve histogram data.
+
+        Returns:
+            dict: name, count, mean_ms, max_ms and buckets ({'<0.1ms': n, ... , '>=100ms': n}).
+
+        """
+        labels = [f'<{edge}ms' for edge in self.edges_ms] + [f'>={self.edges_ms[-1]}ms']
+        return {
+            'name': self.name,
+            'count': self.count,
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0,
+            'max_ms': round(self.max_ms, 3),
+            'buckets': dict(zip(labels, self.buckets))
+        }
+
+    def summary(self):
+        """ one line text version of stats, for the log """
+        data = self.stats()
+        buckets = ' '.join(f'{label}:{number}' for label, number in data['buckets'].items() if number)
+        return f"{data['name']} n={data['count']} mean={data['mean_ms']}ms max={data['max_ms']}ms [{buckets}]"
+
+
+class CueScheduler:
+    """
+    Fire output callbacks at each mouth cue boundary, following the audio player clock.
+
+    Callbacks receive (actual_cue, nearest_cue, player_time), same records as CueTimeline.find().
+    An output with a latency is fired this amount before the cue boundary (lookahead).
+    Run in its own daemon thread, start() / stop() are non-blocking.
+
+    # Usage
+    scheduler = CueScheduler(timeline)
+    scheduler.add_output(my_callback)
+    scheduler.add_output(my_osc_callback, latency=0.080)
+    scheduler.start(player_time)
+    scheduler.resync(player_time)  # each time browser report currentTime
+    scheduler.stop()
+
+    """
+
+    # final part of the wait done by spinning (seconds)
+    spin_time = 0.0005
+
+    def __init__(self, timeline, spin_margin: float = None, resync_tolerance: float = 0.03):
+        """
+        Initializes the scheduler.
+
+        Args:
+            timeline (CueTimeline): compiled mouth cues.
+            spin_margin (float, optional): last part of the wait (seconds) done by short sleeps and spin.
+                Defaults to 2ms, 16ms on Windows (coarse Event.wait timer).
+            resync_tolerance (float, optional): re-anchor on the browser time only if drift is bigger (seconds).
+                Browser time come with a round trip delay, so small differences are noise. Defaults to 0.03.
+
+        """
+        if spin_margin is None:
+            spin_margin = 0.016 if sys.platform.lower() == 'win32' else 0.002
+        self.timeline = timeline
+        self.spin_margin = spin_margin
+        self.resync_tolerance = resync_tolerance
+        self.repeat_interval = None
+        self.outputs = []
+        self.jitter = JitterHistogram('jitter')
+        self.drift = JitterHistogram('drift')
+        self._anchor_media = 0.0
+        self._anchor_mono = 0.0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+
+    def media_time(self):
+        """ Estimated audio player time, from the anchor and the monotonic clock """
+        with self._lock:
+            return self._anchor_media + (perf_counter() - self._anchor_mono)
+
+    def is_running(self):
+        return self._running
+
+    def add_output(self, callback, latency: float = 0.0, name: str = ''):
+        """
+        Register an output, taken into account on next start().
+
+        Args:
+            callback (callable): called with (actual_cue, nearest_cue, player_time).
+            latency (float, optional): end-to-end latency of this output in seconds, cues are fired that much earlier.
+            name (str, optional): output name, for the log.
+
+        Returns:
+            None
+
+        """
+        self.outputs.append({'name': name, 'callback': callback, 'latency': max(0.0, latency), 'last_media': 0.0})
+
+    def clear_outputs(self):
+        """ Remove all outputs, scheduler need to be stopped """
+        self.outputs = []
+
+    def start(self, player_time: float, repeat_interval: float = None):
+        """
+        Start firing cues from player_time.
+        The cue at player_time (+ output latency) is fired immediately.
+
+        Args:
+            player_time (float): actual browser audio currentTime.
+            repeat_interval (float, optional): if set, also fire every repeat_interval seconds between boundaries.
+
+        Returns:
+            None
+
+        """
+        self.stop()
+        self.repeat_interval = repeat_interval
+        self.jitter = JitterHistogram('jitter')
+        self.drift = JitterHistogram('drift')
+        with self._lock:
+            self._anchor_media = player_time
+            self._anchor_mono = perf_counter()
+        self._wake.clear()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def resync(self, player_time: float):
+        """
+        Compare browser time with the estimated one, record drift and re-anchor if over tolerance (e.g. seek).
+
+        Args:
+            player_time (float): actual browser audio currentTime.
+
+        Returns:
+            None
+
+        """
+        if not self._running:
+            return
+        drift = self.media_time() - player_time
+        self.drift.add(drift)
+        if abs(drift) > self.resync_tolerance:
+            with self._lock:
+                self._anchor_media = player_time
+                self._anchor_mono = perf_counter()
+            cfg_mgr.logger.debug(f'resync scheduler, drift: {drift * 1000:.1f}ms')
+            self._wake.set()
+
+    def stop(self):
+        """
+        Stop the scheduler thread and log the jitter/drift histograms.
+
+        Returns:
+            None
+
+        """
+        if not self._running:
+            return
+        self._running = False
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        self._thread = None
+        if self.jitter.count:
+            cfg_mgr.logger.info(self.jitter.summary())
+        if self.drift.count:
+            cfg_mgr.logger.info(self.drift.summary())
+
+    def _next_target(self, cue_media, output):
+        """ cue time of the next fire for this output: next cue boundary, or repeat time if sooner """
+        target = self.timeline.next_start(cue_media)
+        if self.repeat_interval is not None:
+            repeat = output['last_media'] + self.repeat_interval
+            target = repeat if target is None else min(target, repeat)
+        return target
+
+    def _wait_until(self, deadline):
+        """
+        Sleep until the monotonic deadline. Within spin_margin: 1ms sleeps (high resolution timer on Windows
+        with python 3.11+), then spin for the last spin_time, yielding the GIL at each turn.
+
+        Returns:
+            bool: True if deadline reached, False if woken up by resync/stop.
+
+        """
+        while True:
+            remaining = deadline - perf_counter()
+            if remaining <= 0:
+                return True
+            if remaining > self.spin_margin:
+                if self._wake.wait(remaining - self.spin_margin):
+                    self._wake.clear()
+                    return False
+            elif remaining > self.spin_time:
+                sleep(min(remaining - self.spin_time, 0.001))
+            else:
+                sleep(0)
+
+    def _fire(self, output, cue_time, player_time):
+        actual_cue, nearest_cue = self.timeline.find(cue_time)
+        output['last_media'] = cue_time
+        try:
+            output['callback'](actual_cue, nearest_cue, player_time)
+        except Exception as e:
+            cfg_mgr.logger.error(f"Error in cue callback {output['name']}: {e}")
+
+    def _run(self):
+        """ scheduler loop, run in its own thread """
+        now_media = self.media_time()
+        for output in self.outputs:
+            self._fire(output, now_media + output['latency'], now_media)
+
+        while self._running:
+            # select the output with the nearest fire time (cue time - latency)
+            now_media = self.media_time()
+            fire_media, cue_media, next_output = None, None, None
+            for output in self.outputs:
+                target = self._next_target(now_media + output['latency'], output)
+                if target is not None and (fire_media is None or target - output['latency'] < fire_media):
+                    fire_media, cue_media, next_output = target - output['latency'], target, output
+
+            if next_output is None:
+                # no more cue, wait for resync (seek) or stop
+                self._wake.wait()
+                self._wake.clear()
+                continue
+
+            with self._lock:
+                deadline = self._anchor_mono + (fire_media - self._anchor_media)
+            if self._wait_until(deadline) and self._running:
+                self.jitter.add(perf_counter() - deadline)
+                self._fire(next_output, cue_media, self.media_time())
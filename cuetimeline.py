@@ -0,0 +1,164 @@
+"""
+a: zak-45
+d: 17/10/2026
+v: 1.0.0
+
+Compiled mouth cue timeline for fast time -> cue lookups.
+
+Rhubarb gives a list of mouth cues (start, end, value). Playback needs to know, many times per second,
+which cue is active at a given time and which one is the nearest. Walking the whole list on each call
+is O(n), so the cues are compiled once into sorted parallel lists and queried with binary search.
+A cursor keeps the last position, so monotonic playback is amortized O(1).
+
+Thread safe: lookups come from the cue scheduler thread and from the event loop. build() publishes the new
+lists in one assignment, each lookup works on the snapshot it read first, and the cursor is per thread.
+Returned cue dicts (and NO_CUE) are shared: callers must not modify them.
+
+"""
+import threading
+
+from bisect import bisect_right
+
+# returned when no cue match, shared to avoid allocation on each lookup
+NO_CUE = {"start": "None", "end": "None", "value": "None"}
+
+
+class CueTimeline:
+    """
+    Sorted, read-only view of the rhubarb mouth cues.
+
+    Attributes:
+        starts (list): cue start times, sorted ascending (read-only).
+        ends (list): cue end times, same order as starts (read-only).
+        values (list): cue letters, same order as starts (read-only).
+        records (list): pre-built cue dicts {"start", "end", "value"}, same order as starts (read-only).
+        threshold (float): max distance (in seconds) for the nearest cue.
+
+    # Usage
+    timeline = CueTimeline(LipAPI.mouth_times_buffer)
+    actual_cue, nearest_cue = timeline.find(12.34)
+
+    """
+
+    def __init__(self, cue_points=None, threshold: float = 5):
+        """
+        Compiles the mouth cues into sorted parallel lists.
+
+        Args:
+            cue_points (dict, optional): rhubarb data, need 'mouthCues' key. Defaults to None (empty timeline).
+            threshold (float, optional): max distance in seconds to consider a cue as nearest. Defaults to 5.
+
+        """
+        self.threshold = threshold
+        self._data = ([], [], [], [])
+        self._local = threading.local()
+        self.build(cue_points)
+
+    def build(self, cue_points=None):
+        """
+        (Re)compiles the timeline from rhubarb data.
+        Need to be called each time the mouth cues are modified (e.g. letter update, json edit).
+
+        Args:
+            cue_points (dict, optional): rhubarb data, need 'mouthCues' key.
+
+        Returns:
+            None
+
+        """
+        cues = []
+        if cue_points and 'mouthCues' in cue_points:
+            cues = sorted(cue_points['mouthCues'], key=lambda i_cue: i_cue['start'])
+
+        # new lists published at once, a lookup in progress keep the previous ones
+        self._data = ([cue['start'] for cue in cues],
+                      [cue['end'] for cue in cues],
+                      [cue['value'] for cue in cues],
+                      [{"start": cue['start'], "end": cue['end'], "value": cue['value']} for cue in cues])
+
+    @property
+    def starts(self):
+        return self._data[0]
+
+    @property
+    def ends(self):
+        return self._data[1]
+
+    @property
+    def values(self):
+        return self._data[2]
+
+    @property
+    def records(self):
+        return self._data[3]
+
+    def __len__(self):
+        return len(self._data[0])
+
+    def _index(self, starts, time_cue):
+        """
+        Retrieve index into starts of the last cue with start <= time_cue (-1 if none).
+        Check cursor of this thread and the following entry first, bisect only when time jump (seek).
+        A cursor from previous lists is only a hint, it is checked against starts.
+
+        """
+        count = len(starts)
+        cursor = getattr(self._local, 'cursor', 0)
+        if 0 <= cursor < count and starts[cursor] <= time_cue:
+            if cursor + 1 == count or time_cue < starts[cursor + 1]:
+                return cursor
+            if cursor + 2 == count or time_cue < starts[cursor + 2]:
+                self._local.cursor = cursor + 1
+                return cursor + 1
+
+        cursor = self._local.cursor = bisect_right(starts, time_cue) - 1
+        return cursor
+
+    def find(self, time_cue):
+        """
+        Find the actual cue (start <= time < end) and the nearest cue (smallest |time - start| under threshold).
+
+        Args:
+            time_cue (float): time in seconds.
+
+        Returns:
+            tuple: (actual_cue, nearest_cue) dicts with keys start, end, value. NO_CUE if not found.
+            Returned dicts are shared, do not modify them.
+
+        """
+        starts, ends, _, records = self._data
+        if not starts:
+            return NO_CUE, NO_CUE
+
+        index = self._index(starts, time_cue)
+
+        actual_cue = NO_CUE
+        if index >= 0 and time_cue < ends[index]:
+            actual_cue = records[index]
+
+        # nearest start is the one just before or just after time_cue, first one win on equality
+        nearest_cue = NO_CUE
+        smallest_diff = self.threshold
+        for candidate in (index, index + 1):
+            if 0 <= candidate < len(starts):
+                diff = abs(time_cue - starts[candidate])
+                if diff < smallest_diff:
+                    smallest_diff = diff
+                    nearest_cue = records[candidate]
+
+        return actual_cue, nearest_cue
+
+    def next_start(self, time_cue):
+        """
+        Retrieve start time of the first cue starting after time_cue.
+
+        Args:
+            time_cue (float): time in seconds.
+
+        Returns:
+            float or None: start time, None if no more cue.
+
+        """
+        starts = self._data[0]
+        index = self._index(starts, time_cue) + 1
+        return starts[index] if index < len(starts) else None
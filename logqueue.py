@@ -0,0 +1,259 @@
+"""
+a: zak-45
+d: 17/10/2026
+v: 1.0.0
+
+Queue based logging: records are only queued by the caller, a dedicated thread writes them.
+
+The file handler (ConcurrentRotatingFileHandler) takes a file lock per record, console and file writes
+are done by the caller: from the cue scheduler or the event loop this adds milliseconds of jitter.
+After logging.ini is applied, handlers of each logger are moved behind a QueueHandler (one queue for all),
+and one QueueListener thread runs the real handlers. Each record keeps the handlers of its logger,
+so output is the same as before: same files, same formatters, same handler levels.
+
+Hot path loggers (one record per cue / per message) can be rate limited: token bucket per logger,
+WARNING and above always pass, the number of suppressed records is added to the next one written.
+
+    start_queue_logging()                       # after logging.config.fileConfig
+    apply_rate_limits('WLEDLogger.cue:5')       # logger:records per second[:burst], comma separated
+
+Run this file for a benchmark: time spent in the log call of a simulated 100 Hz cue loop,
+logging off / direct file handler / queued / queued + rate limit.
+
+"""
+import atexit
+import copy
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+
+_listener = None
+
+
+class RoutedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue the record with the handlers of the logger it replaces.
+
+    The message is not formatted here (default QueueHandler does it in the caller thread), the queue
+    stay in this process: formatting is done by the writer thread.
+    """
+
+    def __init__(self, log_queue, handlers):
+        super().__init__(log_queue)
+        self.targets = tuple(handlers)
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.queue_targets = self.targets
+        return record
+
+
+class RoutedQueueListener(logging.handlers.QueueListener):
+    """ writer thread: each record is given to the handlers of its own logger, handler level respected """
+
+    def handle(self, record):
+        for handler in getattr(record, 'queue_targets', self.handlers):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+def _all_loggers():
+    return [logging.getLogger()] + [item for item in logging.Logger.manager.loggerDict.values()
+                                    if isinstance(item, logging.Logger)]
+
+
+def start_queue_logging():
+    """
+    Move the handlers of all configured loggers behind one queue and start the writer thread.
+    Call it again after a new fileConfig: previous listener is stopped first.
+
+    Returns:
+        RoutedQueueListener: the running listener.
+
+    """
+    global _listener
+    stop_queue_logging()
+
+    log_queue = queue.SimpleQueue()
+    routers = {}
+    for logger in _all_loggers():
+        if not logger.handlers:
+            continue
+        targets = tuple(logger.handlers)
+        # loggers sharing the same handlers share the same router
+        router = routers.get(targets)
+        if router is None:
+            router = routers[targets] = RoutedQueueHandler(log_queue, targets)
+        logger.handlers = [router]
+
+    _listener = RoutedQueueListener(log_queue)
+    _listener.start()
+    _listener._thread.name = 'log-writer'
+    return _listener
+
+
+def stop_queue_logging():
+    """
+    Write pending records, stop the writer thread and give back the real handlers to the loggers.
+
+    Returns:
+        None
+
+    """
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
+    for logger in _all_loggers():
+        if logger.handlers and all(isinstance(handler, RoutedQueueHandler) for handler in logger.handlers):
+            logger.handlers = [target for handler in logger.handlers for target in handler.targets]
+
+
+def queue_logging_active():
+    """ True if records are written by the writer thread """
+    return _listener is not None
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket: rate records per second, up to burst at once. WARNING and above always pass.
+    Suppressed records are counted, the count is added to the next record written.
+    """
+
+    def __init__(self, rate: float, burst: int = None):
+        """
+        Args:
+            rate (float): records per second, 0 to keep only WARNING and above.
+            burst (int, optional): max records at once. Defaults to rate (min 1).
+
+        """
+        super().__init__()
+        self.rate = max(0.0, rate)
+        self.burst = burst if burst is not None else max(1, int(rate))
+        self.tokens = float(self.burst)
+        self.suppressed = 0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self.tokens < 1:
+                self.suppressed += 1
+                return False
+            self.tokens -= 1
+            suppressed, self.suppressed = self.suppressed, 0
+        if suppressed:
+            record.msg = f'{record.msg} (+{suppressed} suppressed)'
+        return True
+
+
+def parse_rate_limits(text: str):
+    """
+    Parse 'logger:rate[:burst], ...'.
+
+    Returns:
+        dict: logger name: (rate, burst or None), bad entries are ignored (logged).
+
+    """
+    limits = {}
+    for item in (text or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            name, rate, *burst = item.split(':')
+            if len(burst) > 1:
+                raise ValueError(item)
+            limits[name.strip()] = (float(rate), int(burst[0]) if burst else None)
+        except ValueError:
+            logging.getLogger('WLEDLogger').warning(f'Bad log rate limit: {item}, expected logger:rate[:burst]')
+    return limits
+
+
+def apply_rate_limits(text: str):
+    """
+    Set (or replace) the rate limit filter of each logger in text, see parse_rate_limits.
+
+    Returns:
+        dict: logger name: RateLimitFilter.
+
+    """
+    filters = {}
+    for name, (rate, burst) in parse_rate_limits(text).items():
+        logger = logging.getLogger(name)
+        for old in [item for item in logger.filters if isinstance(item, RateLimitFilter)]:
+            logger.removeFilter(old)
+        filters[name] = RateLimitFilter(rate, burst)
+        logger.addFilter(filters[name])
+    return filters
+
+
+atexit.register(stop_queue_logging)
+
+
+if __name__ == "__main__":
+    import os
+    import statistics
+    import sys
+    import tempfile
+
+    try:
+        from concurrent_log_handler import ConcurrentRotatingFileHandler as FileHandler
+    except ImportError:
+        FileHandler = logging.FileHandler
+
+    CUES = 1000
+    PERIOD = 0.01
+
+    def cue_loop(logger):
+        """ 100 Hz loop, one INFO record per cue as set_carousel does, return log call times """
+        costs = []
+        start = time.perf_counter()
+        for index in range(CUES):
+            deadline = start + index * PERIOD
+            while time.perf_counter() < deadline:
+                time.sleep(0.0005)
+            begin = time.perf_counter()
+            logger.info(f'{index / 100:.2f} {"ABCDEFGHX"[index % 9]} {round(time.time() * 1000)}')
+            costs.append(time.perf_counter() - begin)
+        return costs
+
+    def summary(name, costs):
+        ordered = sorted(costs)
+        print(f'{name:24} mean {statistics.mean(costs) * 1000:7.3f} ms  '
+              f'p99 {ordered[int(len(ordered) * 0.99)] * 1000:7.3f} ms  max {ordered[-1] * 1000:7.3f} ms')
+
+    with tempfile.TemporaryDirectory() as folder:
+        handler = FileHandler(os.path.join(folder, 'bench.log'), encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(asctime)s [%(levelname)s] %(name)s : %(message)s'))
+        console = logging.StreamHandler(open(os.devnull, 'w'))
+        bench = logging.getLogger('WLEDLogger.cue')
+        bench.setLevel(logging.INFO)
+        bench.propagate = False
+        print(f'{CUES} cues at {1 / PERIOD:.0f} Hz, handler {FileHandler.__name__} + console, '
+              f'python {sys.version.split()[0]}')
+
+        bench.disabled = True
+        summary('logging off', cue_loop(bench))
+        bench.disabled = False
+
+        bench.handlers = [handler, console]
+        summary('direct', cue_loop(bench))
+
+        start_queue_logging()
+        summary('queued', cue_loop(bench))
+
+        apply_rate_limits('WLEDLogger.cue:5')
+        summary('queued + 5/s limit', cue_loop(bench))
+        stop_queue_logging()
+
+        handler.close()
+        console.stream.close()
@@ -0,0 +1,150 @@
+"""
+a: zak-45
+d: 17/10/2026
+v: 1.0.0
+
+Mouth model pre-rendered to LED matrix resolutions.
+
+WLEDVideoSync receive only the image number and scale the mouth image itself on every cast.
+Here each model image is rendered once per matrix size, ready to be pushed as is:
+    - decoded with cv2 (alpha kept), transparent parts become black (LED off)
+    - converted to linear light with gamma, so the area resize average the light and not the sRGB values
+    - resized with cv2.INTER_AREA (box filter, right choice for downscale)
+    - stored as packed RGB bytes, row major, top left first (width * height * 3 bytes)
+Output stays in linear light: LEDs are linear (PWM), this is the gamma correction.
+Use gamma = 1.0 if WLED already apply its own gamma correction.
+
+Rendered models are kept in memory (LRU), key is the model folder and the mtime of its images.
+
+"""
+import os
+
+import numpy as np
+
+from collections import OrderedDict
+
+from configmanager import ConfigManager
+from mouthassets import MOUTH_LETTERS, model_files
+
+cfg_mgr = ConfigManager(logger_name='WLEDLogger.utils')
+
+# width, height
+MATRIX_SIZES = ((16, 16), (32, 32), (64, 32))
+
+
+def parse_sizes(text: str):
+    """
+    Matrix sizes from config text.
+
+    Args:
+        text (str): comma separated WxH, e.g. '16x16,32x32,64x32'.
+
+    Returns:
+        tuple: (width, height) tuples, invalid entries are ignored.
+
+    """
+    sizes = []
+    for item in text.split(','):
+        try:
+            width, height = (int(value) for value in item.lower().strip().split('x'))
+        except ValueError:
+            if item.strip():
+                cfg_mgr.logger.warning(f'Invalid matrix size: {item}')
+            continue
+        if width > 0 and height > 0:
+            sizes.append((width, height))
+    return tuple(sizes)
+
+
+def render_image(img_path, sizes, gamma: float = 2.2):
+    """
+    Render one image for all matrix sizes.
+
+    Returns:
+        dict: (width, height): packed RGB bytes.
+
+    Raises:
+        ValueError: image not readable.
+
+    """
+    import cv2
+
+    img = cv2.imread(str(img_path), cv2.IMREAD_UNCHANGED)
+    if img is None:
+        raise ValueError(f'Could not open image {img_path}')
+    if img.ndim == 2:
+        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    # 16 bits png
+    scale = 65535.0 if img.dtype == np.uint16 else 255.0
+    pixels = img.astype(np.float32) / scale
+    rgb = np.power(cv2.cvtColor(pixels[:, :, :3], cv2.COLOR_BGR2RGB), gamma)
+    if pixels.shape[2] == 4:
+        rgb *= pixels[:, :, 3:4]
+    frames = {}
+    for width, height in sizes:
+        small = cv2.resize(rgb, (width, height), interpolation=cv2.INTER_AREA)
+        frames[(width, height)] = np.clip(small * 255.0 + 0.5, 0, 255).astype(np.uint8).tobytes()
+    return frames
+
+
+class MatrixRenderer:
+    """
+    Mouth model rendered to LED matrix sizes, packed RGB bytes per letter.
+
+    # Usage
+    renderer = MatrixRenderer(sizes=((16, 16), (64, 32)), gamma=2.2)
+    frames = renderer.render('./media/image/model/default')  # blocking, run it with run.io_bound
+    frames[(64, 32)][LipAPI.mouth_to_image['X']]  # 64 * 32 * 3 bytes
+
+    """
+
+    def __init__(self, sizes=MATRIX_SIZES, gamma: float = 2.2, max_models: int = 8):
+        """
+        Initializes the renderer.
+
+        Args:
+            sizes (tuple): (width, height) of target matrix. Defaults to MATRIX_SIZES.
+            gamma (float): LED gamma, 1.0 to disable. Defaults to 2.2.
+            max_models (int): number of rendered models kept in memory. Defaults to 8.
+
+        """
+        self.sizes = tuple(sizes)
+        self.gamma = gamma
+        self.max_models = max_models
+        self._models = OrderedDict()  # key: frames, most recently used last
+
+    def render(self, mouth_folder: str):
+        """
+        Rendered frames of a model, from memory or rendered now.
+
+        Args:
+            mouth_folder (str): model folder.
+
+        Returns:
+            dict: (width, height): list of packed RGB bytes, one per mouth letter (MOUTH_LETTERS order).
+
+        Raises:
+            ValueError: not a valid model (some mouth letters missing or not readable).
+            OSError: folder access error.
+
+        """
+        files = model_files(mouth_folder)
+        key = (os.path.abspath(mouth_folder), tuple(img_path.stat().st_mtime_ns for img_path in files),
+               self.sizes, self.gamma)
+        if key in self._models:
+            self._models.move_to_end(key)
+            return self._models[key]
+
+        rendered = [render_image(img_path, self.sizes, self.gamma) for img_path in files]
+        frames = {size: [image[size] for image in rendered] for size in self.sizes}
+
+        self._models[key] = frames
+        while len(self._models) > self.max_models:
+            self._models.popitem(last=False)
+        cfg_mgr.logger.debug(f'Mouth model {mouth_folder} rendered for {len(self.sizes)} matrix sizes, '
+                             f'{len(MOUTH_LETTERS)} letters')
+        return frames
+
+    def clear(self):
+        """ remove all rendered models """
+        self._models.clear()
@@ -0,0 +1,166 @@
+"""
+a: zak-45
+d: 17/10/2026
+v: 1.0.0
+
+Persistent cache for song metadata (YTMusic info / lyrics).
+
+Each song_info needs several sequential YTMusic calls (search artist, get_artist, search songs,
+get_watch_playlist per candidate, get_lyrics). Results are stored into a SQLite file, keyed by normalized
+artist / title, with a time to live. Not found songs are also stored (negative caching), with a shorter TTL,
+so a song without info does not query the network on each load either.
+
+One short lived connection per call: safe from any thread, nothing kept open.
+Expired entries are removed when the cache is opened. If the file can not be used (locked, corrupt,
+read-only folder), the error is logged and the cache does nothing: every lookup is a miss.
+
+"""
+import json
+import os
+import sqlite3
+import time
+import unicodedata
+
+from contextlib import contextmanager
+from configmanager import ConfigManager
+
+cfg_mgr = ConfigManager(logger_name='WLEDLogger.ytmusicapi')
+
+DAY = 24 * 3600
+
+
+def normalize(text: str):
+    """ cache key part: unicode normalized, case folded, single spaces """
+    return ' '.join(unicodedata.normalize('NFKC', str(text or '')).casefold().split())
+
+
+class MetadataCache:
+    """
+    Song metadata cache on disk (SQLite), with TTL and negative caching.
+
+    # Usage
+    cache = MetadataCache('./tmp/metadata_cache.sqlite', ttl_days=30, negative_ttl_hours=24)
+    key = cache.key('Century Lover', 'Why')
+    found, value = cache.get(key)
+    if not found:
+        value = ... network ...  # None if not found
+        cache.put(key, value)
+
+    """
+
+    def __init__(self, file_name: str = './tmp/metadata_cache.sqlite', ttl_days: float = 30,
+                 negative_ttl_hours: float = 24):
+        """
+        Initializes the cache, create the database if needed and remove expired entries.
+        On error, the cache is not available (logged), get() always miss and put() does nothing.
+
+        Args:
+            file_name (str): SQLite file. Defaults to './tmp/metadata_cache.sqlite'.
+            ttl_days (float): lifetime of found entries in days. Defaults to 30.
+            negative_ttl_hours (float): lifetime of not found entries in hours. Defaults to 24.
+
+        """
+        self.file_name = file_name
+        self.ttl = ttl_days * DAY
+        self.negative_ttl = negative_ttl_hours * 3600
+        self.available = False
+        try:
+            os.makedirs(os.path.dirname(file_name) or '.', exist_ok=True)
+            with self._connect() as db:
+                db.execute('CREATE TABLE IF NOT EXISTS metadata '
+                           '(key TEXT PRIMARY KEY, value TEXT, expires REAL NOT NULL)')
+        except (sqlite3.Error, OSError) as e:
+            cfg_mgr.logger.error(f'Metadata cache {file_name} not available, run without: {e}')
+            return
+        self.available = True
+        removed = self.purge()
+        if removed:
+            cfg_mgr.logger.debug(f'Metadata cache: {removed} expired entries removed')
+
+    @contextmanager
+    def _connect(self):
+        """ connection committed on success, always closed """
+        db = sqlite3.connect(self.file_name, timeout=5)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def key(artist: str, title: str):
+        """
+        Cache key of a song.
+
+        Returns:
+            str: normalized 'artist / title'.
+
+        """
+        return f'{normalize(artist)} / {normalize(title)}'
+
+    def get(self, key: str):
+        """
+        Read an entry, expired entries are ignored.
+
+        Returns:
+            tuple: (found, value), value is None for a negative entry.
+
+        """
+        if not self.available:
+            return False, None
+        try:
+            with self._connect() as db:
+                row = db.execute('SELECT value, expires FROM metadata WHERE key = ?', (key,)).fetchone()
+        except sqlite3.Error as e:
+            cfg_mgr.logger.warning(f'Metadata cache read error: {e}')
+            return False, None
+        if row is None or row[1] < time.time():
+            return False, None
+        return True, json.loads(row[0]) if row[0] is not None else None
+
+    def put(self, key: str, value):
+        """
+        Write an entry, None is stored as negative (not found) entry with the negative TTL.
+
+        Args:
+            key (str): see key().
+            value (dict or None): JSON serializable data.
+
+        Returns:
+            None
+
+        """
+        if not self.available:
+            return
+        expires = time.time() + (self.ttl if value is not None else self.negative_ttl)
+        data = json.dumps(value) if value is not None else None
+        try:
+            with self._connect() as db:
+                db.execute('INSERT OR REPLACE INTO metadata (key, value, expires) VALUES (?, ?, ?)',
+                           (key, data, expires))
+        except sqlite3.Error as e:
+            cfg_mgr.logger.warning(f'Metadata cache write error: {e}')
+
+    def purge(self):
+        """
+        Remove expired entries.
+
+        Returns:
+            int: number of removed entries.
+
+        """
+        if not self.available:
+            return 0
+        try:
+            with self._connect() as db:
+                return db.execute('DELETE FROM metadata WHERE expires < ?', (time.time(),)).rowcount
+        except sqlite3.Error as e:
+            cfg_mgr.logger.warning(f'Metadata cache purge error: {e}')
+            return 0
+
+    def clear(self):
+        """ remove all entries """
+        if not self.available:
+            return
+        with self._connect() as db:
+            db.execute('DELETE FROM metadata')
@@ -0,0 +1,260 @@
+"""
+a: zak-45
+d: 17/10/2026
+v: 1.0.0
+
+Pre-encoded mouth model images.
+
+Each model image (A.png ... X.png, file name is the mouth letter) is decoded (cv2, alpha kept)
+and encoded once into three sizes:
+    full     : original size
+    preview  : 640x360, used by the carousel
+    thumb    : thumbnail width, used by letter dialog and central label
+Files are written into <cache_folder>/<key>/ with a manifest.json, key is a hash of the model folder path
+and its mtime (+ newest image mtime), so any change into the model folder gives a new key.
+The model folder path is also saved into <key>/source.txt: when a new key is built, previous keys of the same
+model folder are removed, the cache keeps one version per model.
+Cache folder is served as static files (ETag / Last-Modified / 304 by the static route), browser cache them
+and NiceGUI has nothing to re-encode on page load.
+Recently used models are also kept in memory (LRU), switching back to one of them does not read any file.
+
+"""
+import hashlib
+import json
+import os
+import shutil
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from configmanager import ConfigManager
+
+cfg_mgr = ConfigManager(logger_name='WLEDLogger.utils')
+
+# cv2 and PIL are imported in the functions using them, nothing heavy loaded at startup
+
+SUPPORTED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tiff')
+
+PREVIEW_SIZE = (640, 360)
+
+# into each key folder, absolute path of the model folder it comes from
+SOURCE_FILE = 'source.txt'
+
+# mouth shapes, in image index order (see LipAPI.mouth_to_image)
+MOUTH_LETTERS = ('A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'X')
+
+
+def model_files(mouth_folder: str):
+    """
+    Map model image files to mouth letters, file name (without extension) is the letter.
+
+    Returns:
+        list: Path of each image, in MOUTH_LETTERS order.
+
+    Raises:
+        ValueError: some mouth letters have no image.
+
+    """
+    files = {}
+    for img_path in sorted(Path(mouth_folder).iterdir()):
+        if img_path.suffix.lower() in SUPPORTED_EXTENSIONS and img_path.is_file():
+            letter = img_path.stem.upper()
+            if letter in MOUTH_LETTERS and letter not in files:
+                files[letter] = img_path
+    missing = [letter for letter in MOUTH_LETTERS if letter not in files]
+    if missing:
+        raise ValueError(f'Mouth model {mouth_folder}: no image for {", ".join(missing)}')
+    return [files[letter] for letter in MOUTH_LETTERS]
+
+
+def decode_image(img_path):
+    """
+    Read an image with cv2, alpha channel is preserved.
+
+    Returns:
+        Image: PIL image RGB or RGBA, None if not readable.
+
+    """
+    import cv2
+    from PIL import Image
+
+    img = cv2.imread(str(img_path), cv2.IMREAD_UNCHANGED)
+    if img is None:
+        return None
+    if img.ndim == 2:
+        return Image.fromarray(img).convert('RGB')
+    if img.shape[2] == 4:
+        return Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGRA2RGBA))
+    return Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+
+
+class MouthAssetCache:
+    """
+    Encoded mouth images, one folder per model version.
+
+    # Usage
+    cache = MouthAssetCache('./tmp/model_cache/', '/model_cache')
+    app.add_static_files('/model_cache', './tmp/model_cache/')
+    assets = cache.get('./media/image/model/default')  # blocking, run it with run.io_bound
+    assets[0]['preview']  # url of letter A, e.g. /model_cache/3f2a.../0_preview.webp
+
+    """
+
+    def __init__(self, folder: str = './tmp/model_cache/', url: str = '/model_cache', thumbnail_width: int = 64,
+                 max_models: int = 8):
+        """
+        Initializes the cache, create the folder if needed.
+
+        Args:
+            folder (str): where encoded images are stored. Defaults to './tmp/model_cache/'.
+            url (str): static route of folder. Defaults to '/model_cache'.
+            thumbnail_width (int): thumbnail width, height keep aspect ratio. Defaults to 64.
+            max_models (int): number of models kept in memory. Defaults to 8.
+
+        """
+        self.folder = folder
+        self.url = url
+        self.thumbnail_width = thumbnail_width
+        self.max_models = max_models
+        self._image_format = None
+        self._models = OrderedDict()  # key: assets, most recently used last
+        os.makedirs(self.folder, exist_ok=True)
+
+    @property
+    def image_format(self):
+        """ webp if PIL support it, png otherwise, checked on first use """
+        if self._image_format is None:
+            from PIL import features
+
+            self._image_format = 'webp' if features.check('webp') else 'png'
+        return self._image_format
+
+    def key(self, mouth_folder: str):
+        """
+        Cache key of a model folder, change with folder content.
+
+        Returns:
+            str: hex digest
+
+        Raises:
+            ValueError: some mouth letters have no image.
+
+        """
+        images = model_files(mouth_folder)
+        newest = max((img_path.stat().st_mtime_ns for img_path in images), default=0)
+        digest = hashlib.sha1()
+        for part in (os.path.abspath(mouth_folder), os.stat(mouth_folder).st_mtime_ns, newest,
+                     self.thumbnail_width, self.image_format):
+            digest.update(str(part).encode())
+            digest.update(b'\0')
+        return digest.hexdigest()[:16]
+
+    def get(self, mouth_folder: str):
+        """
+        Encoded images of a model: from memory, from disk cache, or build them.
+
+        Args:
+            mouth_folder (str): model folder.
+
+        Returns:
+            list: one dict per mouth letter (MOUTH_LETTERS order), letter, name, width, height
+            and full / preview / thumb urls.
+
+        Raises:
+            ValueError: not a valid model (some mouth letters missing or not readable).
+            OSError: folder access error.
+
+        """
+        key = self.key(mouth_folder)
+        if key in self._models:
+            self._models.move_to_end(key)
+            return self._models[key]
+
+        assets = None
+        manifest = os.path.join(self.folder, key, 'manifest.json')
+        if os.path.isfile(manifest):
+            try:
+                with open(manifest, 'r', encoding='utf-8') as data:
+                    assets = json.load(data)
+            except (OSError, json.JSONDecodeError) as e:
+                cfg_mgr.logger.warning(f'Mouth model cache manifest unreadable, rebuild: {e}')
+        if assets is None:
+            assets = self._build(mouth_folder, key)
+
+        self._models[key] = assets
+        while len(self._models) > self.max_models:
+            self._models.popitem(last=False)
+        return assets
+
+    def _encode(self, image, file_name):
+        if self.image_format == 'webp':
+            image.save(file_name, format='WEBP', quality=90, method=4)
+        else:
+            image.save(file_name, format='PNG', optimize=True)
+
+    def _encode_all(self, index, img_path, image, temp, key):
+        """ encode the three sizes of one image, return its manifest entry """
+        ext = self.image_format
+        width, height = image.size
+        thumb_height = max(1, int(self.thumbnail_width * height / width))
+        self._encode(image, os.path.join(temp, f'{index}_full.{ext}'))
+        self._encode(image.resize(PREVIEW_SIZE), os.path.join(temp, f'{index}_preview.{ext}'))
+        self._encode(image.resize((self.thumbnail_width, thumb_height)), os.path.join(temp, f'{index}_thumb.{ext}'))
+        return {"letter": MOUTH_LETTERS[index],
+                "name": img_path.name,
+                "width": width,
+                "height": height,
+                "full": f'{self.url}/{key}/{index}_full.{ext}',
+                "preview": f'{self.url}/{key}/{index}_preview.{ext}',
+                "thumb": f'{self.url}/{key}/{index}_thumb.{ext}'}
+
+    def _build(self, mouth_folder: str, key: str):
+        files = model_files(mouth_folder)
+        # decode in parallel, cv2 release the GIL
+        with ThreadPoolExecutor(max_workers=min(len(files), os.cpu_count() or 1)) as pool:
+            images = list(pool.map(decode_image, files))
+        unreadable = [img_path.name for img_path, image in zip(files, images) if image is None]
+        if unreadable:
+            raise ValueError(f'Mouth model {mouth_folder}: could not open {", ".join(unreadable)}')
+
+        target = os.path.join(self.folder, key)
+        # build into temp folder then rename, a partial model is never served
+        temp = target + '.tmp'
+        shutil.rmtree(temp, ignore_errors=True)
+        os.makedirs(temp)
+        with ThreadPoolExecutor(max_workers=min(len(files), os.cpu_count() or 1)) as pool:
+            jobs = [pool.submit(self._encode_all, index, img_path, image, temp, key)
+                    for index, (img_path, image) in enumerate(zip(files, images))]
+            assets = [job.result() for job in jobs]
+        with open(os.path.join(temp, 'manifest.json'), 'w', encoding='utf-8') as manifest:
+            json.dump(assets, manifest, indent=2)
+        with open(os.path.join(temp, SOURCE_FILE), 'w', encoding='utf-8') as source:
+            source.write(os.path.abspath(mouth_folder))
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(temp, target)
+        cfg_mgr.logger.debug(f'Mouth model {mouth_folder} encoded into cache {key}')
+        self._remove_previous(mouth_folder, key)
+        return assets
+
+    def _remove_previous(self, mouth_folder: str, key: str):
+        """ remove the other keys of mouth_folder (older versions of the model), from disk and memory """
+        source_path = os.path.abspath(mouth_folder)
+        for item in os.listdir(self.folder):
+            if item == key:
+                continue
+            try:
+                with open(os.path.join(self.folder, item, SOURCE_FILE), 'r', encoding='utf-8') as source:
+                    if source.read() != source_path:
+                        continue
+            except OSError:
+                continue
+            self._models.pop(item, None)
+            shutil.rmtree(os.path.join(self.folder, item), ignore_errors=True)
+            cfg_mgr.logger.debug(f'Mouth model {mouth_folder} previous cache {item} removed')
+
+    def clear(self):
+        """ remove all cached models """
+        self._models.clear()
+        for item in os.listdir(self.folder):
+            shutil.rmtree(os.path.join(self.folder, item), ignore_errors=True)
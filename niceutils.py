@@ -6,18 +6,18 @@ v: 1.0.0.0
 Nice Utilities for WLEDLipSync
 
 """
+import json
 import sys
-import taglib
 
-from cv2utils import VideoThumbnailExtractor
 from nicegui import ui, events
-from PIL import Image
 from pathlib import Path
 from typing import Optional
 from configmanager import ConfigManager
 
 cfg_mgr = ConfigManager(logger_name='WLEDLogger.niceutils')
 
+# taglib, cv2 (cv2utils) and PIL are imported in the functions using them, faster startup
+
 async def show_tags(file):
     """
     Asynchronously displays the tags of an audio file in a user interface dialog.
@@ -29,6 +29,7 @@ async def show_tags(file):
     Returns:
         None
     """
+    import taglib
 
     with taglib.File(file) as song:
         with ui.dialog() as tags_dialog, ui.card():
@@ -117,12 +118,29 @@ async def get_player_time():
     )
 
 
-async def run_gencuedata():
+def render_cues(mouth_cues, selected=(), changed=()):
     """
-    execute javascript function to generate
-    data when click on waveform for focus on the mouth card
+    run java to render the mouth cards,
+    cues are sent once as compact json: [[start, letter], ...], the browser keeps them
+    and renders only a window of cards (see show_cue)
     """
-    await ui.run_javascript('genCueData();', timeout=5)
+    payload = json.dumps({"cues": [[cue['start'], cue['value']] for cue in mouth_cues],
+                          "selected": list(selected),
+                          "changed": list(changed)},
+                         separators=(',', ':'))
+    ui.run_javascript(f'renderCues({payload});', timeout=5)
+
+
+def update_cue(start, letter):
+    """ run java to set the new letter of the mouth card at start """
+
+    ui.run_javascript(f'updateCue({json.dumps(start)},{json.dumps(letter)});', timeout=5)
+
+
+def show_cue(index):
+    """ run java to move the cue strip window to the mouth card at index and scroll to it """
+
+    ui.run_javascript(f'showCue({int(index)});', timeout=5)
 
 
 def close_app():
@@ -468,6 +486,9 @@ class LocalFilePicker(ui.dialog):
                 with ui.card().classes('w-full'):
                     row = await self.grid.get_selected_row()
                     if row is not None:
+                        from cv2utils import VideoThumbnailExtractor
+                        from PIL import Image
+
                         extractor = VideoThumbnailExtractor(row['path'])
                         await extractor.extract_thumbnails(times_in_seconds=[5])  # Extract thumbnail at 5 seconds
                         thumbnails_frame = extractor.get_thumbnails()
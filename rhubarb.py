@@ -1,15 +1,90 @@
 
 import subprocess
+import tempfile
 import json
+import wave
+import re
+import numpy as np
 
 from threading import Thread
-from utils import rhubarb_exe_name
+from concurrent.futures import ThreadPoolExecutor
+from coreutils import rhubarb_exe_name
+from audiostore import AudioStore
 from typing import Literal
 from os import getcwd, path
 from configmanager import ConfigManager
 
 cfg_mgr = ConfigManager(logger_name='WLEDLogger.rhubarb')
 
+def silence_split_points(samples, rate, parts, search: float = 5.0, window: float = 0.01):
+    """
+    Find where to split an audio track into parts of about the same length, without cutting a word.
+    Each split is put at the quietest window (lowest RMS) around the ideal position.
+
+    Args:
+        samples (np.ndarray): mono samples.
+        rate (int): sample rate.
+        parts (int): number of parts wanted.
+        search (float): search radius in seconds around the ideal position. Defaults to 5.0.
+        window (float): RMS window in seconds. Defaults to 0.01.
+
+    Returns:
+        list: split positions (sample index), ascending, without 0 and len(samples).
+
+    """
+    step = max(1, int(rate * window))
+    count = len(samples) // step
+    if parts < 2 or count < 2:
+        return []
+    blocks = samples[:count * step].astype(np.float32).reshape(count, step)
+    energy = np.sqrt(np.mean(blocks * blocks, axis=1))
+    radius = max(1, int(search / window))
+    points = []
+    for part in range(1, parts):
+        ideal = count * part // parts
+        low, high = max(1, ideal - radius), min(count - 1, ideal + radius)
+        if points:
+            low = max(low, points[-1] // step + 1)
+        if low >= high:
+            continue
+        quietest = low + int(np.argmin(energy[low:high]))
+        points.append(quietest * step + step // 2)
+    return points
+
+
+def merge_mouth_cues(segments):
+    """
+    Merge the mouth cues of consecutive segments into one list.
+    Cue times are shifted by the segment offset, boundaries are stitched (no gap, no overlap)
+    and same shapes on both sides of a boundary are joined into one cue.
+
+    Args:
+        segments (list): (offset in seconds, mouthCues list) for each segment, in time order.
+
+    Returns:
+        list: mouthCues
+
+    """
+    merged = []
+    for offset, cues in segments:
+        for cue in cues:
+            start = round(cue['start'] + offset, 2)
+            end = round(cue['end'] + offset, 2)
+            if merged:
+                previous = merged[-1]
+                start = max(start, previous['start'])
+                previous['end'] = start
+                if previous['value'] == cue['value'] or previous['end'] <= previous['start']:
+                    # join same shape, or drop the empty previous one
+                    if previous['value'] != cue['value']:
+                        previous['value'] = cue['value']
+                    previous['end'] = max(end, start)
+                    continue
+            if end > start:
+                merged.append({"start": start, "end": end, "value": cue['value']})
+    return merged
+
+
 class RhubarbWrapper:
     """
     Wrapper class for the Rhubarb speech recognition tool, facilitating the execution of commands and handling output.
@@ -30,6 +105,12 @@ class RhubarbWrapper:
         output_file (str): The path for the output file.
         command (list): The command to be executed.
         return_code (int): The return code from the executed command.
+        cache (AnalysisCache): Optional analysis cache, consulted before running Rhubarb.
+        cache_key (str): Cache key of the actual analysis.
+        workers (int): Number of Rhubarb processes run in parallel on WAV segments, 1 to disable split.
+            Segments are analysed without the dialog (lyrics) file: it holds the text of the whole song,
+            aligned against a few seconds of audio it would mislead recognition.
+        min_segment (float): Minimum segment duration in seconds, short files are not split.
 
     Methods:
         __init__: Initializes the RhubarbWrapper with specified parameters.
@@ -39,6 +120,9 @@ class RhubarbWrapper:
         _read_output: Reads output from the subprocess and handles it.
         _handle_output: Processes a line of output, attempting to parse it as JSON.
         _wait_for_process: Waits for the subprocess to complete and updates the instance state.
+        version: Retrieves the Rhubarb version from the executable path.
+        _run_parallel: Splits the WAV at silences, runs Rhubarb on segments in parallel and merges the cues.
+        _run_segments: Parallel run on the memory mapped WAV.
         run: Starts the execution of the Rhubarb process with the specified files.
 
     """
@@ -52,7 +136,9 @@ class RhubarbWrapper:
                  recognizer: Literal['pocketSphinx', 'phonetic'] = 'pocketSphinx',
                  machineReadable: bool = True,
                  callback=None,
-                 working_directory: str = getcwd()):
+                 working_directory: str = getcwd(),
+                 cache=None,
+                 workers: int = 1):
         """
         Initializes a new instance of the RhubarbWrapper class with specified configuration options.
         This constructor sets up the necessary parameters for processing audio files and managing output formats.
@@ -65,6 +151,9 @@ class RhubarbWrapper:
             callback (callable, optional): A callback function to handle output data. Defaults to None.
             working_directory (str): The directory where the process will operate.
             Defaults to the current working directory.
+            cache (AnalysisCache, optional): result cache, a hit avoids to run Rhubarb. Defaults to None.
+            workers (int): split the WAV and run this number of Rhubarb processes in parallel (json export only).
+            Defaults to 1 (no split).
 
         Returns:
             None
@@ -84,6 +173,10 @@ class RhubarbWrapper:
         self.output_file = output_file + self.file_extension
         self.command = []
         self.return_code = 0
+        self.cache = cache
+        self.cache_key = ''
+        self.workers = workers
+        self.min_segment = 20.0
 
     def _validate_export_format(self):
         """
@@ -121,34 +214,195 @@ class RhubarbWrapper:
         Constructs and executes a command in a subprocess to run the Rhubarb speech recognition tool.
         This method builds the command with the necessary parameters and starts the subprocess,
         handling output and process completion in separate threads.
+        If a cache is set and the same analysis has already been done, the result is restored from it
+        and no process is started.
+        On any error (executable not runnable, missing file ...) the instance is no more running,
+        return code stay 999.
 
         Returns:
             None
 
         """
+        try:
+            if self._restore_from_cache():
+                return
+
+            if self._split_mode() and self._run_parallel():
+                return
+
+            command = self._build_command(self.input_file, self.output_file)
+            self.command = command
+            # Run the command in a separate process
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                       cwd=self.working_directory)
+        except Exception as e:
+            cfg_mgr.logger.error(f"Unable to run rhubarb on {self.input_file}: {e}")
+            self.return_code = 999
+            self._instance_running = False
+            return
 
-        command = [RhubarbWrapper._exe_name, self.input_file]
+        # Start threads to read stdout and stderr
+        Thread(target=self._read_output, args=(process.stdout, False)).start()
+        Thread(target=self._read_output, args=(process.stderr, True)).start()
+
+        # Wait for the process to complete in a separate thread
+        Thread(target=self._wait_for_process, args=(process,)).start()
+
+    def _build_command(self, input_file, output_file, dialog: bool = True):
+        """
+        Constructs the Rhubarb command line for one input file.
+
+        Args:
+            input_file (str): WAV file.
+            output_file (str): result file.
+            dialog (bool): add the dialog (lyrics) file if any. Defaults to True.
+
+        Returns:
+            list: command and arguments
+
+        """
+        command = [RhubarbWrapper._exe_name, input_file]
 
         # Add arguments to the command
         if self.machineReadable:
             command.extend(['--machineReadable'])
         command.extend([f'-r {self.recognizer}', f'-f {self.export_format}'])
-        if path.isfile(self.lyrics_file):
+        if dialog and path.isfile(self.lyrics_file):
             command.extend([f'-d {self.lyrics_file}'])
         command.extend(
-            [f'--consoleLevel {self.consoleLevel}', f'-o {self.output_file}']
+            [f'--consoleLevel {self.consoleLevel}', f'-o {output_file}']
         )
-        self.command = command
-        # Run the command in a separate process
-        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
-                                   cwd=self.working_directory)
+        return command
 
-        # Start threads to read stdout and stderr
-        Thread(target=self._read_output, args=(process.stdout, False)).start()
-        Thread(target=self._read_output, args=(process.stderr, True)).start()
+    def _split_mode(self):
+        """ True if the analysis can be split into parallel segments, merge only available for json """
+        return self.workers > 1 and self.export_format == 'json'
 
-        # Wait for the process to complete in a separate thread
-        Thread(target=self._wait_for_process, args=(process,)).start()
+    def _split_parts(self, duration):
+        """ number of segments for this duration, less than 2: no split """
+        return min(self.workers, int(duration // self.min_segment))
+
+    def _planned_parts(self):
+        """
+        Number of segments the input will be split into, read from the WAV header only.
+
+        Returns:
+            int: 1 if the analysis runs as one (no split mode, short or not 16-bit file ...).
+
+        """
+        if not self._split_mode():
+            return 1
+        try:
+            with AudioStore(path.join(self.working_directory, self.input_file)) as store:
+                if store.dtype != np.int16:
+                    return 1
+                return max(1, self._split_parts(store.duration))
+        except (OSError, ValueError):
+            return 1
+
+    def _run_parallel(self):
+        """
+        Splits the input WAV at silence boundaries, runs one Rhubarb process per segment in parallel
+        and merges the mouth cues with their time offset into the output file.
+        Combined progress (weighted by segment duration) is sent to the callback.
+
+        Returns:
+            bool: False if the file can not be split (too short, not 16-bit PCM ...), nothing has been done.
+
+        """
+        input_file = path.join(self.working_directory, self.input_file)
+        try:
+            store = AudioStore(input_file)
+        except (OSError, ValueError) as e:
+            cfg_mgr.logger.warning(f"Unable to split {self.input_file}, run as one: {e}")
+            return False
+
+        with store:
+            if store.dtype != np.int16:
+                return False
+            return self._run_segments(store)
+
+    def _run_segments(self, store):
+        """
+        Parallel run on the memory mapped input, see _run_parallel.
+
+        Returns:
+            bool: False if the file is too short to be split.
+
+        """
+        # zero copy view on the wav data
+        frames = store.samples
+        duration = store.duration
+        parts = self._split_parts(duration)
+        if parts < 2:
+            return False
+
+        points = [0] + silence_split_points(store.mono(), store.rate, parts) + [len(frames)]
+        cfg_mgr.logger.info(f"Split {self.input_file} into {len(points) - 1} segments at "
+                            f"{[round(point / store.rate, 2) for point in points[1:-1]]}")
+
+        self.command = self._build_command(self.input_file, self.output_file, dialog=False) + \
+            [f'(split {len(points) - 1})']
+        progress = [0.0] * (len(points) - 1)
+        weights = [(end - begin) / len(frames) for begin, end in zip(points, points[1:])]
+
+        def run_segment(index, segment_file, output_file):
+            # the dialog file is for the whole song, not used on a segment
+            command = self._build_command(segment_file, output_file, dialog=False)
+            process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+                                       cwd=self.working_directory)
+            for line in iter(process.stderr.readline, ''):
+                try:
+                    data = json.loads(line.strip())
+                except json.JSONDecodeError:
+                    cfg_mgr.logger.info(f"msg: {line.strip()}")
+                    continue
+                if 'value' in data:
+                    progress[index] = data['value']
+                    if self.callback is not None:
+                        # 100% is only sent once merged
+                        combined = min(0.99, sum(value * weight for value, weight in zip(progress, weights)))
+                        self.callback({"type": "progress", "value": combined}, True)
+            process.stderr.close()
+            return process.wait()
+
+        with tempfile.TemporaryDirectory(prefix='rhubarb_') as temp_folder:
+            segments = []
+            for index, (begin, end) in enumerate(zip(points, points[1:])):
+                segment_file = path.join(temp_folder, f'segment_{index}.wav')
+                with wave.open(segment_file, 'wb') as segment:
+                    segment.setnchannels(store.channels)
+                    segment.setsampwidth(store.dtype.itemsize)
+                    segment.setframerate(store.rate)
+                    segment.writeframes(frames[begin:end].tobytes())
+                segments.append((index, segment_file, path.join(temp_folder, f'segment_{index}.json')))
+
+            with ThreadPoolExecutor(max_workers=len(segments)) as pool:
+                return_codes = list(pool.map(lambda item: run_segment(*item), segments))
+
+            return_code = next((code for code in return_codes if code != 0), 0)
+            if return_code == 0:
+                try:
+                    cues = []
+                    for (_, _, output_file), begin in zip(segments, points):
+                        with open(output_file, 'r', encoding='utf-8') as result:
+                            cues.append((begin / store.rate, json.load(result)['mouthCues']))
+                    data = {"metadata": {"soundFile": self.input_file, "duration": f'{duration:.2f}'},
+                            "mouthCues": merge_mouth_cues(cues)}
+                    with open(path.join(self.working_directory, self.output_file), 'w', encoding='utf-8') as out:
+                        json.dump(data, out, indent=2)
+                except (OSError, KeyError, json.JSONDecodeError) as e:
+                    cfg_mgr.logger.error(f"Error merging segments: {e}")
+                    return_code = 998
+
+        if return_code == 0 and self.cache is not None and self.cache_key:
+            self.cache.store(self.cache_key, path.join(self.working_directory, self.output_file))
+        self._instance_running = False
+        self.return_code = return_code
+        cfg_mgr.logger.info(f"Return code: {self.return_code} {self.command}")
+        if return_code == 0 and self.callback is not None:
+            self.callback({"type": "progress", "value": 1.0}, True)
+        return True
 
     def is_running(self):
         """Check if the instance is currently running.
@@ -218,10 +472,59 @@ class RhubarbWrapper:
         """
 
         process.wait()
+        if process.returncode == 0 and self.cache is not None and self.cache_key:
+            self.cache.store(self.cache_key, path.join(self.working_directory, self.output_file))
         self._instance_running = False
         self.return_code = process.returncode
         cfg_mgr.logger.info(f"Return code: {self.return_code} {self.command}")
 
+    def _restore_from_cache(self):
+        """
+        Compute the cache key of the actual analysis and restore the result if already done.
+        On hit, progress 100% is sent to the callback, as Rhubarb would do.
+
+        Returns:
+            bool: True if the result has been restored from cache.
+
+        """
+        self.cache_key = ''
+        if self.cache is None:
+            return False
+        try:
+            # suffix only when the file is really split: same result as a single run otherwise
+            parts = self._planned_parts()
+            self.cache_key = self.cache.key(path.join(self.working_directory, self.input_file),
+                                            self.recognizer,
+                                            path.join(self.working_directory, self.lyrics_file)
+                                            if self.lyrics_file else '',
+                                            self.version() + (f'-split{parts}' if parts > 1 else ''),
+                                            self.export_format)
+        except OSError as e:
+            cfg_mgr.logger.error(f"Error computing cache key: {e}")
+            return False
+        if not self.cache.restore(self.cache_key, path.join(self.working_directory, self.output_file)):
+            return False
+        self.command = []
+        self.return_code = 0
+        self._instance_running = False
+        if self.callback is not None:
+            self.callback({"type": "progress", "value": 1.0}, True)
+        cfg_mgr.logger.info(f"Return code: {self.return_code} (cache) {self.output_file}")
+        return True
+
+    @staticmethod
+    def version():
+        """
+        Retrieves the Rhubarb version, taken from the executable folder name (e.g. Rhubarb-Lip-Sync-1.13.0-Linux).
+
+        Returns:
+            str: version, or executable name if not found.
+
+        """
+        exe_name = RhubarbWrapper._exe_name or ''
+        found = re.search(r'Rhubarb-Lip-Sync-([\d.]+)', exe_name)
+        return found[1] if found else exe_name
+
     def run(self, file_name, dialog_file, output):
         """
         Starts the execution of the Rhubarb speech recognition process with the specified input and output files.
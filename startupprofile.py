@@ -0,0 +1,114 @@
+"""
+a: zak-45
+d: 17/10/2026
+v: 1.0.0
+
+Startup profiling (--profile-startup).
+
+Each first import of a module is timed, by wrapping builtins.__import__:
+    cumulative  : module code + all modules it imports for the first time
+    self        : module code only (module level init: ConfigManager, class attributes ...)
+Other init steps (singletons) are timed with measure().
+Only the main thread is timed, only stdlib is used, so it can be enabled before any other import.
+
+    startup_profiler = StartupProfiler(enabled='--profile-startup' in sys.argv)
+    import nicegui
+    with startup_profiler.measure('RhubarbWrapper'):
+        rub = RhubarbWrapper()
+    startup_profiler.report()
+
+"""
+import builtins
+import sys
+import threading
+
+from contextlib import contextmanager
+from time import perf_counter
+
+
+class StartupProfiler:
+    """
+    Import and init time per module, printed by report().
+
+    Attributes:
+        enabled (bool): profiling active, nothing is recorded otherwise.
+        imports (dict): module name: (cumulative, self) time in seconds.
+        inits (dict): step name: time in seconds.
+
+    """
+
+    def __init__(self, enabled: bool = False):
+        """
+        Initializes the profiler, start timing imports if enabled.
+
+        Args:
+            enabled (bool): profiling active. Defaults to False.
+
+        """
+        self.enabled = enabled
+        self.imports = {}
+        self.inits = {}
+        self._children = []  # time of nested imports, one entry per import in progress
+        self._imports_total = 0.0  # outermost imports only
+        self._start = perf_counter()
+        self._thread = threading.get_ident()
+        self._import = builtins.__import__
+        if enabled:
+            builtins.__import__ = self._timed_import
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # relative, already imported or from another thread: nothing to time
+        if level or name in sys.modules or threading.get_ident() != self._thread:
+            return self._import(name, globals, locals, fromlist, level)
+        self._children.append(0.0)
+        start = perf_counter()
+        try:
+            return self._import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = perf_counter() - start
+            children = self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+            else:
+                self._imports_total += elapsed
+            self.imports.setdefault(name, (elapsed, elapsed - children))
+
+    @contextmanager
+    def measure(self, name: str):
+        """ time an init step """
+        if not self.enabled:
+            yield
+            return
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.inits[name] = self.inits.get(name, 0.0) + perf_counter() - start
+
+    def stop(self):
+        """ stop timing imports """
+        if builtins.__import__ == self._timed_import:
+            builtins.__import__ = self._import
+
+    def report(self, top: int = 30, file=None):
+        """
+        Print the slowest imports (by self time) and all init steps, in ms.
+
+        Args:
+            top (int): number of imports printed. Defaults to 30.
+            file: output stream. Defaults to sys.stdout.
+
+        """
+        self.stop()
+        file = file or sys.stdout
+        total = perf_counter() - self._start
+        print(f'Startup: {total * 1000:.0f} ms, imports {self._imports_total * 1000:.0f} ms, '
+              f'{len(self.imports)} modules', file=file)
+        print(f"\n{'module':40} {'self ms':>10} {'cumul. ms':>10}", file=file)
+        ranked = sorted(self.imports.items(), key=lambda item: item[1][1], reverse=True)
+        for name, (cumulative, own) in ranked[:top]:
+            print(f'{name:40} {own * 1000:>10.1f} {cumulative * 1000:>10.1f}', file=file)
+        if self.inits:
+            print(f"\n{'init':40} {'ms':>10}", file=file)
+            for name, elapsed in sorted(self.inits.items(), key=lambda item: item[1], reverse=True):
+                print(f'{name:40} {elapsed * 1000:>10.1f}', file=file)
@@ -7,143 +7,29 @@ Utilities for WLEDLipSync
 
 """
 import asyncio
-import av
 import base64
 import io
 import os
-import logging
-import logging.config
-import concurrent_log_handler
-import cfg_load as cfg
 import contextlib
 import ipaddress
 import re
 import socket
 import traceback
-import cv2
 import time
 import json
 import subprocess
 import sys
 import sysconfig
 
-import requests
 import zipfile
+# heavy modules (cv2, PIL, requests, tkinter) are imported in the functions using them, faster startup
 
-import tkinter as tk
-
-from str2bool import str2bool
-from PIL import Image
 from nicegui import ui, run
 from pathlib import Path
-
-def display_custom_msg(msg, msg_type: str = 'info'):
-    """
-    Displays a custom message using an external info window executable across different platforms.
-    Launches a separate process to show an error or informational message in a platform-specific manner.
-
-    Args:
-        msg (str): The message text to be displayed.
-        msg_type (str, optional): The type of message, defaults to 'info'.
-        Can specify message type like 'info' or 'error'.
-
-    Examples:
-        >> display_custom_msg("Operation completed successfully")
-        >> display_custom_msg("Error occurred", msg_type='error')
-
-    """
-    # Call the separate script to show the error/info message in a Tkinter window
-    absolute_file_name = Path(info_window_exe_name()).resolve()
-    if sys.platform.lower() == "win32":
-        command = [absolute_file_name, msg, msg_type]
-    else:
-        command = ['nohup', absolute_file_name, msg, msg_type, '&']
-
-    subprocess.Popen(command)
-
-
-def info_window_exe_name():
-    """
-    Determines the appropriate executable name for displaying information windows based on the current operating system.
-    Returns the platform-specific executable path for the info window utility.
-
-    Returns:
-        str: The filename of the info window executable for the current platform.
-        Returns None if the platform is not recognized.
-
-    Examples:
-        >> info_window_exe_name()
-        'xtra/info_window.exe'  # On Windows
-        >> info_window_exe_name()
-        'xtra/info_window.bin'  # On Linux
-
-    """
-    if sys.platform.lower() == 'win32':
-        return 'xtra/info_window.exe'
-    elif sys.platform.lower() == 'linux':
-        return 'xtra/info_window.bin'
-    elif sys.platform.lower() == 'darwin':
-        return 'xtra/info_window.app'
-    else:
-        return None
-
-
-class CustomLogger(logging.Logger):
-    """
-    A custom logging class that extends the standard Python Logger to display error messages
-    in a custom window before logging. Enhances standard error logging by adding a visual notification mechanism.
-
-    The CustomLogger overrides the standard error logging method to first display an error message
-    in a separate window using display_custom_msg(), and then proceeds with standard error logging.
-    This provides an additional layer of user notification for critical log events.
-
-    Methods:
-        error: Overrides the standard error logging method to display a custom error message before logging.
-
-    Examples:
-        >> logger = CustomLogger('my_logger')
-        >> logger.error('Critical system failure')  # Displays error in custom window and logs
-
-    """
-    def error(self, msg, *args, **kwargs):
-        # Custom action before logging the error
-        display_custom_msg(msg, 'error')
-        super().error(msg, *args, **kwargs)
-
-
-def setup_logging(log_config_path='logging_config.ini', handler_name: str = None, config_path: str = 'config/WLEDLipSync.ini'):
-    """
-    Sets up logging configuration based on a specified configuration file.
-    This function checks for the existence of a logging configuration file, applies the configuration if found,
-    and returns a logger instance configured according to the settings,
-    or falls back to a basic configuration if the file is not found.
-
-    Args:
-        log_config_path (str): The path to the logging configuration file. Defaults to 'logging_config.ini'.
-        handler_name (str, optional): The name of the logger handler to use. Defaults to None.
-        config_path (str , optional): global config file path, default to config/WLEDLipSync.ini
-
-    Returns:
-        logging.Logger: The configured logger instance.
-    """
-    # Set the custom logger class
-    logging.setLoggerClass(CustomLogger)
-
-    if os.path.exists(log_config_path):
-        logging.config.fileConfig(log_config_path, encoding='utf-8', disable_existing_loggers=True)
-        config_data = read_config(config_path)
-        if str2bool(config_data[1]['log_to_main']):
-            v_logger = logging.getLogger('WLEDLogger')
-        else:
-            v_logger = logging.getLogger(handler_name)
-        v_logger.debug(f"Logging configured using {log_config_path} for {handler_name}")
-    else:
-        logging.basicConfig(level=logging.INFO, encoding='utf-8')
-        v_logger = logging.getLogger(handler_name)
-        v_logger.warning(f"Logging config file {log_config_path} not found. Using basic configuration.")
-
-    return v_logger
-
+# GUI free part, re-exported here
+from coreutils import (display_custom_msg, info_window_exe_name, CustomLogger, setup_logging, read_config,
+                       rhubarb_folder, rhubarb_exe_name, RHUBARB_RATE, wav_is_up_to_date, convert_audio,
+                       convert_for_rhubarb)
 
 def inform_window(message):
     """
@@ -152,6 +38,8 @@ def inform_window(message):
     This function initializes a Tkinter window with a message informing the user. It includes an 'OK' button
     to dismiss the message.
     """
+    import tkinter as tk
+
     root = tk.Tk()
     root.title("WLEDLipSync Information")
     root.configure(bg='#0E7490')  # Set the background color
@@ -213,6 +101,8 @@ def download_github_directory_as_zip(repo_url: str, destination: str, directory_
     Returns:
         None
     """
+    import requests
+
     # Construct the ZIP file URL for the specific directory
     zip_url = f"{repo_url}/archive/refs/heads/main.zip"  # Adjust branch name if necessary
 
@@ -278,6 +168,8 @@ def extract_from_url(source, destination, msg, seven_zip: bool = False):
     Raises:
         requests.HTTPError: If the HTTP request to download the ZIP file fails.
     """
+    import requests
+
     # Download the ZIP file
     response = requests.get(source)
     response.raise_for_status()  # Raise an error for bad responses
@@ -310,6 +202,8 @@ def download_spleeter():
         requests.RequestException: If there is an error during the download of the repository.
         zipfile.BadZipFile: If the downloaded file is not a valid ZIP file.
     """
+    import requests
+
     # module
     logger.info('downloading data for Spleeter ...')
     download_github_directory_as_zip(
@@ -349,6 +243,8 @@ def download_chataigne():
         requests.RequestException: If there is an error during the download of the repository.
         zipfile.BadZipFile: If the downloaded file is not a valid ZIP file.
     """
+    import requests
+
     logger.info('Downloading Portable Chataigne...')
     try:
         extract_from_url(
@@ -689,6 +585,8 @@ def download_rhubarb():
         >> download_rhubarb()  # Downloads Rhubarb for the current platform
 
     """
+    import requests
+
     logger.info('Downloading Portable Rhubarb...')
     try:
         extract_from_url(
@@ -703,34 +601,6 @@ def download_rhubarb():
         logger.error('Error: The downloaded file is not a valid ZIP file.')
 
 
-def rhubarb_folder():
-    """
-    Determines the appropriate base folder path for the Rhubarb Lip-Sync application based on the current operating system.
-    Returns the platform-specific directory for Rhubarb installation.
-
-    The function provides a consistent path to the Rhubarb base folder across different platforms,
-    selecting the correct subdirectory for Windows, Linux, or macOS. If the platform is not recognized, it returns None.
-
-    Returns:
-        str or None: The base folder path for Rhubarb for the current platform, or None if the platform is unsupported.
-
-    Examples:
-        >> rhubarb_folder()
-        'rhubarb/win'  # On Windows
-        >> rhubarb_folder()
-        'rhubarb/linux'  # On Linux
-
-    """
-    if sys.platform.lower() == 'win32':
-        return 'rhubarb/win'
-    elif sys.platform.lower() == 'linux':
-        return 'rhubarb/linux'
-    elif sys.platform.lower() == 'darwin':
-        return 'rhubarb/mac'
-    else:
-        return None
-
-
 def rhubarb_url():
     """
     Determines the appropriate download URL for the Rhubarb Lip-Sync application based on the current operating system
@@ -760,36 +630,6 @@ def rhubarb_url():
         return None
 
 
-def rhubarb_exe_name():
-    """
-    Determines the appropriate executable path for the Rhubarb Lip-Sync application based on the current operating
-    system and platform architecture.
-    Returns the platform-specific executable file for the Rhubarb application.
-
-    The function provides the correct executable path for Rhubarb across different platforms, supporting Windows,
-    Linux (x86_64), and macOS. If the platform is not recognized or supported, it returns None.
-
-    Returns:
-        str or None: The full path to the Rhubarb executable for the current platform,
-        or None if the platform is unsupported.
-
-    Examples:
-        >> rhubarb_exe_name()
-        'rhubarb/win/Rhubarb-Lip-Sync-1.13.0-Windows/rhubarb.exe'  # On Windows
-        >> rhubarb_exe_name()
-        'rhubarb/linux/Rhubarb-Lip-Sync-1.13.0-Linux/rhubarb'  # On Linux
-
-    """
-    if sys.platform.lower() == 'win32':
-        return f'{rhubarb_folder()}/Rhubarb-Lip-Sync-1.13.0-Windows/rhubarb.exe'
-    elif sys.platform.lower() == 'linux' and 'x86_64' in sysconfig.get_platform():
-        return f'{rhubarb_folder()}/Rhubarb-Lip-Sync-1.13.0-Linux/rhubarb'
-    elif sys.platform.lower() == 'darwin':
-        return f'{rhubarb_folder()}/Rhubarb-Lip-Sync-1.13.0-macOS/rhubarb'
-    else:
-        return None
-
-
 async def run_install_rhubarb():
     """
     Manages the asynchronous installation process for the Rhubarb Lip-Sync application.
@@ -1042,85 +882,14 @@ def validate_ip_address(ip_string):
     return False
 
 
-def read_config(config_file:str = 'config/WLEDLipSync.ini'):
-    """
-    Reads the configuration settings from a specified INI file.
-    This function loads the configuration file, retrieves various configuration sections,
-    and returns them for use in the application.
-
-    Returns:
-        tuple: A tuple containing the server configuration,
-        application configuration, colors configuration, and custom configuration.
-
-    """
-    # load config file
-    lip_cfg = cfg.load(config_file)
-    # config keys
-    server_cfg = lip_cfg.get('server')
-    app_cfg = lip_cfg.get('app')
-    colors_cfg = lip_cfg.get('colors')
-    custom_cfg = lip_cfg.get('custom')
-
-    return server_cfg, app_cfg, colors_cfg, custom_cfg
-
-
-def convert_audio(input_file, output_file):
-    """
-    Convert audio file from one format to another (e.g., MP3 to WAV or WAV to MP3).
-
-    # Example usage
-    # convert_audio('media/audio/input.mp3', 'output.wav')
-    # convert_audio('media/audio/input.wav', 'output.mp3')
-
-    :param input_file: Path to the input audio file
-    :param output_file: Path to the output audio file
-    :return: None
-    """
-    try:
-        # Open the input audio file
-        input_container = av.open(input_file)
-
-        # Determine the format of the output file based on its extension
-        output_format = output_file.split('.')[-1]
-
-        # Create an output audio file
-        output_container = av.open(output_file, mode='w', format=output_format)
-
-        # Add a stream for the output file
-        if output_format == 'wav':
-            output_stream = output_container.add_stream('pcm_s16le', rate=44100)  # WAV: PCM format, 16-bit samples
-        elif output_format == 'mp3':
-            output_stream = output_container.add_stream('mp3', rate=44100)  # MP3: MPEG format
-        else:
-            raise ValueError("Unsupported output format. Supported formats are 'wav' and 'mp3'.")
-
-        for frame in input_container.decode(audio=0):
-            # Encode the audio frame
-            for packet in output_stream.encode(frame):
-                output_container.mux(packet)
-
-        # Finalize the output file by flushing the stream
-        for packet in output_stream.encode():  # Encode any remaining data
-            output_container.mux(packet)
-
-        # Close the output container
-        output_container.close()
-
-        # Close the input container
-        input_container.close()
-
-        logger.info(f"Conversion complete: {input_file} to {output_file}")
-
-    except Exception as e:
-        logger.error(f"An error occurred during conversion: {e}")
-
-
 def image_array_to_base64(nparray):
     """
     this will convert a np image into base64
     :param nparray:
     :return: base64 string
     """
+    from PIL import Image
+
     # Convert NumPy array to PIL Image
     image = Image.fromarray(nparray)
     # Save the image to a bytes buffer
@@ -1142,6 +911,7 @@ async def load_image_async(img_path: str):
     Returns:
         cv2: The loaded image in RGB format, or None if the image could not be loaded.
     """
+    import cv2
 
     loop = asyncio.get_event_loop()
     img = await loop.run_in_executor(None, cv2.imread, img_path, cv2.IMREAD_COLOR)
@@ -1151,27 +921,22 @@ async def load_image_async(img_path: str):
 
 
 def find_cue_point(time_cue, cue_points):
-    """ find mouth card near provided time """
-
-    if not cue_points or 'mouthCues' not in cue_points:
-        return [{"start": "None", "end": "None", "value": "None"}, {"start": "None", "end": "None", "value": "None"}]
-
-    threshold = 5
-    actual_cue = {"start": "None", "end": "None", "value": "None"}
-    nearest_cue = {"start": "None", "end": "None", "value": "None"}
-    smallest_diff = float('inf')
-
-    for cue in cue_points['mouthCues']:
-        # find actual cue
-        if cue['start'] <= time_cue < cue['end']:
-            actual_cue = {"start": cue['start'], "end": cue['end'], "value": cue['value']}
-        # find nearest cue
-        diff = abs(time_cue - cue['start'])
-        if diff < smallest_diff and diff < threshold:
-            smallest_diff = diff
-            nearest_cue = {"start": cue['start'], "end": cue['end'], "value": cue['value']}
-
-    return actual_cue, nearest_cue
+    """
+    Find mouth card near provided time.
+
+    Args:
+        time_cue (float): time in seconds.
+        cue_points: a compiled CueTimeline (fast path), or the rhubarb dict (compiled on the fly).
+
+    Returns:
+        tuple: (actual_cue, nearest_cue) dicts with keys start, end, value.
+    """
+    from cuetimeline import CueTimeline
+
+    if not isinstance(cue_points, CueTimeline):
+        cue_points = CueTimeline(cue_points)
+
+    return cue_points.find(time_cue)
 
 
 """
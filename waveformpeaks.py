@@ -0,0 +1,89 @@
+"""
+a: zak-45
+d: 17/10/2026
+v: 1.0.0
+
+Precomputed waveform peaks for wavesurfer.
+
+Without peaks, wavesurfer fetch and decode the whole mp3 in the browser before drawing anything.
+Peaks are computed once from the generated WAV (memory mapped, see audiostore) and saved as peaks.json
+next to rhubarb.json. wavesurfer.load(url, peaks, duration) then draws at once. One level is computed
+(PEAKS_LEVELS), zoom re-renders it: changing peaks would need a new wavesurfer.load(), that reset the media.
+
+File format:
+    {"duration": 212.35, "levels": [{"rate": 400, "data": [0.012, ...]}]}
+    levels holds one entry, rate: points per second, data: max absolute amplitude (0.0 .. 1.0) per point.
+
+"""
+import json
+import os
+
+import numpy as np
+
+from audiostore import AudioStore
+from configmanager import ConfigManager
+
+cfg_mgr = ConfigManager(logger_name='WLEDLogger.utils')
+
+# points per second, zoom slider goes up to 1000 px/s, wavesurfer interpolate after the last one
+# one level: the browser use only the finest (no reload on zoom)
+PEAKS_LEVELS = (400,)
+
+# static routes (see app.add_media_files / add_static_files), local folder: url
+SERVED_FOLDERS = {'media/': '/media/', 'output/': '/output/'}
+
+
+def peaks_url(file_name: str):
+    """
+    URL of a file served by the app.
+
+    Returns:
+        str: url, '' if the file is not under a served folder.
+
+    """
+    relative = os.path.relpath(file_name).replace('\\', '/')
+    for folder, url in SERVED_FOLDERS.items():
+        if relative.startswith(folder):
+            return url + relative[len(folder):]
+    return ''
+
+
+def peaks_up_to_date(wav_file: str, peaks_file: str):
+    """ True if peaks_file exists and is newer than wav_file """
+    return (os.path.isfile(peaks_file) and os.path.isfile(wav_file)
+            and os.path.getmtime(peaks_file) >= os.path.getmtime(wav_file))
+
+
+def build_peaks(wav_file: str, peaks_file: str, levels=PEAKS_LEVELS):
+    """
+    Compute the peaks of wav_file (one level, 400 points per second by default) and write them to peaks_file.
+    Nothing is done if peaks_file is up to date.
+    Blocking, run it with run.io_bound from the UI.
+
+    Args:
+        wav_file (str): source WAV (e.g. vocals.wav).
+        peaks_file (str): json output (e.g. <output_folder>/<song>/peaks.json).
+        levels (tuple): points per second of the level. Defaults to PEAKS_LEVELS.
+
+    Returns:
+        bool: True if peaks_file is ready.
+
+    """
+    if peaks_up_to_date(wav_file, peaks_file):
+        return True
+    try:
+        with AudioStore(wav_file) as store:
+            data = {"duration": round(store.duration, 3), "levels": []}
+            for rate in levels:
+                peaks = store.frame_reduce(1 / rate, 'peak')
+                data['levels'].append({"rate": rate, "data": np.round(peaks, 3).tolist()})
+        os.makedirs(os.path.dirname(peaks_file) or '.', exist_ok=True)
+        # write then rename, a partial file is never served
+        with open(peaks_file + '.tmp', 'w', encoding='utf-8') as peaks:
+            json.dump(data, peaks, separators=(',', ':'))
+        os.replace(peaks_file + '.tmp', peaks_file)
+    except (OSError, ValueError) as e:
+        cfg_mgr.logger.error(f'Error computing waveform peaks: {e}')
+        return False
+    cfg_mgr.logger.debug(f'Waveform peaks saved to {peaks_file}')
+    return True
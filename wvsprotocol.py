@@ -0,0 +1,136 @@
+"""
+a: zak-45
+d: 17/10/2026
+v: 1.0.0
+
+Cue messages encoding for the WLEDVideoSync sink.
+
+The cast_image action was built as a nested dict, then serialized by json.dumps, for each cue.
+The JSON text only depends on the image number, so it is serialized once per image and reused.
+
+Opt-in compact binary frame (sent as WebSocket binary message), network byte order, 8 bytes:
+
+    version     uint8   FRAME_VERSION
+    type        uint8   CAST_IMAGE
+    image       uint8   image number (mouth index)
+    device      uint8   device number
+    timestamp   uint32  player time in ms
+
+Run this file to get a throughput benchmark of both encodings.
+
+"""
+import json
+import struct
+
+FRAME_VERSION = 1
+CAST_IMAGE = 1
+FRAME = struct.Struct('!BBBBI')
+
+
+class CastImageEncoder:
+    """
+    Encode cast_image messages for WLEDVideoSync, JSON (default) or binary.
+
+    JSON messages are pre-serialized templates: no allocation nor serialization per cue after the first one.
+
+    # Usage
+    encoder = CastImageEncoder()
+    ws_client.send_message(encoder.encode(3, player_time))  # str
+    encoder.binary = True
+    ws_client.send_message(encoder.encode(3, player_time))  # bytes, 8
+
+    """
+
+    def __init__(self, device: int = 0, class_name: str = 'Media', fps: int = 50, duration: int = 1,
+                 binary: bool = False):
+        """
+        Initializes the encoder, cast parameters are the same for all messages.
+
+        Args:
+            device (int): WLEDVideoSync device number. Defaults to 0.
+            class_name (str): WLEDVideoSync class name. Defaults to 'Media'.
+            fps (int): cast fps. Defaults to 50.
+            duration (int): cast duration. Defaults to 1.
+            binary (bool): send compact binary frame instead of JSON. Defaults to False.
+
+        """
+        self.device = device
+        self.class_name = class_name
+        self.fps = fps
+        self.duration = duration
+        self.binary = binary
+        self._templates = {}
+
+    def to_dict(self, image_number: int):
+        """ cast_image action as dict, same as before pre-serialization """
+        return {"action": {"type": "cast_image",
+                           "param": {"image_number": image_number,
+                                     "device_number": self.device,
+                                     "class_name": self.class_name,
+                                     "fps_number": self.fps,
+                                     "duration_number": self.duration}}}
+
+    def encode_json(self, image_number: int):
+        """ pre-serialized JSON text for this image """
+        message = self._templates.get(image_number)
+        if message is None:
+            message = self._templates[image_number] = json.dumps(self.to_dict(image_number))
+        return message
+
+    def encode_binary(self, image_number: int, player_time: float = 0.0):
+        """ compact binary frame for this image """
+        return FRAME.pack(FRAME_VERSION, CAST_IMAGE, image_number & 0xFF, self.device & 0xFF,
+                          int(player_time * 1000) & 0xFFFFFFFF)
+
+    def encode(self, image_number: int, player_time: float = 0.0):
+        """
+        Encode one cue, following the binary flag.
+
+        Args:
+            image_number (int): mouth image index.
+            player_time (float): player time in seconds, only used by binary frame.
+
+        Returns:
+            str or bytes: message ready for WebSocketClient.send_message().
+
+        """
+        if self.binary:
+            return self.encode_binary(image_number, player_time)
+        return self.encode_json(image_number)
+
+    def clear(self):
+        """ drop the pre-serialized templates, need to be called if cast parameters are modified """
+        self._templates = {}
+
+
+def decode_frame(frame: bytes):
+    """
+    Decode a binary frame (receiver side / debug).
+
+    Returns:
+        dict: version, type, image_number, device_number and timestamp (ms).
+
+    """
+    version, frame_type, image, device, timestamp = FRAME.unpack(frame)
+    return {'version': version, 'type': frame_type, 'image_number': image, 'device_number': device,
+            'timestamp': timestamp}
+
+
+if __name__ == "__main__":
+    from timeit import timeit
+
+    encoder = CastImageEncoder()
+    number = 200000
+
+    results = {
+        'dict + json.dumps': timeit(lambda: json.dumps(encoder.to_dict(3)), number=number),
+        'json template': timeit(lambda: encoder.encode_json(3), number=number),
+        'binary frame': timeit(lambda: encoder.encode_binary(3, 12.345), number=number),
+    }
+    sizes = {
+        'dict + json.dumps': len(json.dumps(encoder.to_dict(3)).encode()),
+        'json template': len(encoder.encode_json(3).encode()),
+        'binary frame': len(encoder.encode_binary(3, 12.345)),
+    }
+    for name, duration in results.items():
+        print(f'{name:20} {number / duration:>12,.0f} msg/s  {sizes[name]:>4} bytes')
@@ -5,8 +5,21 @@ v: 1.0.0.0
 
 A class to retrieve music artist information and song lyrics using the YTMusic API.
 
+Song info can be cached on disk (see metadatacache): a song already looked up costs no network call.
+The API client can be given (any object with the YTMusic methods used here), run this file to check
+the cache against a local stub client.
+
+Independent API calls run at the same time, with a bounded thread pool: artist search first (unknown artist:
+nothing else is requested), then artist details and song search together, then the watch playlist of all
+song candidates. Candidates are checked in order,
+the first one with lyrics wins and outstanding candidate lookups are cancelled.
+Time spent per API call is logged (debug) and kept into last_timings.
+
 """
-from ytmusicapi import YTMusic
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import perf_counter
+
 from configmanager import ConfigManager
 
 cfg_mgr = ConfigManager(logger_name='WLEDLogger.ytmusicapi')
@@ -17,7 +30,10 @@ class MusicInfoRetriever:
     as well as to search for a song and obtain its lyrics.
 
     Attributes:
-        yt: An instance of YTMusic to interact with the YTMusic API.
+        yt: An instance of YTMusic to interact with the YTMusic API, created on first use.
+        cache (MetadataCache or None): song info cache, None to always query the API.
+        max_workers (int): max number of API calls at the same time.
+        last_timings (list): (call name, seconds) of each API call of the last lookup.
 
     Methods:
         get_artist_info(artist_name):
@@ -36,14 +52,43 @@ class MusicInfoRetriever:
         logger.info(info)
     """
 
-    def __init__(self):
+    def __init__(self, client=None, cache=None, max_workers: int = 4):
         """
         Initializes an instance of the MusicInfoRetriever class.
 
-        This constructor sets up the YTMusic API client, allowing the instance to
-        interact with the YTMusic API for retrieving artist information and song lyrics.
+        The YTMusic API client (import + session) is not created here but on first use,
+        so the application startup does not pay for it.
+
+        Args:
+            client (optional): API client, YTMusic if not given (e.g. a stub for test).
+            cache (MetadataCache, optional): song info cache. Defaults to None.
+            max_workers (int): max number of API calls at the same time. Defaults to 4.
         """
-        self.yt = YTMusic()
+        self._yt = client
+        self.cache = cache
+        self.max_workers = max(1, max_workers)
+        self.last_timings = []
+        self._lock = Lock()
+
+    @property
+    def yt(self):
+        """ YTMusic API client, created on first access """
+        if self._yt is None:
+            from ytmusicapi import YTMusic
+
+            self._yt = YTMusic()
+        return self._yt
+
+    def _call(self, name, *args, **kwargs):
+        """ call an API method, time is recorded into last_timings """
+        start = perf_counter()
+        try:
+            return getattr(self.yt, name)(*args, **kwargs)
+        finally:
+            elapsed = perf_counter() - start
+            with self._lock:
+                self.last_timings.append((name, elapsed))
+            cfg_mgr.logger.debug(f'YTMusic {name}: {elapsed * 1000:.0f} ms')
 
     def get_artist_info(self, artist_name):
         """
@@ -60,15 +105,23 @@ class MusicInfoRetriever:
                           or None if the artist is not found.
         """
 
-        artists = self.yt.search(artist_name, filter='artists')
+        artist_id = self._search_artist(artist_name)
+        if artist_id is None:
+            return None
+        return self._artist_info(artist_id)
+
+    def _search_artist(self, artist_name):
+        """ browse ID of the artist, None if not found """
+        artists = self._call('search', artist_name, filter='artists')
         if not artists:
             cfg_mgr.logger.debug(f"No artists found for '{artist_name}'.")
             return None
         # we take the first record as this is the most probable one
-        artist = artists[0]
-        artist_id = artist['browseId']
-        # grab info
-        artist_all_info = self.yt.get_artist(artist_id)
+        return artists[0]['browseId']
+
+    def _artist_info(self, artist_id):
+        """ artist details, see get_artist_info """
+        artist_all_info = self._call('get_artist', artist_id)
 
         return {
             'name': artist_all_info['name'],
@@ -78,16 +131,19 @@ class MusicInfoRetriever:
             'top_5': artist_all_info['songs']['results']
         }
 
-    def search_song(self, artist, song_name, songs_result):
+    def search_song(self, artist, song_name, songs_result, pool=None):
         """
         Searches for a specific song by a given artist within a list of song results.
         This function filters the results to find a match based on the artist's ID and the song name,
         and retrieves detailed information about the song, including its lyrics if available.
+        Watch playlists of all candidates are requested at the same time (pool), results are checked
+        in order and the lookups not started yet are cancelled once lyrics are found.
 
         Args:
             artist (dict): A dictionary containing information about the artist, including their ID.
             song_name (str): The name of the song to search for.
             songs_result (list): A list of song dictionaries to search through.
+            pool (ThreadPoolExecutor, optional): executor for the candidate lookups, sequential if None.
 
         Returns:
             dict: A dictionary containing details about the found song,
@@ -98,11 +154,17 @@ class MusicInfoRetriever:
         song_data = {}
         artist_id = artist['id']
         # iterate over the search result, this could include not expected result (e.g. other artist)
-        for index, song in enumerate(songs_result):
-            # we take only song from this artist ID
-            if song['artists'][0]['id'] == artist_id and song_name.lower() in song['title'].lower():
-                # grab video info
-                video = self.yt.get_watch_playlist(song['videoId'])
+        # we take only song from this artist ID
+        candidates = [(index, song) for index, song in enumerate(songs_result)
+                      if song['artists'][0]['id'] == artist_id and song_name.lower() in song['title'].lower()]
+        if pool is None:
+            videos = ((index, self._call('get_watch_playlist', song['videoId'])) for index, song in candidates)
+        else:
+            futures = [(index, pool.submit(self._call, 'get_watch_playlist', song['videoId']))
+                       for index, song in candidates]
+            videos = ((index, future.result()) for index, future in futures)
+        try:
+            for index, video in videos:
                 # put the first result into dict
                 if index == 0:
                     song_data = {
@@ -118,8 +180,13 @@ class MusicInfoRetriever:
                     }
                 # take the first video with lyrics
                 if video.get('lyrics') is not None:
-                    song_data['lyrics'] = self.yt.get_lyrics(video['lyrics'])
+                    song_data['lyrics'] = self._call('get_lyrics', video['lyrics'])
                     break
+        finally:
+            if pool is not None:
+                # outstanding candidate lookups are not needed anymore
+                for _, future in futures:
+                    future.cancel()
 
         return song_data
 
@@ -131,6 +198,7 @@ class MusicInfoRetriever:
         the first entry with non-None lyrics. If found, it returns the lyrics; otherwise,
         it returns only info if exist else None.
         Artist info are included.
+        With a cache, the result (None included) is stored and reused until it expires.
 
         Args:
             song_name (str): The name of the song to search for.
@@ -140,16 +208,100 @@ class MusicInfoRetriever:
             str or None: The lyrics/song info of the song if found, or None if no data are available.
 
         """
-        # search artist to get ID
-        artist = self.get_artist_info(artist_name)
+        if self.cache is not None:
+            key = self.cache.key(artist_name, song_name)
+            found, song_data = self.cache.get(key)
+            if found:
+                cfg_mgr.logger.debug(f'Song info from cache: {key}')
+                return song_data
+            song_data = self._song_info_with_lyrics(song_name, artist_name)
+            self.cache.put(key, song_data)
+            return song_data
+
+        return self._song_info_with_lyrics(song_name, artist_name)
 
-        if artist is not None:
-            # get all possibility
-            songs_possibility = self.yt.search(f"{song_name} {artist_name}", filter='songs')
+    def _song_info_with_lyrics(self, song_name, artist_name):
+        self.last_timings = []
+        start = perf_counter()
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ytmusic')
+        try:
+            # search artist to get ID, nothing more to ask if unknown
+            artist_id = self._search_artist(artist_name)
+            if artist_id is None:
+                return None
+
+            # artist details and all song possibilities at the same time
+            artist_future = pool.submit(self._artist_info, artist_id)
+            songs_future = pool.submit(self._call, 'search', f"{song_name} {artist_name}", filter='songs')
+            artist = artist_future.result()
+            songs_possibility = songs_future.result()
             # retrieve data for the song
-            song_data = self.search_song(artist,song_name,songs_possibility)
+            song_data = self.search_song(artist, song_name, songs_possibility, pool)
             # return only song info if something
             if len(song_data) > 0:
                 return song_data
 
-        return None
+            return None
+        finally:
+            # do not wait for running calls not needed anymore
+            pool.shutdown(wait=False, cancel_futures=True)
+            cfg_mgr.logger.debug(f'YTMusic lookup {artist_name} / {song_name}: '
+                                 f'{(perf_counter() - start) * 1000:.0f} ms, {len(self.last_timings)} calls')
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    from metadatacache import MetadataCache
+
+    class StubClient:
+        """ local stand-in of YTMusic, count the calls, 50 ms network latency each """
+
+        def __init__(self):
+            self.calls = 0
+
+        def search(self, query, filter=None):
+            time.sleep(0.05)
+            self.calls += 1
+            if filter == 'artists':
+                return [{'browseId': 'A1'}] if 'century' in query.lower() else []
+            return [{'artists': [{'id': 'A1'}], 'title': 'Why', 'videoId': 'V1'}]
+
+        def get_artist(self, artist_id):
+            time.sleep(0.05)
+            self.calls += 1
+            return {'name': 'Century Lover', 'description': '', 'thumbnails': [], 'songs': {'results': []}}
+
+        def get_watch_playlist(self, video_id):
+            time.sleep(0.05)
+            self.calls += 1
+            return {'lyrics': 'L1', 'tracks': [{'title': 'Why', 'length': '3:10', 'year': '2020', 'videoId': video_id,
+                                                'album': {'id': 'B1', 'name': 'Album'}, 'thumbnail': []}]}
+
+        def get_lyrics(self, browse_id):
+            time.sleep(0.05)
+            self.calls += 1
+            return {'lyrics': 'la la la'}
+
+    with tempfile.TemporaryDirectory() as folder:
+        stub = StubClient()
+        retriever = MusicInfoRetriever(client=stub, cache=MetadataCache(folder + '/metadata.sqlite'))
+        lookup_start = time.perf_counter()
+        first = retriever.get_song_info_with_lyrics('Why', 'Century Lover')
+        lookup_time = time.perf_counter() - lookup_start
+        timings = list(retriever.last_timings)
+        network_calls = stub.calls
+        # same song, other case / spaces: no network call
+        assert retriever.get_song_info_with_lyrics('why ', 'century  lover') == first
+        # not found song is cached too
+        assert retriever.get_song_info_with_lyrics('Nothing', 'Unknown') is None
+        unknown_calls = stub.calls
+        # unknown artist: only the artist search
+        assert unknown_calls == network_calls + 1
+        assert retriever.get_song_info_with_lyrics('Nothing', 'Unknown') is None
+        assert stub.calls == unknown_calls
+        print(f'first lookup: {network_calls} calls in {lookup_time * 1000:.0f} ms, cached lookups: 0 calls, '
+              f'lyrics: {first["lyrics"]}')
+        for call_name, call_time in timings:
+            print(f'    {call_name:20} {call_time * 1000:.0f} ms')